@@ -0,0 +1,59 @@
+"""Benchmark: custo por chamada da detecção de backend.
+
+Compara a detecção antiga (ler st.secrets/env a cada consulta) com o backend
+resolvido uma única vez por get_backend(). Também mede uma leitura completa
+no SQLite local (sem o cache de consultas) e a mesma leitura em cache, para
+dar a ordem de grandeza.
+
+Uso:
+    python bench_backend.py [--n 20000]
+"""
+import argparse
+import os
+import tempfile
+import timeit
+
+import db
+
+
+def _legacy_lookup():
+    # O que cada função de db.py fazia antes: _using_supabase_api() no topo,
+    # e _using_postgres()/_using_supabase_api() em connect() e _adapt_query().
+    url, key = db._get_supabase_cfg()
+    pg = db._get_pg_url()
+    url, key = db._get_supabase_cfg()
+    pg = db._get_pg_url()
+    return bool(url and key), bool(pg)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--n", type=int, default=20000, help="iterações por medição")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_NAME = os.path.join(tmp, "bench.db")
+        backend = db.reload_backend()
+        db.create_table()
+        for i in range(200):
+            db.insert_question({"disciplina": f"D{i % 5}", "aula": f"A{i % 20}", "enunciado": f"Q{i}", "alternativas": ["A) 1", "B) 2"]})
+
+        legacy = timeit.timeit(_legacy_lookup, number=args.n) / args.n
+        cached = timeit.timeit(db.get_backend, number=args.n) / args.n
+        n_read = max(1, args.n // 100)
+        filters = {"disciplina": "D1"}
+        # Leitura real: o cache de consultas é limpo a cada chamada.
+        read = timeit.timeit(lambda: (db.clear_cache(), db.get_all_questions(filters=filters)), number=n_read) / n_read
+        hit = timeit.timeit(lambda: db.get_all_questions(filters=filters), number=n_read) / n_read
+
+        print(f"backend: {backend.label}")
+        print(f"detecção por chamada (antiga): {legacy * 1e6:9.2f} µs")
+        print(f"get_backend() em cache:        {cached * 1e6:9.2f} µs")
+        print(f"economia por chamada:          {(legacy - cached) * 1e6:9.2f} µs")
+        print(f"get_all_questions (SQLite):    {read * 1e6:9.2f} µs")
+        print(f"get_all_questions (em cache):  {hit * 1e6:9.2f} µs")
+        db.close_pool()
+
+
+if __name__ == "__main__":
+    main()
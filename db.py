@@ -1,15 +1,34 @@
-import json
+import atexit
+import functools
+import logging
 import os
+import re
 import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
+import numpy as np
+
+import dedup
+import models
+import scheduler as srs
+
 # Optional: Streamlit secrets for external DB (Supabase/Postgres)
 try:
     import streamlit as st  # type: ignore
 except Exception:  # streamlit not strictly required for local scripts
     st = None  # noqa: N816
 
+logger = logging.getLogger(__name__)
+
 DB_NAME = "questoes.db"
+# Tamanho padrão dos lotes de escrita em massa (insert_questions).
+DEFAULT_BATCH_SIZE = 500
 
 # Canonical column order used across backends
 COLUMNS = [
@@ -28,6 +47,66 @@ COLUMNS = [
     "proxima_revisao",
     "revisoes_feitas",  # novo campo para repetição espaçada (inteiro)
 ]
+# Colunas de texto pesado; as listas de navegação não precisam delas.
+HEAVY_COLUMNS = ("enunciado", "alternativas", "comentario")
+LIGHT_COLUMNS = [c for c in COLUMNS if c not in HEAVY_COLUMNS]
+# Derivadas de alternativas na escrita (migração 11): letra de cada
+# alternativa e prévia do Banco. Fora de COLUMNS; pedidas pelo nome.
+ALTERNATIVAS_COLUMNS = ("alternativas_letras", "alternativas_preview")
+# Datas (migração 12): DATE no Postgres, texto ISO (AAAA-MM-DD) no SQLite;
+# as leituras devolvem sempre a string ISO.
+DATE_COLUMNS = ("data_resposta", "proxima_revisao")
+# Calculadas na consulta, fora de COLUMNS: dias de hoje até proxima_revisao
+# (<= 0: revisão vencida ou hoje; NULL sem data).
+COMPUTED_COLUMNS = ("dias_revisao",)
+
+
+class LazyQuestion:
+    """Row with only the light columns loaded; heavy text is fetched on demand.
+
+    Indexable like the full tuple rows (row[6] is enunciado) and by column
+    name (row["status"]). The first access to a column that was not loaded
+    fetches the whole row by id with get_question().
+    """
+
+    __slots__ = ("_values",)
+
+    def __init__(self, values: dict):
+        self._values = values
+
+    @property
+    def id(self):
+        return self._values["id"]
+
+    def __getitem__(self, key):
+        col = COLUMNS[key] if isinstance(key, int) else key
+        if col not in self._values:
+            full = get_question(self.id)
+            if full is not None:
+                self._values.update(zip(COLUMNS, full))
+        return self._values.get(col)
+
+    def __len__(self):
+        return len(COLUMNS)
+
+    def __iter__(self):
+        return (self[c] for c in COLUMNS)
+
+    def __repr__(self):
+        return f"LazyQuestion({self._values!r})"
+
+
+def _projection(columns, lazy: bool) -> list[str]:
+    """Validate requested columns (also guards the SQL we build from them)."""
+    if columns is None:
+        return list(LIGHT_COLUMNS if lazy else COLUMNS)
+    columns = list(columns)
+    unknown = [c for c in columns if c not in COLUMNS and c not in ALTERNATIVAS_COLUMNS and c not in COMPUTED_COLUMNS]
+    if unknown:
+        raise ValueError(f"Colunas desconhecidas: {unknown}")
+    if lazy and "id" not in columns:
+        columns.insert(0, "id")
+    return columns
 
 
 def _get_pg_url() -> str | None:
@@ -71,6 +150,18 @@ def _get_supabase_cfg() -> tuple[str | None, str | None]:
     return None, None
 
 
+def _get_setting(section: str, key: str, env_var: str, default=None):
+    """Read an optional setting from st.secrets[section][key] or an env var."""
+    try:
+        if st is not None and hasattr(st, "secrets") and section in st.secrets:
+            val = st.secrets[section].get(key)
+            if val is not None:
+                return val
+    except Exception:
+        pass
+    return os.environ.get(env_var, default)
+
+
 def _ensure_sslmode(url: str) -> str:
     # Supabase requires TLS; add sslmode=require if not present
     if "sslmode=" in url:
@@ -79,38 +170,32 @@ def _ensure_sslmode(url: str) -> str:
     return f"{url}{sep}sslmode=require"
 
 
-def _using_postgres() -> bool:
-    return bool(_get_pg_url())
 
 
-def _using_supabase_api() -> bool:
-    url, key = _get_supabase_cfg()
-    return bool(url and key)
+def _open_pg_connection(url: str):
+    try:
+        import psycopg2  # type: ignore
+    except Exception as ex:
+        raise RuntimeError("psycopg2 is required for Postgres. Add 'psycopg2-binary' to requirements.txt") from ex
+    conn = psycopg2.connect(_ensure_sslmode(url))
+    # Colunas DATE (migração 12) chegam como a string ISO que o psycopg2
+    # recebe do servidor (DateStyle ISO), igual às colunas TEXT de antes.
+    date_iso = psycopg2.extensions.new_type(psycopg2.extensions.DATE.values, "DATE_ISO", lambda value, cur: value)
+    psycopg2.extensions.register_type(date_iso, conn)
+    return conn
 
 
-def get_backend_label() -> str:
-    if _using_supabase_api():
-        return "Supabase API"
-    if _using_postgres():
-        return "Postgres (Supabase)"
-    return "SQLite (local)"
+def normalizar_busca(text) -> str:
+    """Lowercase, accent-stripped form used for text search ("Ação" -> "acao")."""
+    if not text:
+        return ""
+    return unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii").lower()
 
-def connect():
-    """Open a DB connection for SQL backends (Postgres/SQLite).
 
-    Supabase API mode does not use a SQL connection; functions will call the
-    HTTP API via the Supabase Python SDK instead.
-    """
-    if _using_postgres() and not _using_supabase_api():
-        pg_url = _ensure_sslmode(_get_pg_url())
-        try:
-            import psycopg2  # type: ignore
-        except Exception as ex:
-            raise RuntimeError("psycopg2 is required for Postgres. Add 'psycopg2-binary' to requirements.txt") from ex
-        conn = psycopg2.connect(pg_url)
-        return conn
-    # SQLite fallback
-    conn = sqlite3.connect(DB_NAME, check_same_thread=False)
+def _open_sqlite_connection(path: str):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    # Busca sem acentos no próprio SQL (ver _SQLBackend._text_clause).
+    conn.create_function("normalizar_busca", 1, normalizar_busca, deterministic=True)
     c = conn.cursor()
     c.execute("PRAGMA journal_mode=WAL;")
     c.execute("PRAGMA synchronous=NORMAL;")
@@ -118,396 +203,3067 @@ def connect():
     return conn
 
 
-_sb_client = None
+# -----------------------
+# Pool de conexões
+# -----------------------
+# Uma rerun do Streamlit chama dezenas de funções deste módulo; abrir uma
+# conexão TLS nova (Postgres) ou refazer os PRAGMAs (SQLite) em cada uma
+# domina a latência. As conexões são reaproveitadas por processo.
+_POOL_MAX_SIZE = 5
+_POOL_TIMEOUT_S = 30.0
+# Conexões ociosas há mais tempo que isso recebem um "SELECT 1" antes de reuso.
+_POOL_HEALTHCHECK_AFTER_S = 60.0
 
 
-def _get_supabase_client():
-    global _sb_client
-    if _sb_client is not None:
-        return _sb_client
-    url, key = _get_supabase_cfg()
-    if not (url and key):
-        return None
-    try:
-        from supabase import create_client  # type: ignore
-    except Exception as ex:
-        raise RuntimeError("'supabase' package is required. Add 'supabase' to requirements.txt") from ex
-    _sb_client = create_client(url, key)
-    return _sb_client
+class _PostgresPool:
+    """Thread-safe pool of psycopg2 connections with a max-size limit.
 
+    acquire() blocks up to `timeout` seconds when all connections are in use.
+    Idle connections are health-checked before reuse; broken ones are dropped
+    and replaced transparently.
+    """
 
-def _adapt_query(query: str) -> str:
-    """Adapt placeholder style between SQLite (?) and Postgres (%s)."""
-    if _using_postgres():
-        # naive but safe for our static queries
-        return query.replace("?", "%s")
-    return query
+    def __init__(self, url: str, max_size: int = _POOL_MAX_SIZE, timeout: float = _POOL_TIMEOUT_S):
+        self.url = url
+        self.max_size = max(1, int(max_size))
+        self.timeout = timeout
+        self._idle: list[tuple[object, float]] = []  # (conn, last_used)
+        self._size = 0  # conexões abertas (ociosas + emprestadas)
+        self._cond = threading.Condition()
 
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            conn, last_used = None, 0.0
+            with self._cond:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise RuntimeError(
+                            f"Pool de conexões Postgres esgotado ({self.max_size} conexões em uso)."
+                        )
+                    self._cond.wait(remaining)
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                else:
+                    self._size += 1
+            if conn is None:
+                try:
+                    return _open_pg_connection(self.url)
+                except Exception:
+                    self._forget()
+                    raise
+            if self._is_healthy(conn, last_used):
+                return conn
+            self._discard(conn)
 
-def _exec(conn, query: str, params: list | tuple = ()):  # minimal cursor exec helper
-    q = _adapt_query(query)
-    cur = conn.cursor()
-    cur.execute(q, params)
-    return cur
+    def release(self, conn):
+        if getattr(conn, "closed", 1):
+            self._discard(conn)
+            return
+        try:
+            # Não devolve conexões com transação aberta/abortada ao pool.
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
 
-def create_table():
-    if _using_supabase_api():
-        # Supabase: tentativa de detectar presença da coluna (não dá para ALTER via PostgREST).
-        sb = _get_supabase_client()
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _is_healthy(self, conn, last_used: float) -> bool:
+        if getattr(conn, "closed", 1):
+            return False
+        if time.monotonic() - last_used < _POOL_HEALTHCHECK_AFTER_S:
+            return True
         try:
-            res = sb.table("questoes").select("id, revisoes_feitas").limit(1).execute()
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.fetchone()
+            conn.rollback()
+            return True
         except Exception:
-            if st is not None:
-                st.warning(
-                    "Verifique se a tabela 'questoes' possui coluna 'revisoes_feitas INT'. Crie manualmente se necessário."
-                )
-        return
-    conn = connect()
-    try:
-        if _using_postgres():
-            _exec(
-                conn,
-                """
-                CREATE TABLE IF NOT EXISTS questoes (
-                    id SERIAL PRIMARY KEY,
-                    numero TEXT,
-                    tipo TEXT,
-                    disciplina TEXT,
-                    aula TEXT,
-                    origem_pdf TEXT,
-                    enunciado TEXT,
-                    alternativas TEXT,
-                    resposta_correta TEXT,
-                    comentario TEXT,
-                    status TEXT DEFAULT 'nao_respondida',
-                    data_resposta TEXT,
-                    proxima_revisao TEXT,
-                    revisoes_feitas INTEGER DEFAULT 0
-                )
-                """,
-            )
-            _exec(conn, "CREATE INDEX IF NOT EXISTS idx_questoes_status ON questoes(status)")
-            _exec(conn, "CREATE INDEX IF NOT EXISTS idx_questoes_proxrev ON questoes(proxima_revisao)")
-            _exec(conn, "CREATE INDEX IF NOT EXISTS idx_questoes_disciplina ON questoes(disciplina)")
-            _exec(conn, "CREATE INDEX IF NOT EXISTS idx_questoes_aula ON questoes(aula)")
-            # Caso a coluna já exista não faz nada; se não existir (tabela antiga) adiciona.
-            _exec(
-                conn,
-                """
-                DO $$ BEGIN
-                    BEGIN
-                        ALTER TABLE questoes ADD COLUMN revisoes_feitas INTEGER DEFAULT 0;
-                    EXCEPTION WHEN duplicate_column THEN NULL;
-                    END;
-                END $$;
-                """,
-            )
-        else:
-            _exec(
-                conn,
-                """
-                CREATE TABLE IF NOT EXISTS questoes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    numero TEXT,
-                    tipo TEXT,
-                    disciplina TEXT,
-                    aula TEXT,
-                    origem_pdf TEXT,
-                    enunciado TEXT,
-                    alternativas TEXT,
-                    resposta_correta TEXT,
-                    comentario TEXT,
-                    status TEXT DEFAULT 'nao_respondida',
-                    data_resposta TEXT,
-                    proxima_revisao TEXT,
-                    revisoes_feitas INTEGER DEFAULT 0
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._forget()
+
+    def _forget(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+
+# -----------------------
+# Backends
+# -----------------------
+_DISTINCT_WHITELIST = {"disciplina", "aula", "status", "origem_pdf", "tipo", "numero"}
+
+# Contagem por (disciplina, aula, status): alimenta os filtros de aula das abas
+# sem trafegar enunciados/comentários.
+RESUMO_AULAS_VIEW_SQL = """
+    CREATE VIEW questoes_resumo_aulas AS
+    SELECT disciplina, aula, status, COUNT(*) AS quantidade
+    FROM questoes
+    GROUP BY disciplina, aula, status
+"""
+
+# Rollup do Desempenho: uma linha por (dia, disciplina, status, revisões)
+# com a quantidade de questões nesse estado. Mantido por triggers em
+# questoes, então o painel lê dezenas de linhas em vez da tabela inteira.
+# Chaves nulas viram '' / 'nao_respondida' / 0 (a chave primária não aceita
+# NULL).
+ESTATISTICAS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS estatisticas_diarias (
+        dia TEXT NOT NULL,
+        disciplina TEXT NOT NULL,
+        status TEXT NOT NULL,
+        revisoes_feitas INTEGER NOT NULL,
+        quantidade INTEGER NOT NULL,
+        PRIMARY KEY (dia, disciplina, status, revisoes_feitas)
+    )
+"""
+# Estado do agendador (ver scheduler.py); fora de COLUMNS, lido só ao agendar.
+SRS_COLUMNS = ("intervalo", "facilidade", "estabilidade", "dificuldade")
+_PG_TYPES = {"intervalo": "integer", "facilidade": "real", "estabilidade": "real", "dificuldade": "real"}
+_SRS_COLUMN_TYPES = tuple((c, _PG_TYPES[c].upper()) for c in SRS_COLUMNS)
+_PG_TYPES.update({"id": "integer", "proxima_revisao": "date", "revisoes_feitas": "integer", "status": "text", "busca_normalizada": "text"})
+_PG_TYPES.update({"alternativas": "text", **{c: "text" for c in ALTERNATIVAS_COLUMNS}})
+# Colunas que update_by_id aceita (entram no SQL por nome).
+_UPDATABLE_COLUMNS = frozenset(
+    ("proxima_revisao", "revisoes_feitas", "status", "busca_normalizada", "alternativas") + SRS_COLUMNS + ALTERNATIVAS_COLUMNS
+)
+# Parâmetros por instrução no SQLite (SQLITE_MAX_VARIABLE_NUMBER padrão).
+_SQLITE_MAX_VARS = 32766 if sqlite3.sqlite_version_info >= (3, 32) else 999
+
+# Busca textual no SQLite (migração 8): tabela FTS5 de conteúdo externo (só o
+# índice; o texto continua em questoes), mantida em dia por triggers.
+BUSCA_FTS_SQL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS questoes_fts USING fts5(
+        enunciado, comentario,
+        content='questoes', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+BUSCA_FTS_TRIGGERS_SQL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS questoes_fts_ai AFTER INSERT ON questoes BEGIN
+        INSERT INTO questoes_fts (rowid, enunciado, comentario) VALUES (NEW.id, NEW.enunciado, NEW.comentario);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS questoes_fts_ad AFTER DELETE ON questoes BEGIN
+        INSERT INTO questoes_fts (questoes_fts, rowid, enunciado, comentario) VALUES ('delete', OLD.id, OLD.enunciado, OLD.comentario);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS questoes_fts_au AFTER UPDATE OF enunciado, comentario ON questoes BEGIN
+        INSERT INTO questoes_fts (questoes_fts, rowid, enunciado, comentario) VALUES ('delete', OLD.id, OLD.enunciado, OLD.comentario);
+        INSERT INTO questoes_fts (rowid, enunciado, comentario) VALUES (NEW.id, NEW.enunciado, NEW.comentario);
+    END
+    """,
+)
+# Termos da caixa de busca além deste número são ignorados.
+_MAX_SEARCH_TERMS = 16
+
+# Índice de duplicatas (migração 10; ver dedup.py): hash de conteúdo e
+# assinatura MinHash por questão, as chaves LSH para achar candidatas e as
+# questões marcadas como parecidas com uma anterior.
+DEDUP_TABLES_SQL = (
+    """
+    CREATE TABLE IF NOT EXISTS questoes_assinaturas (
+        questao_id INTEGER PRIMARY KEY REFERENCES questoes(id) ON DELETE CASCADE,
+        hash TEXT NOT NULL,
+        minhash TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_questoes_assinaturas_hash ON questoes_assinaturas(hash)",
+    """
+    CREATE TABLE IF NOT EXISTS questoes_lsh (
+        chave BIGINT NOT NULL,
+        questao_id INTEGER NOT NULL REFERENCES questoes(id) ON DELETE CASCADE,
+        PRIMARY KEY (chave, questao_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS questoes_similares (
+        questao_id INTEGER PRIMARY KEY REFERENCES questoes(id) ON DELETE CASCADE,
+        similar_a INTEGER NOT NULL REFERENCES questoes(id) ON DELETE CASCADE,
+        similaridade REAL NOT NULL
+    )
+    """,
+)
+
+
+def _check_update_columns(columns):
+    bad = set(columns) - _UPDATABLE_COLUMNS
+    if bad:
+        raise ValueError(f"Colunas não permitidas em update_by_id: {sorted(bad)}")
+
+ESTATISTICAS_COLUMNS = ("dia", "disciplina", "status", "revisoes_feitas", "quantidade")
+
+
+def _stats_key_sql(row: str = "") -> str:
+    """Rollup key expressions over questoes columns (prefixed with `row`, e.g. "NEW.").
+
+    The CAST keeps the day expression valid for TEXT and DATE data_resposta.
+    """
+    return (
+        f"COALESCE(substr(CAST({row}data_resposta AS TEXT), 1, 10), ''), COALESCE({row}disciplina, ''), "
+        f"COALESCE({row}status, 'nao_respondida'), COALESCE({row}revisoes_feitas, 0)"
+    )
+
+
+ESTATISTICAS_REBUILD_SQL = f"""
+    INSERT INTO estatisticas_diarias (dia, disciplina, status, revisoes_feitas, quantidade)
+    SELECT {_stats_key_sql()}, COUNT(*)
+    FROM questoes
+    GROUP BY 1, 2, 3, 4
+"""
+
+
+class Backend:
+    """Data-access operations; one implementation per storage backend.
+
+    The module-level functions (get_all_questions, insert_question, ...)
+    delegate to the backend returned by get_backend(), which is resolved
+    from secrets/env once per process.
+    """
+
+    label = ""
+
+    def migrate(self) -> list[tuple[int, str, object]]:
+        """Bring the schema up to date; returns the steps applied now."""
+        raise NotImplementedError
+
+    def insert_question(self, data: dict):
+        raise NotImplementedError
+
+    def insert_questions(self, items, batch_size: int, progress=None, dedup_threshold=None, on_duplicate=None) -> int:
+        """Insert in batches; with `dedup_threshold`, skip exact duplicates and
+        flag near-duplicates (see _insert_dedup)."""
+        raise NotImplementedError
+
+    def get_all_questions(self, filters: dict | None = None, status: str | None = None, columns=COLUMNS):
+        raise NotImplementedError
+
+    def get_due_for_review(self, filters: dict | None = None, columns=COLUMNS):
+        raise NotImplementedError
+
+    def get_question(self, qid: int, columns=COLUMNS):
+        """Row (in COLUMNS order, or `columns`) for one question, or None."""
+        raise NotImplementedError
+
+    def get_questions_page(self, filters: dict | None, after_id: int | None, limit: int, columns=COLUMNS):
+        """Up to `limit` rows with id > after_id (keyset pagination), ordered by id."""
+        raise NotImplementedError
+
+    def count_questions(self, filters: dict | None = None) -> int:
+        raise NotImplementedError
+
+    def search_questions(self, query: str, filters: dict | None, limit: int, offset: int) -> list[int]:
+        """Ids matching the words of `query` (prefix match, accent-insensitive),
+        most relevant first; `filters` as in get_questions_page ("texto" ignored)."""
+        raise NotImplementedError
+
+    def get_questions_by_ids(self, ids: list[int], columns=COLUMNS) -> list[tuple]:
+        """Rows for `ids`, in no particular order."""
+        raise NotImplementedError
+
+    def backfill_busca_normalizada(self, batch_size: int) -> int:
+        """Fill busca_normalizada where it is NULL; returns how many rows."""
+        raise NotImplementedError
+
+    def backfill_alternativas(self, batch_size: int) -> int:
+        """Canonicalize alternativas and fill ALTERNATIVAS_COLUMNS where
+        alternativas_letras is NULL; returns how many rows."""
+        raise NotImplementedError
+
+    def index_duplicates(self, batch_size: int, threshold: float) -> int:
+        """Add questions missing from the duplicate index; returns how many."""
+        raise NotImplementedError
+
+    def get_similar_questions(self) -> list[tuple]:
+        """Flagged near-duplicates as (questao_id, similar_a, similaridade)."""
+        raise NotImplementedError
+
+    def update_question_status(self, qid: int, status: str, proxima_revisao_date: str | None = None, revisoes_feitas: int | None = None):
+        raise NotImplementedError
+
+    def get_revisoes_feitas(self, qid: int) -> int:
+        raise NotImplementedError
+
+    def record_answer(self, qid: int, is_correct: bool, marked_doubt: bool, scheduler) -> dict | None:
+        """Apply one answer atomically; return the new schedule (see db.record_answer)."""
+        raise NotImplementedError
+
+    def get_schedule_states(self) -> list[tuple]:
+        """Answered questions as (id, status, data_resposta, *scheduler.STATE_COLUMNS)."""
+        raise NotImplementedError
+
+    def update_by_id(self, columns: tuple, rows: list[tuple]):
+        """Batch-write rows (id, *values) into `columns` of questoes, in one statement where possible."""
+        raise NotImplementedError
+
+    def get_review_queue(self) -> list[tuple]:
+        """Scheduled questions as (id, proxima_revisao, revisoes_feitas),
+        ordered by proxima_revisao, revisoes_feitas, id."""
+        raise NotImplementedError
+
+    def migrate_revisado_para_acerto(self) -> int:
+        raise NotImplementedError
+
+    def insert_answer_events(self, events: list[tuple]):
+        """Append rows (questao_id, respondida_em, alternativa, correta, duvida, tempo_resposta)."""
+        raise NotImplementedError
+
+    def get_answer_events(self, start: str | None, end: str | None, disciplinas: list | None = None) -> list[tuple]:
+        """Events with start <= respondida_em < end, as (questao_id, disciplina, respondida_em, alternativa, correta, duvida, tempo_resposta)."""
+        raise NotImplementedError
+
+    def get_answer_daily_counts(self, start: str | None, end: str | None, disciplinas: list | None = None) -> list[tuple]:
+        """Rows (dia, status, quantidade) for events in [start, end)."""
+        raise NotImplementedError
+
+    def get_distinct(self, field: str):
+        raise NotImplementedError
+
+    def get_aula_counts(self) -> list[tuple]:
+        """Rows (disciplina, aula, status, quantidade) grouped over questoes."""
+        raise NotImplementedError
+
+    def get_daily_stats(self) -> list[tuple]:
+        """All rollup rows, in ESTATISTICAS_COLUMNS order."""
+        raise NotImplementedError
+
+    def rebuild_daily_stats(self) -> int:
+        """Recompute the rollup from questoes; return its row count."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release connections/clients held by the backend."""
+
+
+class _SQLBackend(Backend):
+    """Shared implementation for the SQL backends (SQLite and Postgres).
+
+    Queries are written with "?" placeholders and adapted to the driver's
+    paramstyle in _exec.
+    """
+
+    placeholder = "?"
+    _serial_pk = "INTEGER PRIMARY KEY AUTOINCREMENT"
+
+    def connect(self):
+        """Open a new, unpooled connection."""
+        raise NotImplementedError
+
+    def connection(self):
+        """Context manager borrowing a connection; callers commit their own writes."""
+        raise NotImplementedError
+
+    def _exec(self, conn, query: str, params: list | tuple = ()):  # minimal cursor exec helper
+        if self.placeholder != "?":
+            # naive but safe for our static queries
+            query = query.replace("?", self.placeholder)
+        cur = conn.cursor()
+        cur.execute(query, params)
+        return cur
+
+    # -----------------------
+    # Migrações de esquema
+    # -----------------------
+    # Cada passo é (versão, descrição, método(conn)). Os passos rodam em ordem,
+    # cada um em sua transação, e a versão aplicada fica em schema_version.
+    # Bancos antigos (sem schema_version) passam por todos os passos, que são
+    # idempotentes.
+    _schema_ready = False
+
+    def _migrations(self):
+        return [
+            (1, "cria tabela questoes e índices", self._m001_create_questoes),
+            (2, "adiciona coluna revisoes_feitas", self._m002_add_revisoes_feitas),
+            (3, "converte status 'revisado' em 'acerto'", self._migrate_revisado),
+            (4, "cria view questoes_resumo_aulas", self._m004_resumo_aulas),
+            (5, "cria tabela respostas", self._m005_respostas),
+            (6, "cria estatisticas_diarias e triggers", self._m006_estatisticas_diarias),
+            (7, "adiciona colunas de estado do agendador", self._m007_srs_columns),
+            (8, "cria índice de busca textual", self._m008_busca_textual),
+            (9, "adiciona coluna busca_normalizada", self._m009_busca_normalizada),
+            (10, "cria índice de duplicatas", self._m010_duplicatas),
+            (11, "grava alternativas em JSON canônico com letras e prévia", self._m011_alternativas),
+            (12, "normaliza datas (ISO no SQLite, DATE no Postgres)", self._m012_datas),
+        ]
+
+    def _lock_migrations(self, conn):
+        """Serialize concurrent migrators (no-op where not needed)."""
+
+    def _unlock_migrations(self, conn):
+        pass
+
+    def migrate(self) -> list[tuple[int, str, object]]:
+        if self._schema_ready:
+            return []
+        applied = []
+        with self.connection() as conn:
+            self._lock_migrations(conn)
+            try:
+                self._exec(
+                    conn,
+                    """
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INTEGER PRIMARY KEY,
+                        descricao TEXT,
+                        aplicada_em TEXT
+                    )
+                    """,
                 )
-                """,
-            )
-            _exec(conn, "CREATE INDEX IF NOT EXISTS idx_questoes_status ON questoes(status)")
-            _exec(conn, "CREATE INDEX IF NOT EXISTS idx_questoes_proxrev ON questoes(proxima_revisao)")
-            _exec(conn, "CREATE INDEX IF NOT EXISTS idx_questoes_disciplina ON questoes(disciplina)")
-            _exec(conn, "CREATE INDEX IF NOT EXISTS idx_questoes_aula ON questoes(aula)")
-            # Migração: adicionar coluna se faltar.
-            cur = _exec(conn, "PRAGMA table_info(questoes)")
-            cols = [r[1] for r in cur.fetchall()]
-            if "revisoes_feitas" not in cols:
-                _exec(conn, "ALTER TABLE questoes ADD COLUMN revisoes_feitas INTEGER DEFAULT 0")
-        conn.commit()
-    finally:
-        conn.close()
+                conn.commit()
+                cur = self._exec(conn, "SELECT MAX(version) FROM schema_version")
+                row = cur.fetchone()
+                current = row[0] if row and row[0] is not None else 0
+                for version, descricao, step in self._migrations():
+                    if version <= current:
+                        continue
+                    result = step(conn)
+                    self._exec(
+                        conn,
+                        "INSERT INTO schema_version (version, descricao, aplicada_em) VALUES (?, ?, ?)",
+                        (version, descricao, datetime.now().isoformat(timespec="seconds")),
+                    )
+                    conn.commit()
+                    applied.append((version, descricao, result))
+            finally:
+                self._unlock_migrations(conn)
+        self._schema_ready = True
+        return applied
 
-def insert_question(data: dict):
-    alternativas_json = json.dumps(data.get("alternativas", []), ensure_ascii=False)
-    if _using_supabase_api():
-        sb = _get_supabase_client()
-        payload = {
-            "numero": data.get("numero"),
-            "tipo": data.get("tipo"),
-            "disciplina": data.get("disciplina"),
-            "aula": data.get("aula"),
-            "origem_pdf": data.get("origem_pdf"),
-            "enunciado": data.get("enunciado"),
-            "alternativas": alternativas_json,
-            "resposta_correta": data.get("resposta_correta"),
-            "comentario": data.get("comentario"),
-        }
-        sb.table("questoes").insert(payload).execute()
-        return
-    conn = connect()
-    try:
-        _exec(
+    def _m004_resumo_aulas(self, conn):
+        # Mesma view no SQLite, no Postgres e no Supabase (onde é exposta pelo
+        # PostgREST): as abas montam os filtros de aula a partir dela.
+        self._exec(conn, "DROP VIEW IF EXISTS questoes_resumo_aulas")
+        self._exec(conn, RESUMO_AULAS_VIEW_SQL)
+        self._exec(conn, "CREATE INDEX IF NOT EXISTS idx_questoes_disc_aula_status ON questoes(disciplina, aula, status)")
+
+    def _m005_respostas(self, conn):
+        # Uma linha por resposta, nunca atualizada: é o histórico que
+        # questoes (que guarda só o último resultado) não tem.
+        self._exec(
             conn,
-            """
-            INSERT INTO questoes (numero, tipo, disciplina, aula, origem_pdf, enunciado, alternativas, resposta_correta, comentario, revisoes_feitas)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+            f"""
+            CREATE TABLE IF NOT EXISTS respostas (
+                id {self._serial_pk},
+                questao_id INTEGER NOT NULL REFERENCES questoes(id) ON DELETE CASCADE,
+                respondida_em TEXT NOT NULL,
+                alternativa TEXT,
+                correta INTEGER NOT NULL,
+                duvida INTEGER NOT NULL DEFAULT 0,
+                tempo_resposta REAL
+            )
             """,
-            (
-                data.get("numero"),
-                data.get("tipo"),
-                data.get("disciplina"),
-                data.get("aula"),
-                data.get("origem_pdf"),
-                data.get("enunciado"),
-                alternativas_json,
-                data.get("resposta_correta"),
-                data.get("comentario"),
-            ),
         )
-        conn.commit()
-    finally:
-        conn.close()
+        self._exec(conn, "CREATE INDEX IF NOT EXISTS idx_respostas_respondida_em ON respostas(respondida_em)")
+        self._exec(conn, "CREATE INDEX IF NOT EXISTS idx_respostas_questao ON respostas(questao_id, respondida_em)")
 
-def _build_filters(filters: dict | None, status: str | None):
-    query = "SELECT * FROM questoes"
-    params = []
-    where = []
-    if filters:
-        if filters.get("disciplina"):
-            where.append("disciplina = ?")
-            params.append(filters["disciplina"])
-        if filters.get("aula"):
-            where.append("aula = ?")
-            params.append(filters["aula"])
-    if status:
-        where.append("status = ?")
-        params.append(status)
-    if where:
-        query += " WHERE " + " AND ".join(where)
-    query += " ORDER BY id"
-    return query, params
+    def _m010_duplicatas(self, conn):
+        # As questões já existentes entram no índice na primeira importação
+        # com deduplicação (ou com `manage.py duplicadas`).
+        for sql in DEDUP_TABLES_SQL:
+            self._exec(conn, sql)
 
-def get_all_questions(filters: dict | None = None, status: str | None = None):
-    if _using_supabase_api():
-        sb = _get_supabase_client()
-        q = sb.table("questoes").select("*")
-        if filters:
-            if filters.get("disciplina"):
-                q = q.eq("disciplina", filters["disciplina"])
-            if filters.get("aula"):
-                q = q.eq("aula", filters["aula"])
-        if status:
-            q = q.eq("status", status)
-        q = q.order("id")
-        res = q.execute()
-        data = res.data or []
-        rows = [tuple(item.get(col) for col in COLUMNS) for item in data]
-        return rows
-    conn = connect()
-    query, params = _build_filters(filters, status)
-    try:
-        cur = _exec(conn, query, params)
-        rows = cur.fetchall()
-    finally:
-        conn.close()
-    return rows
+    def _m006_estatisticas_diarias(self, conn):
+        self._exec(conn, ESTATISTICAS_TABLE_SQL)
+        self._create_stats_triggers(conn)
+        self._rebuild_daily_stats(conn)
 
-def today_date_str():
-    return datetime.now().date().isoformat()
+    def _m007_srs_columns(self, conn):
+        self._add_columns(conn, _SRS_COLUMN_TYPES)
 
-def schedule_next_date(is_correct: bool, marked_doubt: bool = False):
-    today = datetime.now().date()
-    if marked_doubt:
-        return (today + timedelta(days=1)).isoformat()
-    return (today + (timedelta(days=7) if is_correct else timedelta(days=1))).isoformat()
+    def _add_columns(self, conn, columns):
+        """Add the missing (column, type) pairs to questoes."""
+        raise NotImplementedError
 
-def get_due_for_review(filters: dict | None = None):
-    today = today_date_str()
-    if _using_supabase_api():
-        sb = _get_supabase_client()
-        q = sb.table("questoes").select("*").lte("proxima_revisao", today)
-        if filters:
-            if filters.get("disciplina"):
-                q = q.eq("disciplina", filters["disciplina"])
-            if filters.get("aula"):
-                q = q.eq("aula", filters["aula"])
-        q = q.order("proxima_revisao")
-        res = q.execute()
-        data = res.data or []
-        rows = [tuple(item.get(col) for col in COLUMNS) for item in data]
-        return rows
-    conn = connect()
-    query = (
-        "SELECT * FROM questoes WHERE proxima_revisao IS NOT NULL AND proxima_revisao <= ?"
-    )
-    params = [today]
-    if filters:
-        if filters.get("disciplina"):
-            query += " AND disciplina = ?"
-            params.append(filters["disciplina"])
-        if filters.get("aula"):
-            query += " AND aula = ?"
-            params.append(filters["aula"])
-    query += " ORDER BY proxima_revisao"
-    try:
-        cur = _exec(conn, query, params)
-        rows = cur.fetchall()
-    finally:
-        conn.close()
-    return rows
+    def _backfill_busca_normalizada(self, conn, batch_size: int) -> int:
+        """Fill busca_normalizada where it is NULL; returns the row count."""
+        raise NotImplementedError
 
-def update_question_status(qid: int, status: str, proxima_revisao_date: str | None = None, revisoes_feitas: int | None = None):
-    """Atualiza status e opcionalmente data de próxima revisão e contador de revisões.
+    def backfill_busca_normalizada(self, batch_size: int) -> int:
+        with self.connection() as conn:
+            self._begin_write(conn)
+            count = self._backfill_busca_normalizada(conn, batch_size)
+            conn.commit()
+        return count
 
-    Se revisoes_feitas for None, mantém valor atual.
-    """
-    data_resp = today_date_str()
-    if _using_supabase_api():
-        sb = _get_supabase_client()
-        payload = {
-            "status": status,
-            "data_resposta": data_resp,
-            "proxima_revisao": proxima_revisao_date,
-        }
-        if revisoes_feitas is not None:
-            payload["revisoes_feitas"] = revisoes_feitas
-        sb.table("questoes").update(payload).eq("id", qid).execute()
-        return
-    conn = connect()
-    try:
-        if revisoes_feitas is None:
-            _exec(
-                conn,
-                """
-                UPDATE questoes
-                SET status=?, data_resposta=?, proxima_revisao=?
-                WHERE id=?
-                """,
-                (status, data_resp, proxima_revisao_date, qid),
-            )
-        else:
-            _exec(
+    def _m011_alternativas(self, conn):
+        self._add_columns(conn, [(c, "TEXT") for c in ALTERNATIVAS_COLUMNS])
+        return self._backfill_alternativas(conn, get_batch_size())
+
+    def _backfill_alternativas(self, conn, batch_size: int) -> int:
+        # Linhas antigas podem ter repr de lista Python ou texto solto: o
+        # parse (com o fallback) roda uma vez aqui, não a cada exibição.
+        columns = ("alternativas",) + ALTERNATIVAS_COLUMNS
+        count, after_id = 0, 0
+        while True:
+            rows = self._exec(
                 conn,
-                """
-                UPDATE questoes
-                SET status=?, data_resposta=?, proxima_revisao=?, revisoes_feitas=?
-                WHERE id=?
-                """,
-                (status, data_resp, proxima_revisao_date, revisoes_feitas, qid),
-            )
-        conn.commit()
-    finally:
-        conn.close()
+                "SELECT id, alternativas FROM questoes WHERE id > ? AND alternativas_letras IS NULL ORDER BY id LIMIT ?",
+                (after_id, batch_size),
+            ).fetchall()
+            if not rows:
+                return count
+            updates = []
+            for qid, alternativas in rows:
+                derived = models.alternativas_derivadas(alternativas)
+                updates.append((qid, *(derived[c] for c in columns)))
+            self._update_by_id(conn, columns, updates)
+            count += len(rows)
+            after_id = rows[-1][0]
 
-def get_revisoes_feitas(qid: int) -> int:
-    if _using_supabase_api():
-        sb = _get_supabase_client()
-        res = sb.table("questoes").select("revisoes_feitas").eq("id", qid).limit(1).execute()
-        data = res.data or []
-        if data:
-            return int(data[0].get("revisoes_feitas") or 0)
-        return 0
-    conn = connect()
-    try:
-        cur = _exec(conn, "SELECT revisoes_feitas FROM questoes WHERE id=?", (qid,))
-        row = cur.fetchone()
-        return int(row[0]) if row and row[0] is not None else 0
-    finally:
-        conn.close()
+    def backfill_alternativas(self, batch_size: int) -> int:
+        with self.connection() as conn:
+            self._begin_write(conn)
+            count = self._backfill_alternativas(conn, batch_size)
+            conn.commit()
+        return count
 
-def compute_next_interval_days(revisoes_feitas: int) -> int:
-    """Dado o número de revisões já feitas, retorna o próximo intervalo (dias).
+    def _create_stats_triggers(self, conn):
+        """(Re)create the triggers that keep estatisticas_diarias in sync."""
+        raise NotImplementedError
 
-    Novo modelo (plateau): 0->1 dia, 1->7 dias, >=2->15 dias.
-    """
-    if revisoes_feitas <= 0:
-        return 1
-    if revisoes_feitas == 1:
-        return 7
-    return 15
+    def _rebuild_daily_stats(self, conn):
+        self._exec(conn, "DELETE FROM estatisticas_diarias")
+        self._exec(conn, ESTATISTICAS_REBUILD_SQL)
 
-def migrate_revisado_para_acerto():
-    """Converte registros com status 'revisado' para 'acerto'.
+    def _create_indexes(self, conn):
+        self._exec(conn, "CREATE INDEX IF NOT EXISTS idx_questoes_status ON questoes(status)")
+        self._exec(conn, "CREATE INDEX IF NOT EXISTS idx_questoes_proxrev ON questoes(proxima_revisao)")
+        self._exec(conn, "CREATE INDEX IF NOT EXISTS idx_questoes_disciplina ON questoes(disciplina)")
+        self._exec(conn, "CREATE INDEX IF NOT EXISTS idx_questoes_aula ON questoes(aula)")
 
-    Política:
-    - Define revisoes_feitas = 1 se nulo ou 0.
-    - Agenda próxima revisão em compute_next_interval_days(1) dias (segunda etapa: 15d)
-      somente se não houver proxima_revisao já definida.
-    - Mantém data_resposta original; só atualiza campos necessários.
+    _INSERT_SQL = """
+        INSERT INTO questoes (numero, tipo, disciplina, aula, origem_pdf, enunciado, alternativas, resposta_correta, comentario, busca_normalizada, alternativas_letras, alternativas_preview, revisoes_feitas)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
     """
-    if _using_supabase_api():
-        sb = _get_supabase_client()
-        res = sb.table("questoes").select("id, proxima_revisao, revisoes_feitas").eq("status", "revisado").execute()
-        data = res.data or []
-        if not data:
-            return 0
-        interval_days = compute_next_interval_days(1)  # 15 dias
-        count = 0
-        for row in data:
-            qid = row.get("id")
-            revs = row.get("revisoes_feitas") or 0
-            new_revs = max(1, int(revs))
-            prox = row.get("proxima_revisao")
-            if not prox:
-                prox = (datetime.now().date() + timedelta(days=interval_days)).isoformat()
-            sb.table("questoes").update({
-                "status": "acerto",
-                "revisoes_feitas": new_revs,
-                "proxima_revisao": prox,
-            }).eq("id", qid).execute()
-            count += 1
-        return count
-    # SQLite / Postgres
-    conn = connect()
-    try:
-        cur = _exec(conn, "SELECT id, proxima_revisao, revisoes_feitas FROM questoes WHERE status='revisado'")
-        rows = cur.fetchall()
-        if not rows:
-            return 0
-        interval_days = compute_next_interval_days(1)
-        today = datetime.now().date()
+
+    def insert_question(self, data: dict):
+        with self.connection() as conn:
+            self._exec(conn, self._INSERT_SQL, _insert_params(data))
+            conn.commit()
+
+    def insert_questions(self, items, batch_size: int, progress=None, dedup_threshold=None, on_duplicate=None) -> int:
+        # Uma única transação: ou entra o lote inteiro, ou nada.
         count = 0
-        for qid, prox, revs in rows:
-            new_revs = 1 if (revs is None or int(revs) < 1) else int(revs)
-            if not prox:
-                prox = (today + timedelta(days=interval_days)).isoformat()
-            _exec(conn, "UPDATE questoes SET status='acerto', revisoes_feitas=?, proxima_revisao=? WHERE id=?", (new_revs, prox, qid))
-            count += 1
-        conn.commit()
+        with self.connection() as conn:
+            if dedup_threshold is not None:
+                self._begin_write(conn)
+                _index_pending(self, conn, batch_size, dedup_threshold)
+            for batch in _batched(items, batch_size):
+                if dedup_threshold is not None:
+                    count += _insert_dedup(self, conn, batch, dedup_threshold, on_duplicate)
+                else:
+                    self._insert_batch(conn, [_insert_params(d) for d in batch])
+                    count += len(batch)
+                if progress is not None:
+                    progress(count)
+            conn.commit()
         return count
-    finally:
-        conn.close()
 
+    def _insert_batch(self, conn, params: list[tuple]):
+        cur = conn.cursor()
+        cur.executemany(self._INSERT_SQL.replace("?", self.placeholder), params)
 
-_DISTINCT_WHITELIST = {"disciplina", "aula", "status", "origem_pdf", "tipo", "numero"}
+    def _insert_returning_ids(self, conn, params: list[tuple]) -> list[int]:
+        ids = []
+        cur = conn.cursor()
+        for p in params:
+            cur.execute(self._INSERT_SQL, p)
+            ids.append(cur.lastrowid)
+        return ids
 
-def get_distinct(field: str):
-    if field not in _DISTINCT_WHITELIST:
-        raise ValueError("Campo não permitido para DISTINCT")
-    if _using_supabase_api():
-        sb = _get_supabase_client()
-        res = sb.table("questoes").select(field).execute()
-        vals = []
-        for item in res.data or []:
-            v = item.get(field)
-            if v is not None and str(v).strip() != "":
-                vals.append(v)
-        return sorted(sorted(set(vals)))
-    conn = connect()
-    try:
-        q = f"SELECT DISTINCT {field} FROM questoes WHERE {field} IS NOT NULL AND {field} != ''"
-        cur = _exec(conn, q)
-        rows = cur.fetchall()
-    finally:
-        conn.close()
-    return sorted([r[0] for r in rows if r[0]])
+    def _insert_rows(self, conn, table: str, columns: tuple, rows: list[tuple]):
+        """Insert rows, ignoring ones that hit an existing key."""
+        if rows:
+            values = ", ".join("?" for _ in columns)
+            conn.cursor().executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values}) ON CONFLICT DO NOTHING".replace("?", self.placeholder),
+                rows,
+            )
+
+    def _select_in(self, conn, query: str, values: list) -> list[tuple]:
+        """Run `query` (with one "{IN}" placeholder list) over `values` in chunks."""
+        out = []
+        for chunk in _batched(values, _SQLITE_MAX_VARS // 2):
+            out.extend(self._exec(conn, query.format(IN=", ".join("?" for _ in chunk)), chunk).fetchall())
+        return out
+
+    # Primitivas do índice de duplicatas (usadas por _insert_dedup/_index_pending).
+    def _dedup_hashes(self, conn, hashes: list[str]) -> dict[str, int]:
+        rows = self._select_in(
+            conn,
+            "SELECT a.hash, MIN(a.questao_id) FROM questoes_assinaturas a JOIN questoes q ON q.id = a.questao_id "
+            "WHERE a.hash IN ({IN}) GROUP BY a.hash",
+            hashes,
+        )
+        return dict(rows)
+
+    def _dedup_candidates(self, conn, keys: list[int]) -> list[tuple]:
+        # O JOIN com questoes ignora o que sobrou de questões excluídas (no
+        # SQLite o ON DELETE CASCADE não vale sem PRAGMA foreign_keys).
+        return self._select_in(
+            conn,
+            "SELECT l.chave, a.questao_id, a.minhash FROM questoes_lsh l "
+            "JOIN questoes_assinaturas a ON a.questao_id = l.questao_id "
+            "JOIN questoes q ON q.id = a.questao_id "
+            "WHERE l.chave IN ({IN})",
+            keys,
+        )
+
+    def _dedup_save(self, conn, assinaturas: list[tuple], lsh: list[tuple], similares: list[tuple]):
+        self._insert_rows(conn, "questoes_assinaturas", ("questao_id", "hash", "minhash"), assinaturas)
+        self._insert_rows(conn, "questoes_lsh", ("chave", "questao_id"), lsh)
+        self._insert_rows(conn, "questoes_similares", ("questao_id", "similar_a", "similaridade"), similares)
+
+    def _unindexed_ids(self, conn) -> list[int]:
+        cur = self._exec(
+            conn,
+            "SELECT q.id FROM questoes q LEFT JOIN questoes_assinaturas a ON a.questao_id = q.id "
+            "WHERE a.questao_id IS NULL ORDER BY q.id",
+        )
+        return [r[0] for r in cur.fetchall()]
+
+    def _questions_text(self, conn, ids: list[int]) -> list[tuple]:
+        return self._select_in(conn, "SELECT id, enunciado, alternativas FROM questoes WHERE id IN ({IN}) ORDER BY id", ids)
+
+    def index_duplicates(self, batch_size: int, threshold: float) -> int:
+        with self.connection() as conn:
+            self._begin_write(conn)
+            count = _index_pending(self, conn, batch_size, threshold)
+            conn.commit()
+        return count
+
+    def get_similar_questions(self) -> list[tuple]:
+        with self.connection() as conn:
+            cur = self._exec(conn, "SELECT questao_id, similar_a, similaridade FROM questoes_similares ORDER BY questao_id")
+            return cur.fetchall()
+
+    def get_all_questions(self, filters: dict | None = None, status: str | None = None, columns=COLUMNS):
+        query, params = _build_filters(filters, status, self._select_sql(columns))
+        with self.connection() as conn:
+            cur = self._exec(conn, query, params)
+            rows = cur.fetchall()
+        return rows
+
+    def get_due_for_review(self, filters: dict | None = None, columns=COLUMNS):
+        today = today_date_str()
+        query = (
+            f"SELECT {self._select_sql(columns)} FROM questoes WHERE proxima_revisao IS NOT NULL AND proxima_revisao <= ?"
+        )
+        params = [today]
+        if filters:
+            if filters.get("disciplina"):
+                query += " AND disciplina = ?"
+                params.append(filters["disciplina"])
+            if filters.get("aula"):
+                query += " AND aula = ?"
+                params.append(filters["aula"])
+        query += " ORDER BY proxima_revisao"
+        with self.connection() as conn:
+            cur = self._exec(conn, query, params)
+            rows = cur.fetchall()
+        return rows
+
+    def get_question(self, qid: int, columns=COLUMNS):
+        with self.connection() as conn:
+            cur = self._exec(conn, f"SELECT {self._select_sql(columns)} FROM questoes WHERE id=?", (qid,))
+            return cur.fetchone()
+
+    # Busca textual indexada (migração 8): cada backend define _FTS_FILTER_SQL
+    # (fragmento de WHERE) e _FTS_RANKED_SQL, que recebe os demais filtros em
+    # {where}.
+    _fts = None
+
+    @staticmethod
+    def _fts_query(terms: list[str]) -> str:
+        """Backend query string matching every term as a prefix."""
+        raise NotImplementedError
+
+    def _fts_available(self) -> bool:
+        if self._fts is None:
+            with self.connection() as conn:
+                self._fts = self._fts_exists(conn)
+        return self._fts
+
+    def _fts_exists(self, conn) -> bool:
+        """Whether the full-text index (migration 8) exists."""
+        raise NotImplementedError
+
+    def _like_clause(self, term: str) -> tuple[str, list]:
+        """WHERE fragment for the accent/case-insensitive substring search."""
+        # busca_normalizada já vem sem acentos e em minúsculas (gravada junto
+        # com a questão): o LIKE compara direto, sem normalizar linha a linha.
+        return "busca_normalizada LIKE ? ESCAPE '\\'", [_like_pattern(term)]
+
+    def _text_clause(self, term: str) -> tuple[str, list]:
+        terms = _search_terms(term)
+        if terms and self._fts_available():
+            return self._FTS_FILTER_SQL, [self._fts_query(terms)]
+        return self._like_clause(term)
+
+    def _where(self, filters: dict | None) -> tuple[list[str], list]:
+        where, params = [], []
+        for col, values in _list_filters(filters):
+            where.append(f"{col} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+        term = (filters or {}).get("texto")
+        if term and term.strip():
+            clause, p = self._text_clause(term)
+            where.append(clause)
+            params.extend(p)
+        return where, params
+
+    def get_questions_page(self, filters: dict | None, after_id: int | None, limit: int, columns=COLUMNS):
+        where, params = self._where(filters)
+        if after_id is not None:
+            where.append("id > ?")
+            params.append(after_id)
+        query = f"SELECT {self._select_sql(columns)} FROM questoes"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY id LIMIT ?"
+        params.append(int(limit))
+        with self.connection() as conn:
+            return self._exec(conn, query, params).fetchall()
+
+    def count_questions(self, filters: dict | None = None) -> int:
+        where, params = self._where(filters)
+        query = "SELECT COUNT(*) FROM questoes"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        with self.connection() as conn:
+            return int(self._exec(conn, query, params).fetchone()[0])
+
+    def search_questions(self, query: str, filters: dict | None, limit: int, offset: int) -> list[int]:
+        where, params = self._where({k: v for k, v in (filters or {}).items() if k != "texto"})
+        terms = _search_terms(query)
+        if terms and self._fts_available():
+            sql = self._FTS_RANKED_SQL.format(where="".join(f" AND {w}" for w in where))
+            params = [self._fts_query(terms), *params]
+        else:
+            # Sem índice: substring, na ordem dos ids.
+            clause, p = self._like_clause(query)
+            sql = f"SELECT id FROM questoes WHERE {' AND '.join([clause, *where])} ORDER BY id LIMIT ? OFFSET ?"
+            params = [*p, *params]
+        with self.connection() as conn:
+            return [r[0] for r in self._exec(conn, sql, [*params, int(limit), int(offset)]).fetchall()]
+
+    def get_questions_by_ids(self, ids: list[int], columns=COLUMNS) -> list[tuple]:
+        if not ids:
+            return []
+        query = f"SELECT {self._select_sql(columns)} FROM questoes WHERE id IN ({', '.join('?' for _ in ids)})"
+        with self.connection() as conn:
+            return self._exec(conn, query, list(ids)).fetchall()
+
+    def update_question_status(self, qid: int, status: str, proxima_revisao_date: str | None = None, revisoes_feitas: int | None = None):
+        data_resp = today_date_str()
+        with self.connection() as conn:
+            if revisoes_feitas is None:
+                self._exec(
+                    conn,
+                    """
+                    UPDATE questoes
+                    SET status=?, data_resposta=?, proxima_revisao=?
+                    WHERE id=?
+                    """,
+                    (status, data_resp, proxima_revisao_date, qid),
+                )
+            else:
+                self._exec(
+                    conn,
+                    """
+                    UPDATE questoes
+                    SET status=?, data_resposta=?, proxima_revisao=?, revisoes_feitas=?
+                    WHERE id=?
+                    """,
+                    (status, data_resp, proxima_revisao_date, revisoes_feitas, qid),
+                )
+            conn.commit()
+
+    def get_revisoes_feitas(self, qid: int) -> int:
+        with self.connection() as conn:
+            cur = self._exec(conn, "SELECT revisoes_feitas FROM questoes WHERE id=?", (qid,))
+            row = cur.fetchone()
+            return int(row[0]) if row and row[0] is not None else 0
+
+    def _add_days_sql(self, date_sql: str, days_sql: str) -> str:
+        """SQL expression for the ISO date `date_sql` plus `days_sql` days
+        (TEXT on SQLite, DATE on Postgres; both fit a proxima_revisao column)."""
+        raise NotImplementedError
+
+    def _dias_revisao_sql(self, today: str) -> str:
+        """SQL expression for the days from `today` to proxima_revisao."""
+        raise NotImplementedError
+
+    def _select_sql(self, columns) -> str:
+        """Select list for `columns`, with COMPUTED_COLUMNS as expressions."""
+        computed = {"dias_revisao": f"{self._dias_revisao_sql(today_date_str())} AS dias_revisao"}
+        return ", ".join(computed.get(c, c) for c in columns)
+
+    def record_answer(self, qid: int, is_correct: bool, marked_doubt: bool, scheduler) -> dict | None:
+        if not isinstance(scheduler, srs.PlateauScheduler):
+            return self._record_answer_locked(qid, is_correct, marked_doubt, scheduler)
+        # Plateau: um único UPDATE ... RETURNING; o intervalo sai do contador
+        # atual no próprio SQL, então duas respostas simultâneas não se
+        # sobrescrevem.
+        advance = 1 if is_correct and not marked_doubt else 0
+        status = _answer_status(is_correct, marked_doubt)
+        today = today_date_str()
+        days = f"CASE WHEN ? = 1 THEN {_PLATEAU_INTERVAL_SQL} ELSE 1 END"
+        query = f"""
+            UPDATE questoes
+            SET status=?,
+                data_resposta=?,
+                proxima_revisao={self._add_days_sql("?", days)},
+                intervalo={days},
+                revisoes_feitas=COALESCE(revisoes_feitas, 0) + ?
+            WHERE id=?
+            RETURNING status, proxima_revisao, revisoes_feitas
+        """
+        with self.connection() as conn:
+            row = self._exec(conn, query, (status, today, today, advance, advance, advance, qid)).fetchone()
+            conn.commit()
+        return _answer_result(row)
+
+    _for_update = ""
+
+    def _begin_write(self, conn):
+        """Start a transaction that holds the write lock until commit."""
+
+    def _record_answer_locked(self, qid: int, is_correct: bool, marked_doubt: bool, scheduler) -> dict | None:
+        # SM-2/FSRS precisam do estado atual em Python: lê e grava na mesma
+        # transação, com a linha bloqueada.
+        cols = ", ".join(("data_resposta",) + srs.STATE_COLUMNS)
+        with self.connection() as conn:
+            self._begin_write(conn)
+            row = self._exec(conn, f"SELECT {cols} FROM questoes WHERE id=?{self._for_update}", (qid,)).fetchone()
+            if row is None:
+                conn.rollback()
+                return None
+            status, proxima, novo = _apply_scheduler(scheduler, row[0], dict(zip(srs.STATE_COLUMNS, row[1:])), is_correct, marked_doubt)
+            self._exec(
+                conn,
+                f"""
+                UPDATE questoes
+                SET status=?, data_resposta=?, proxima_revisao=?, {", ".join(f"{c}=?" for c in srs.STATE_COLUMNS)}
+                WHERE id=?
+                """,
+                (status, today_date_str(), proxima, *(novo[c] for c in srs.STATE_COLUMNS), qid),
+            )
+            conn.commit()
+        return _answer_result((status, proxima, novo["revisoes_feitas"]))
+
+    def get_schedule_states(self) -> list[tuple]:
+        query = f"""
+            SELECT id, status, data_resposta, {", ".join(srs.STATE_COLUMNS)}
+            FROM questoes
+            WHERE status IS NOT NULL AND status != 'nao_respondida'
+            ORDER BY id
+        """
+        with self.connection() as conn:
+            return self._exec(conn, query).fetchall()
+
+    def update_by_id(self, columns: tuple, rows: list[tuple]):
+        _check_update_columns(columns)
+        if not rows:
+            return
+        with self.connection() as conn:
+            self._update_by_id(conn, columns, rows)
+            conn.commit()
+
+    def _update_by_id(self, conn, columns: tuple, rows: list[tuple]):
+        """Set `columns` from (id, *values) rows in the caller's transaction."""
+        raise NotImplementedError
+
+    def get_review_queue(self) -> list[tuple]:
+        query = """
+            SELECT id, proxima_revisao, revisoes_feitas FROM questoes
+            WHERE proxima_revisao IS NOT NULL AND CAST(proxima_revisao AS TEXT) != ''
+            ORDER BY proxima_revisao, COALESCE(revisoes_feitas, 0), id
+        """
+        with self.connection() as conn:
+            return self._exec(conn, query).fetchall()
+
+    def migrate_revisado_para_acerto(self) -> int:
+        with self.connection() as conn:
+            count = self._migrate_revisado(conn)
+            conn.commit()
+            return count
+
+    def _migrate_revisado(self, conn) -> int:
+        # Checagem barata (idx_questoes_status) antes do UPDATE: quase sempre
+        # não há nada a migrar.
+        if self._exec(conn, "SELECT 1 FROM questoes WHERE status='revisado' LIMIT 1").fetchone() is None:
+            return 0
+        # Próxima revisão só quando ainda não houver uma; depois revisoes_feitas
+        # no mínimo 1. O CAST vale para a coluna em texto (antes da migração
+        # 12) e em DATE.
+        self._exec(
+            conn,
+            f"""
+            UPDATE questoes SET proxima_revisao={self._add_days_sql("?", compute_next_interval_days(1))}
+            WHERE status='revisado' AND (proxima_revisao IS NULL OR CAST(proxima_revisao AS TEXT) = '')
+            """,
+            (today_date_str(),),
+        )
+        cur = self._exec(
+            conn,
+            """
+            UPDATE questoes SET
+                status='acerto',
+                revisoes_feitas=CASE WHEN COALESCE(revisoes_feitas, 0) < 1 THEN 1 ELSE revisoes_feitas END
+            WHERE status='revisado'
+            """,
+        )
+        return cur.rowcount
+
+    def get_aula_counts(self) -> list[tuple]:
+        with self.connection() as conn:
+            cur = self._exec(conn, "SELECT disciplina, aula, status, quantidade FROM questoes_resumo_aulas")
+            return cur.fetchall()
+
+    def get_daily_stats(self) -> list[tuple]:
+        with self.connection() as conn:
+            cur = self._exec(conn, f"SELECT {', '.join(ESTATISTICAS_COLUMNS)} FROM estatisticas_diarias ORDER BY dia, disciplina, status, revisoes_feitas")
+            return cur.fetchall()
+
+    def rebuild_daily_stats(self) -> int:
+        with self.connection() as conn:
+            self._rebuild_daily_stats(conn)
+            count = self._exec(conn, "SELECT COUNT(*) FROM estatisticas_diarias").fetchone()[0]
+            conn.commit()
+        return int(count)
+
+    _INSERT_ANSWER_SQL = """
+        INSERT INTO respostas (questao_id, respondida_em, alternativa, correta, duvida, tempo_resposta)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """
+
+    def insert_answer_events(self, events: list[tuple]):
+        with self.connection() as conn:
+            conn.cursor().executemany(self._INSERT_ANSWER_SQL.replace("?", self.placeholder), events)
+            conn.commit()
+
+    def _answer_where(self, start, end, disciplinas) -> tuple[str, list]:
+        where, params = [], []
+        if start:
+            where.append("r.respondida_em >= ?")
+            params.append(start)
+        if end:
+            where.append("r.respondida_em < ?")
+            params.append(end)
+        if disciplinas:
+            where.append(f"q.disciplina IN ({', '.join('?' * len(disciplinas))})")
+            params.extend(disciplinas)
+        return (" WHERE " + " AND ".join(where)) if where else "", params
+
+    def get_answer_events(self, start: str | None, end: str | None, disciplinas: list | None = None) -> list[tuple]:
+        where, params = self._answer_where(start, end, disciplinas)
+        query = f"""
+            SELECT r.questao_id, q.disciplina, r.respondida_em, r.alternativa, r.correta, r.duvida, r.tempo_resposta
+            FROM respostas r JOIN questoes q ON q.id = r.questao_id
+            {where}
+            ORDER BY r.respondida_em, r.id
+        """
+        with self.connection() as conn:
+            return self._exec(conn, query, params).fetchall()
+
+    def get_answer_daily_counts(self, start: str | None, end: str | None, disciplinas: list | None = None) -> list[tuple]:
+        where, params = self._answer_where(start, end, disciplinas)
+        query = f"""
+            SELECT substr(r.respondida_em, 1, 10) AS dia,
+                   CASE WHEN r.correta = 0 THEN 'erro' WHEN r.duvida = 1 THEN 'duvida' ELSE 'acerto' END AS status,
+                   COUNT(*)
+            FROM respostas r JOIN questoes q ON q.id = r.questao_id
+            {where}
+            GROUP BY 1, 2
+            ORDER BY 1, 2
+        """
+        with self.connection() as conn:
+            return self._exec(conn, query, params).fetchall()
+
+    def get_distinct(self, field: str):
+        with self.connection() as conn:
+            q = f"SELECT DISTINCT {field} FROM questoes WHERE {field} IS NOT NULL AND {field} != ''"
+            cur = self._exec(conn, q)
+            rows = cur.fetchall()
+        return sorted([r[0] for r in rows if r[0]])
+
+
+class SQLiteBackend(_SQLBackend):
+    """Local SQLite file; one persistent connection per thread."""
+
+    label = "SQLite (local)"
+
+    def __init__(self, path: str = DB_NAME):
+        self.path = path
+        # Ao fechar incrementamos a época, e cada thread reabre sua conexão
+        # na próxima vez que precisar.
+        self._local = threading.local()
+        self._epoch = 0
+
+    def connect(self):
+        return _open_sqlite_connection(self.path)
+
+    def _thread_connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and getattr(self._local, "epoch", None) == self._epoch:
+            try:
+                conn.execute("SELECT 1")
+                return conn
+            except sqlite3.Error:
+                pass  # conexão fechada/corrompida: reabre abaixo
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        conn = self.connect()
+        self._local.conn = conn
+        self._local.epoch = self._epoch
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self._thread_connection()
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def _begin_write(self, conn):
+        # BEGIN IMMEDIATE pega o lock de escrita já na leitura.
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+
+    def close(self):
+        self._epoch += 1
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+            self._local.conn = None
+
+    # Busca textual indexada (FTS5, migração 8).
+    _FTS_FILTER_SQL = "id IN (SELECT rowid FROM questoes_fts WHERE questoes_fts MATCH ?)"
+    _FTS_RANKED_SQL = """
+        SELECT questoes.id FROM questoes_fts JOIN questoes ON questoes.id = questoes_fts.rowid
+        WHERE questoes_fts MATCH ?{where}
+        ORDER BY bm25(questoes_fts, 2.0, 1.0), questoes.id
+        LIMIT ? OFFSET ?
+    """
+
+    @staticmethod
+    def _fts_query(terms: list[str]) -> str:
+        # Cada termo como prefixo entre aspas; termos separados = AND.
+        return " ".join(f'"{t}"*' for t in terms)
+
+    def _fts_exists(self, conn) -> bool:
+        return self._exec(conn, "SELECT 1 FROM sqlite_master WHERE name = 'questoes_fts'").fetchone() is not None
+
+    def _add_days_sql(self, date_sql: str, days_sql: str) -> str:
+        return f"date({date_sql}, '+' || ({days_sql}) || ' days')"
+
+    def _dias_revisao_sql(self, today: str) -> str:
+        return f"CAST(julianday(proxima_revisao) - julianday('{today}') AS INTEGER)"
+
+    def _update_by_id(self, conn, columns: tuple, rows: list[tuple]):
+        # UPDATE ... FROM (VALUES ...): uma instrução por bloco de até
+        # _SQLITE_MAX_VARS parâmetros (SQLite >= 3.33); antes disso, executemany.
+        if sqlite3.sqlite_version_info < (3, 33):
+            sets = ", ".join(f"{c}=?" for c in columns)
+            conn.cursor().executemany(f"UPDATE questoes SET {sets} WHERE id=?", [r[1:] + r[:1] for r in rows])
+            return
+        width = len(columns) + 1
+        sets = ", ".join(f"{c} = v.column{i}" for i, c in enumerate(columns, start=2))
+        row_sql = "(" + ", ".join("?" * width) + ")"
+        for batch in _batched(rows, _SQLITE_MAX_VARS // width):
+            self._exec(
+                conn,
+                f"UPDATE questoes SET {sets} FROM (VALUES {', '.join([row_sql] * len(batch))}) AS v WHERE questoes.id = v.column1",
+                [value for row in batch for value in row],
+            )
+
+    def _m001_create_questoes(self, conn):
+        self._exec(
+            conn,
+            """
+            CREATE TABLE IF NOT EXISTS questoes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                numero TEXT,
+                tipo TEXT,
+                disciplina TEXT,
+                aula TEXT,
+                origem_pdf TEXT,
+                enunciado TEXT,
+                alternativas TEXT,
+                resposta_correta TEXT,
+                comentario TEXT,
+                status TEXT DEFAULT 'nao_respondida',
+                data_resposta TEXT,
+                proxima_revisao TEXT,
+                revisoes_feitas INTEGER DEFAULT 0
+            )
+            """,
+        )
+        self._create_indexes(conn)
+
+    def _m002_add_revisoes_feitas(self, conn):
+        # Tabelas antigas não têm a coluna.
+        cur = self._exec(conn, "PRAGMA table_info(questoes)")
+        cols = [r[1] for r in cur.fetchall()]
+        if "revisoes_feitas" not in cols:
+            self._exec(conn, "ALTER TABLE questoes ADD COLUMN revisoes_feitas INTEGER DEFAULT 0")
+
+    def _add_columns(self, conn, columns):
+        cur = self._exec(conn, "PRAGMA table_info(questoes)")
+        existing = {r[1] for r in cur.fetchall()}
+        for col, sql_type in columns:
+            if col not in existing:
+                self._exec(conn, f"ALTER TABLE questoes ADD COLUMN {col} {sql_type}")
+
+    def _m008_busca_textual(self, conn):
+        try:
+            self._exec(conn, BUSCA_FTS_SQL)
+        except sqlite3.OperationalError:
+            # SQLite sem FTS5 (ou anterior a remove_diacritics 2): a busca
+            # continua com LIKE.
+            return "FTS5 indisponível"
+        for trigger in BUSCA_FTS_TRIGGERS_SQL:
+            self._exec(conn, trigger)
+        self._exec(conn, "INSERT INTO questoes_fts (questoes_fts) VALUES ('rebuild')")
+        self._fts = None
+
+    def _m009_busca_normalizada(self, conn):
+        cur = self._exec(conn, "PRAGMA table_info(questoes)")
+        if "busca_normalizada" not in {r[1] for r in cur.fetchall()}:
+            self._exec(conn, "ALTER TABLE questoes ADD COLUMN busca_normalizada TEXT")
+        backfilled = self._backfill_busca_normalizada(conn, get_batch_size())
+        # O índice cobre o LIKE '%termo%' (varre o índice, não a tabela com
+        # enunciados e alternativas) e o COUNT dos filtros.
+        self._exec(conn, "CREATE INDEX IF NOT EXISTS idx_questoes_busca_normalizada ON questoes(busca_normalizada)")
+        return backfilled
+
+    def _backfill_busca_normalizada(self, conn, batch_size: int) -> int:
+        # SQLite: a mesma função Python está registrada na conexão, então é um UPDATE só.
+        cur = self._exec(
+            conn,
+            "UPDATE questoes SET busca_normalizada = normalizar_busca(COALESCE(enunciado, '') || ' ' || COALESCE(comentario, '')) "
+            "WHERE busca_normalizada IS NULL",
+        )
+        return cur.rowcount
+
+    def _create_stats_triggers(self, conn):
+        # SQLite: triggers por linha; cada escrita move uma unidade da chave
+        # antiga para a nova.
+        upsert_new = f"""
+            INSERT INTO estatisticas_diarias (dia, disciplina, status, revisoes_feitas, quantidade)
+            VALUES ({_stats_key_sql("NEW.")}, 1)
+            ON CONFLICT (dia, disciplina, status, revisoes_feitas) DO UPDATE SET quantidade = quantidade + 1;
+        """
+        decrement_old = f"""
+            UPDATE estatisticas_diarias SET quantidade = quantidade - 1
+            WHERE (dia, disciplina, status, revisoes_feitas) = ({_stats_key_sql("OLD.")});
+            DELETE FROM estatisticas_diarias WHERE quantidade <= 0;
+        """
+        self._exec(conn, "DROP TRIGGER IF EXISTS trg_estatisticas_ins")
+        self._exec(conn, "DROP TRIGGER IF EXISTS trg_estatisticas_upd")
+        self._exec(conn, "DROP TRIGGER IF EXISTS trg_estatisticas_del")
+        self._exec(conn, f"CREATE TRIGGER trg_estatisticas_ins AFTER INSERT ON questoes BEGIN {upsert_new} END")
+        self._exec(
+            conn,
+            f"""
+            CREATE TRIGGER trg_estatisticas_upd
+            AFTER UPDATE OF disciplina, status, data_resposta, revisoes_feitas ON questoes
+            BEGIN {decrement_old} {upsert_new} END
+            """,
+        )
+        self._exec(conn, f"CREATE TRIGGER trg_estatisticas_del AFTER DELETE ON questoes BEGIN {decrement_old} END")
+
+    def _m012_datas(self, conn):
+        # SQLite: texto ISO (AAAA-MM-DD). Horários e '' de versões antigas
+        # saem; o que date() não entende fica como está. Os triggers do
+        # rollup acompanham o UPDATE (o dia continua o mesmo).
+        count = 0
+        for col in DATE_COLUMNS:
+            iso = f"COALESCE(date(substr({col}, 1, 10)), NULLIF({col}, ''))"
+            cur = self._exec(conn, f"UPDATE questoes SET {col} = {iso} WHERE {col} IS NOT {iso}")
+            count += cur.rowcount
+        return count
+
+
+class PostgresBackend(_SQLBackend):
+    """Direct Postgres connection (e.g. Supabase connection string), pooled."""
+
+    label = "Postgres (Supabase)"
+    placeholder = "%s"
+    _serial_pk = "BIGSERIAL PRIMARY KEY"
+
+    def __init__(self, url: str, pool_max_size: int = _POOL_MAX_SIZE):
+        self.url = url
+        self.pool = _PostgresPool(url, max_size=pool_max_size)
+
+    def connect(self):
+        return _open_pg_connection(self.url)
+
+    @contextmanager
+    def connection(self):
+        conn = self.pool.acquire()
+        try:
+            yield conn
+        finally:
+            self.pool.release(conn)
+
+    def close(self):
+        self.pool.close_all()
+
+    _FTS_FILTER_SQL = "busca @@ to_tsquery('simple', ?)"
+    _FTS_RANKED_SQL = """
+        SELECT id FROM questoes, to_tsquery('simple', ?) AS consulta
+        WHERE busca @@ consulta{where}
+        ORDER BY ts_rank(busca, consulta) DESC, id
+        LIMIT ? OFFSET ?
+    """
+
+    @staticmethod
+    def _fts_query(terms: list[str]) -> str:
+        return _tsquery(terms)
+
+    def _fts_exists(self, conn) -> bool:
+        cur = self._exec(
+            conn,
+            "SELECT 1 FROM information_schema.columns WHERE table_schema = current_schema() AND table_name = 'questoes' AND column_name = 'busca'",
+        )
+        return cur.fetchone() is not None
+
+    def _add_days_sql(self, date_sql: str, days_sql: str) -> str:
+        return f"(CAST({date_sql} AS date) + ({days_sql}))"
+
+    def _dias_revisao_sql(self, today: str) -> str:
+        return f"(proxima_revisao - DATE '{today}')"
+
+    def _insert_batch(self, conn, params: list[tuple]):
+        # execute_values envia o lote num único INSERT ... VALUES (...), (...);
+        # executemany do psycopg2 faria um round-trip por linha.
+        from psycopg2.extras import execute_values  # type: ignore
+
+        cur = conn.cursor()
+        execute_values(
+            cur,
+            """
+            INSERT INTO questoes (numero, tipo, disciplina, aula, origem_pdf, enunciado, alternativas, resposta_correta, comentario, busca_normalizada, alternativas_letras, alternativas_preview, revisoes_feitas)
+            VALUES %s
+            """,
+            params,
+            template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 0)",
+            page_size=len(params),
+        )
+
+    def _insert_returning_ids(self, conn, params: list[tuple]) -> list[int]:
+        from psycopg2.extras import execute_values  # type: ignore
+
+        if not params:
+            return []
+        rows = execute_values(
+            conn.cursor(),
+            """
+            INSERT INTO questoes (numero, tipo, disciplina, aula, origem_pdf, enunciado, alternativas, resposta_correta, comentario, busca_normalizada, alternativas_letras, alternativas_preview, revisoes_feitas)
+            VALUES %s RETURNING id
+            """,
+            params,
+            template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 0)",
+            page_size=len(params),
+            fetch=True,
+        )
+        return [r[0] for r in rows]
+
+    def _insert_rows(self, conn, table: str, columns: tuple, rows: list[tuple]):
+        from psycopg2.extras import execute_values  # type: ignore
+
+        if rows:
+            execute_values(
+                conn.cursor(),
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s ON CONFLICT DO NOTHING",
+                rows,
+                page_size=len(rows),
+            )
+
+    _for_update = " FOR UPDATE"
+
+    def _update_by_id(self, conn, columns: tuple, rows: list[tuple]):
+        # Um único UPDATE ... FROM (VALUES ...) com todas as linhas; os casts
+        # tipam colunas que vêm só com NULL.
+        from psycopg2.extras import execute_values  # type: ignore
+
+        sets = ", ".join(f"{c} = v.{c}" for c in columns)
+        casts = ", ".join(f"%s::{_PG_TYPES[c]}" for c in ("id",) + tuple(columns))
+        execute_values(
+            conn.cursor(),
+            f"""
+            UPDATE questoes AS q SET {sets}
+            FROM (VALUES %s) AS v (id, {", ".join(columns)})
+            WHERE q.id = v.id
+            """,
+            rows,
+            template=f"({casts})",
+            page_size=len(rows),
+        )
+
+    def _m007_srs_columns(self, conn):
+        self._add_columns(conn, _SRS_COLUMN_TYPES)
+
+    def _add_columns(self, conn, columns):
+        for col, sql_type in columns:
+            self._exec(conn, f"ALTER TABLE questoes ADD COLUMN IF NOT EXISTS {col} {sql_type}")
+
+    def _m008_busca_textual(self, conn):
+        # Coluna gerada: o Postgres recalcula `busca` a cada INSERT/UPDATE de
+        # enunciado/comentário, sem trigger; o ranking lê o tsvector pronto.
+        sem_acentos = self._unaccent_sql(conn, "lower(COALESCE(enunciado, '') || ' ' || COALESCE(comentario, ''))")
+        self._exec(conn, BUSCA_TSV_FUNCTION_SQL.format(sem_acentos=sem_acentos))
+        self._exec(
+            conn,
+            "ALTER TABLE questoes ADD COLUMN IF NOT EXISTS busca tsvector GENERATED ALWAYS AS (questoes_busca_tsv(enunciado, comentario)) STORED",
+        )
+        self._exec(conn, "CREATE INDEX IF NOT EXISTS idx_questoes_busca ON questoes USING GIN (busca)")
+        self._fts = None
+        return sem_acentos.split("(", 1)[0]
+
+    def _unaccent_sql(self, conn, expr: str) -> str:
+        """Accent-stripping SQL for `expr`: unaccent when the extension is
+        installed (or can be), else a translate() of the Portuguese accents."""
+        schema = self._extension_schema(conn, "unaccent")
+        if schema:
+            return f"{schema}.unaccent('{schema}.unaccent'::regdictionary, {expr})"
+        return f"translate({expr}, '{_ACCENTS}', '{_ACCENTS_ASCII}')"
+
+    def _extension_schema(self, conn, name: str) -> str | None:
+        """Schema of extension `name`, creating it if possible; None if unavailable."""
+        if self._exec(conn, "SELECT 1 FROM pg_available_extensions WHERE name = ?", (name,)).fetchone():
+            self._exec(conn, "SAVEPOINT extensao")
+            try:
+                self._exec(conn, f"CREATE EXTENSION IF NOT EXISTS {name}")
+                self._exec(conn, "RELEASE SAVEPOINT extensao")
+            except Exception:
+                # Sem permissão para criar extensões.
+                self._exec(conn, "ROLLBACK TO SAVEPOINT extensao")
+        row = self._exec(
+            conn,
+            "SELECT n.nspname FROM pg_extension e JOIN pg_namespace n ON n.oid = e.extnamespace WHERE e.extname = ?",
+            (name,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _m009_busca_normalizada(self, conn):
+        self._exec(conn, "ALTER TABLE questoes ADD COLUMN IF NOT EXISTS busca_normalizada TEXT")
+        backfilled = self._backfill_busca_normalizada(conn, get_batch_size())
+        # LIKE '%termo%' só usa índice trigram (pg_trgm); sem a extensão, fica
+        # a varredura da coluna já normalizada.
+        schema = self._extension_schema(conn, "pg_trgm")
+        if schema:
+            self._exec(
+                conn,
+                f"CREATE INDEX IF NOT EXISTS idx_questoes_busca_normalizada ON questoes USING GIN (busca_normalizada {schema}.gin_trgm_ops)",
+            )
+        return backfilled
+
+    def _backfill_busca_normalizada(self, conn, batch_size: int) -> int:
+        # A normalização é a do Python (normalizar_busca), igual à da escrita.
+        count, after_id = 0, 0
+        while True:
+            rows = self._exec(
+                conn,
+                "SELECT id, enunciado, comentario FROM questoes WHERE id > ? AND busca_normalizada IS NULL ORDER BY id LIMIT ?",
+                (after_id, batch_size),
+            ).fetchall()
+            if not rows:
+                return count
+            self._update_by_id(conn, ("busca_normalizada",), [(qid, _busca_normalizada(e, c)) for qid, e, c in rows])
+            count += len(rows)
+            after_id = rows[-1][0]
+
+    def _create_stats_triggers(self, conn):
+        # Postgres: triggers por comando com tabelas de transição, então um
+        # INSERT em lote (execute_values) atualiza o rollup com um único
+        # upsert agregado em vez de um por linha.
+        self._exec(conn, ESTATISTICAS_SYNC_FUNCTION_SQL)
+        for event, referencing in (
+            ("INSERT", "NEW TABLE AS new_rows"),
+            ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+            ("DELETE", "OLD TABLE AS old_rows"),
+        ):
+            name = f"trg_estatisticas_{event.lower()[:3]}"
+            self._exec(conn, f"DROP TRIGGER IF EXISTS {name} ON questoes")
+            self._exec(
+                conn,
+                f"""
+                CREATE TRIGGER {name} AFTER {event} ON questoes
+                REFERENCING {referencing}
+                FOR EACH STATEMENT EXECUTE FUNCTION estatisticas_diarias_sync()
+                """,
+            )
+
+    def _rebuild_daily_stats(self, conn):
+        # Bloqueia escritas em questoes enquanto recalcula (os triggers não
+        # podem intercalar com o DELETE + INSERT).
+        self._exec(conn, "LOCK TABLE questoes IN SHARE MODE")
+        super()._rebuild_daily_stats(conn)
+
+    def insert_answer_events(self, events: list[tuple]):
+        from psycopg2.extras import execute_values  # type: ignore
+
+        with self.connection() as conn:
+            execute_values(
+                conn.cursor(),
+                "INSERT INTO respostas (questao_id, respondida_em, alternativa, correta, duvida, tempo_resposta) VALUES %s",
+                events,
+                page_size=len(events),
+            )
+            conn.commit()
+
+    def _lock_migrations(self, conn):
+        # Vários processos (réplicas do app) podem subir ao mesmo tempo.
+        self._exec(conn, "SELECT pg_advisory_lock(hashtext('caderno_erros.schema'))")
+
+    def _unlock_migrations(self, conn):
+        conn.rollback()
+        self._exec(conn, "SELECT pg_advisory_unlock(hashtext('caderno_erros.schema'))")
+
+    def _m001_create_questoes(self, conn):
+        self._exec(
+            conn,
+            """
+            CREATE TABLE IF NOT EXISTS questoes (
+                id SERIAL PRIMARY KEY,
+                numero TEXT,
+                tipo TEXT,
+                disciplina TEXT,
+                aula TEXT,
+                origem_pdf TEXT,
+                enunciado TEXT,
+                alternativas TEXT,
+                resposta_correta TEXT,
+                comentario TEXT,
+                status TEXT DEFAULT 'nao_respondida',
+                data_resposta TEXT,
+                proxima_revisao TEXT,
+                revisoes_feitas INTEGER DEFAULT 0
+            )
+            """,
+        )
+        self._create_indexes(conn)
+
+    def _m002_add_revisoes_feitas(self, conn):
+        # Caso a coluna já exista não faz nada; se não existir (tabela antiga) adiciona.
+        self._exec(conn, "ALTER TABLE questoes ADD COLUMN IF NOT EXISTS revisoes_feitas INTEGER DEFAULT 0")
+
+    def _m012_datas(self, conn):
+        # Postgres: TEXT -> DATE. Valores que não são data (texto solto, '')
+        # viram NULL; o rollup é recalculado e a função dos triggers é
+        # recriada com a expressão do dia que vale para DATE.
+        tipos = dict(
+            self._exec(
+                conn,
+                "SELECT column_name, data_type FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = 'questoes' AND column_name IN (?, ?)",
+                DATE_COLUMNS,
+            ).fetchall()
+        )
+        alteracoes = [f"ALTER COLUMN {c} TYPE date USING pg_temp.data_iso({c})" for c in DATE_COLUMNS if tipos.get(c) != "date"]
+        if alteracoes:
+            self._exec(conn, DATA_ISO_FUNCTION_SQL)
+            self._exec(conn, f"ALTER TABLE questoes {', '.join(alteracoes)}")
+        self._create_stats_triggers(conn)
+        self._rebuild_daily_stats(conn)
+        return len(alteracoes)
+
+
+# Função dos triggers de estatisticas_diarias no Postgres (também usada no
+# Supabase; ver README). old_rows/new_rows são as tabelas de transição.
+ESTATISTICAS_SYNC_FUNCTION_SQL = f"""
+    CREATE OR REPLACE FUNCTION estatisticas_diarias_sync() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE estatisticas_diarias e SET quantidade = e.quantidade - o.n
+            FROM (
+                SELECT {_stats_key_sql()}, COUNT(*) AS n FROM old_rows GROUP BY 1, 2, 3, 4
+            ) AS o (dia, disciplina, status, revisoes_feitas, n)
+            WHERE (e.dia, e.disciplina, e.status, e.revisoes_feitas) = (o.dia, o.disciplina, o.status, o.revisoes_feitas);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO estatisticas_diarias (dia, disciplina, status, revisoes_feitas, quantidade)
+            SELECT {_stats_key_sql()}, COUNT(*) FROM new_rows GROUP BY 1, 2, 3, 4
+            ON CONFLICT (dia, disciplina, status, revisoes_feitas)
+            DO UPDATE SET quantidade = estatisticas_diarias.quantidade + EXCLUDED.quantidade;
+        END IF;
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            DELETE FROM estatisticas_diarias WHERE quantidade <= 0;
+        END IF;
+        RETURN NULL;
+    END;
+    $$
+"""
+
+
+# Conversão da migração 12 (TEXT -> DATE): os 10 primeiros caracteres como
+# data; o que não for data vira NULL em vez de abortar o ALTER TABLE.
+DATA_ISO_FUNCTION_SQL = """
+    CREATE OR REPLACE FUNCTION pg_temp.data_iso(valor text) RETURNS date
+    LANGUAGE plpgsql IMMUTABLE AS $$
+    BEGIN
+        RETURN CAST(NULLIF(substr(valor, 1, 10), '') AS date);
+    EXCEPTION WHEN others THEN
+        RETURN NULL;
+    END;
+    $$
+"""
+
+
+# Texto indexado da busca no Postgres/Supabase (migração 8), base da coluna
+# gerada questoes.busca: enunciado + comentário em minúsculas e sem acentos,
+# dicionário 'simple' (sem stemming, como o FTS5 do SQLite). IMMUTABLE para
+# poder gerar a coluna; {sem_acentos} é unaccent(...) ou translate(...).
+BUSCA_TSV_FUNCTION_SQL = """
+    CREATE OR REPLACE FUNCTION questoes_busca_tsv(enunciado text, comentario text) RETURNS tsvector
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+        SELECT to_tsvector('simple', {sem_acentos})
+    $$
+"""
+
+
+# PostgREST corta respostas em `max-rows` (1000 por padrão no Supabase) sem
+# avisar; as leituras paginam com Range neste tamanho.
+_SUPABASE_PAGE_SIZE = 1000
+_SUPABASE_MAX_WORKERS = 4
+
+
+class SupabaseBackend(Backend):
+    """Supabase HTTP API (PostgREST) via the Supabase Python SDK; no SQL connection."""
+
+    label = "Supabase API"
+
+    def __init__(self, url: str, key: str, page_size: int = _SUPABASE_PAGE_SIZE, max_workers: int = _SUPABASE_MAX_WORKERS):
+        self.url = url
+        self.key = key
+        self.page_size = max(1, int(page_size))
+        self.max_workers = max(1, int(max_workers))
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    try:
+                        from supabase import create_client  # type: ignore
+                    except Exception as ex:
+                        raise RuntimeError("'supabase' package is required. Add 'supabase' to requirements.txt") from ex
+                    self._client = create_client(self.url, self.key)
+        return self._client
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._client = None
+
+    def _fetch_all(self, build) -> list[dict]:
+        """Fetch every row of a query, paging with Range past PostgREST's max-rows.
+
+        `build(count)` must return a fresh, deterministically ordered query
+        builder (`count` is passed to select()). The first page also asks
+        for the exact total; the remaining pages are fetched concurrently on
+        a bounded thread pool and concatenated in order.
+        """
+        first = build("exact").range(0, self.page_size - 1).execute()
+        data = list(first.data or [])
+        total = first.count if first.count is not None else len(data)
+        if len(data) >= total or not data:
+            return data
+        # O servidor pode limitar a página abaixo do pedido (max-rows).
+        step = len(data)
+        starts = range(step, total, step)
+
+        def _page(start):
+            return build(None).range(start, start + step - 1).execute().data or []
+
+        if self._executor is None:
+            with self._client_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="supabase-page")
+        for page in self._executor.map(_page, starts):
+            data.extend(page)
+        return data
+
+    _schema_ready = False
+
+    def migrate(self) -> list[tuple[int, str, object]]:
+        # DDL não é possível via PostgREST (crie o esquema pelo SQL Editor);
+        # aqui só verificamos as colunas e rodamos as migrações de dados.
+        if self._schema_ready:
+            return []
+        try:
+            self.client.table("questoes").select("id, revisoes_feitas").limit(1).execute()
+        except Exception:
+            if st is not None:
+                st.warning(
+                    "Verifique se a tabela 'questoes' possui coluna 'revisoes_feitas INT'. Crie manualmente se necessário."
+                )
+        try:
+            self.client.table("questoes").select("busca_normalizada").limit(1).execute()
+            self._busca_normalizada = True
+        except Exception:
+            # Sem a coluna (ver README), as questões são gravadas sem ela.
+            self._busca_normalizada = False
+        try:
+            self.client.table("questoes").select(",".join(ALTERNATIVAS_COLUMNS)).limit(1).execute()
+            self._alternativas_derivadas = True
+        except Exception:
+            # Sem as colunas, letras e prévia são calculadas na leitura.
+            self._alternativas_derivadas = False
+        try:
+            # Busca textual: coluna `busca` e RPC search_questions (ver README).
+            self.client.table("questoes").select("id").filter("busca", "fts(simple)", "a:*").limit(1).execute()
+            self._fts = True
+        except Exception:
+            self._fts = False
+        try:
+            # Deduplicação na importação: tabelas e RPCs dedup_* (ver README).
+            self.client.rpc("dedup_hashes", {"hashes": []}).execute()
+            self._dedup = True
+        except Exception:
+            self._dedup = False
+        try:
+            # Resposta atômica: RPC record_answer (ver README). O id 0 não
+            # existe, então a chamada não altera nada.
+            self.client.rpc("record_answer", {"p_id": 0, "p_correta": False, "p_duvida": False}).execute()
+            self._record_answer_rpc = True
+        except Exception:
+            self._record_answer_rpc = False
+        applied = [(3, "converte status 'revisado' em 'acerto'", self.migrate_revisado_para_acerto())]
+        if self._alternativas_derivadas:
+            applied.append((11, "grava alternativas em JSON canônico com letras e prévia", self.backfill_alternativas(get_batch_size())))
+        self._schema_ready = True
+        return applied
+
+    _busca_normalizada = False
+    _alternativas_derivadas = False
+
+    def _insert_payload(self, data: dict) -> dict:
+        return self._payload(_insert_params(data))
+
+    def _payload(self, params: tuple) -> dict:
+        # Colunas opcionais que o esquema do projeto ainda não tem ficam de fora.
+        payload = dict(zip(_INSERT_COLUMNS, params))
+        if not self._busca_normalizada:
+            payload.pop("busca_normalizada")
+        if not self._alternativas_derivadas:
+            for col in ALTERNATIVAS_COLUMNS:
+                payload.pop(col)
+        return payload
+
+    def _select(self, columns) -> str:
+        """Select list for `columns`; without the derived columns in the
+        schema, reads alternativas instead (_to_rows derives them).
+        COMPUTED_COLUMNS come from proxima_revisao, also in _to_rows."""
+        plain = [c for c in columns if c not in COMPUTED_COLUMNS]
+        if len(plain) < len(columns) and "proxima_revisao" not in plain:
+            plain.append("proxima_revisao")
+        if self._alternativas_derivadas or not set(plain) & set(ALTERNATIVAS_COLUMNS):
+            return ",".join(plain)
+        plain = [c for c in plain if c not in ALTERNATIVAS_COLUMNS]
+        return ",".join(plain + ([] if "alternativas" in plain else ["alternativas"]))
+
+    def insert_question(self, data: dict):
+        self.client.table("questoes").insert(self._insert_payload(data)).execute()
+
+    def insert_questions(self, items, batch_size: int, progress=None, dedup_threshold=None, on_duplicate=None) -> int:
+        # Um POST por lote; PostgREST insere o array numa única instrução.
+        # Sem as tabelas de duplicatas, importa sem deduplicar.
+        if not self._dedup:
+            dedup_threshold = None
+        if dedup_threshold is not None:
+            _index_pending(self, None, batch_size, dedup_threshold)
+        count = 0
+        for batch in _batched(items, batch_size):
+            if dedup_threshold is not None:
+                count += _insert_dedup(self, None, batch, dedup_threshold, on_duplicate)
+            else:
+                self.client.table("questoes").insert([self._insert_payload(d) for d in batch]).execute()
+                count += len(batch)
+            if progress is not None:
+                progress(count)
+        return count
+
+    _dedup = False
+
+    # Primitivas do índice de duplicatas; `conn` é ignorado. As consultas por
+    # lista vão por RPC (corpo do POST), não por filtros in_ na URL.
+    def _insert_returning_ids(self, conn, params: list[tuple]) -> list[int]:
+        if not params:
+            return []
+        res = self.client.table("questoes").insert([self._payload(p) for p in params]).execute()
+        return [r.get("id") for r in res.data]
+
+    def _dedup_hashes(self, conn, hashes: list[str]) -> dict[str, int]:
+        if not hashes:
+            return {}
+        data = self._fetch_all(lambda count: self.client.rpc("dedup_hashes", {"hashes": hashes}, count=count).order("hash"))
+        return {r.get("hash"): r.get("questao_id") for r in data}
+
+    def _dedup_candidates(self, conn, keys: list[int]) -> list[tuple]:
+        if not keys:
+            return []
+        data = self._fetch_all(
+            lambda count: self.client.rpc("dedup_candidatos", {"chaves": keys}, count=count).order("chave").order("questao_id")
+        )
+        return [(r.get("chave"), r.get("questao_id"), r.get("minhash")) for r in data]
+
+    def _dedup_save(self, conn, assinaturas: list[tuple], lsh: list[tuple], similares: list[tuple]):
+        for table, columns, rows in (
+            ("questoes_assinaturas", ("questao_id", "hash", "minhash"), assinaturas),
+            ("questoes_lsh", ("chave", "questao_id"), lsh),
+            ("questoes_similares", ("questao_id", "similar_a", "similaridade"), similares),
+        ):
+            for batch in _batched(rows, _SUPABASE_PAGE_SIZE * 10):
+                self.client.table(table).upsert([dict(zip(columns, r)) for r in batch], ignore_duplicates=True).execute()
+
+    def _unindexed_ids(self, conn) -> list[int]:
+        todos = self._fetch_all(lambda count: self.client.table("questoes").select("id", count=count).order("id"))
+        indexados = self._fetch_all(
+            lambda count: self.client.table("questoes_assinaturas").select("questao_id", count=count).order("questao_id")
+        )
+        feitos = {r.get("questao_id") for r in indexados}
+        return [r.get("id") for r in todos if r.get("id") not in feitos]
+
+    def _questions_text(self, conn, ids: list[int]) -> list[tuple]:
+        # As pendentes costumam ser faixas contíguas de ids: lê a faixa e filtra.
+        wanted = set(ids)
+        data = self._fetch_all(
+            lambda count: self.client.table("questoes").select("id, enunciado, alternativas", count=count)
+            .gte("id", min(ids)).lte("id", max(ids)).order("id")
+        )
+        return [(r.get("id"), r.get("enunciado"), r.get("alternativas")) for r in data if r.get("id") in wanted]
+
+    def index_duplicates(self, batch_size: int, threshold: float) -> int:
+        if not self._dedup:
+            return 0
+        return _index_pending(self, None, batch_size, threshold)
+
+    def get_similar_questions(self) -> list[tuple]:
+        if not self._dedup:
+            return []
+        data = self._fetch_all(
+            lambda count: self.client.table("questoes_similares").select("questao_id, similar_a, similaridade", count=count).order("questao_id")
+        )
+        return [(r.get("questao_id"), r.get("similar_a"), r.get("similaridade")) for r in data]
+
+    @staticmethod
+    def _apply_filters(q, filters: dict | None):
+        if filters:
+            if filters.get("disciplina"):
+                q = q.eq("disciplina", filters["disciplina"])
+            if filters.get("aula"):
+                q = q.eq("aula", filters["aula"])
+        return q
+
+    @staticmethod
+    def _to_rows(data, columns=COLUMNS) -> list[tuple]:
+        rows = []
+        for item in data or []:
+            if any(c not in item for c in ALTERNATIVAS_COLUMNS if c in columns):
+                item = {**models.alternativas_derivadas(item.get("alternativas")), **item}
+            if "dias_revisao" in columns:
+                item = {**item, "dias_revisao": _dias_ate(item.get("proxima_revisao"))}
+            rows.append(tuple(item.get(col) for col in columns))
+        return rows
+
+    def get_all_questions(self, filters: dict | None = None, status: str | None = None, columns=COLUMNS):
+        def build(count):
+            q = self._apply_filters(self.client.table("questoes").select(self._select(columns), count=count), filters)
+            if status:
+                q = q.eq("status", status)
+            return q.order("id")
+
+        return self._to_rows(self._fetch_all(build), columns)
+
+    def get_due_for_review(self, filters: dict | None = None, columns=COLUMNS):
+        today = today_date_str()
+
+        def build(count):
+            q = self.client.table("questoes").select(self._select(columns), count=count).lte("proxima_revisao", today)
+            q = self._apply_filters(q, filters)
+            # id desempata: a ordem precisa ser estável entre as páginas.
+            return q.order("proxima_revisao").order("id")
+
+        return self._to_rows(self._fetch_all(build), columns)
+
+    def get_question(self, qid: int, columns=COLUMNS):
+        res = self.client.table("questoes").select(self._select(columns)).eq("id", qid).limit(1).execute()
+        rows = self._to_rows(res.data, columns)
+        return rows[0] if rows else None
+
+    _fts = False
+
+    def _apply_page_filters(self, q, filters: dict | None):
+        for col, values in _list_filters(filters):
+            q = q.in_(col, values)
+        term = (filters or {}).get("texto")
+        terms = _search_terms(term)
+        if terms and self._fts:
+            q = q.filter("busca", "fts(simple)", _tsquery(terms))
+        elif term and term.strip() and self._busca_normalizada:
+            q = q.like("busca_normalizada", "*" + _like_pattern(term)[1:-1] + "*")
+        elif term and term.strip():
+            # PostgREST: ilike ignora maiúsculas, mas não acentos.
+            t = term.strip().replace(",", " ").replace("(", " ").replace(")", " ")
+            q = q.or_(f"enunciado.ilike.*{t}*,comentario.ilike.*{t}*")
+        return q
+
+    def get_questions_page(self, filters: dict | None, after_id: int | None, limit: int, columns=COLUMNS):
+        q = self._apply_page_filters(self.client.table("questoes").select(self._select(columns)), filters)
+        if after_id is not None:
+            q = q.gt("id", after_id)
+        res = q.order("id").limit(int(limit)).execute()
+        return self._to_rows(res.data, columns)
+
+    def count_questions(self, filters: dict | None = None) -> int:
+        q = self._apply_page_filters(self.client.table("questoes").select("id", count="exact", head=True), filters)
+        res = q.execute()
+        return int(res.count or 0)
+
+    def search_questions(self, query: str, filters: dict | None, limit: int, offset: int) -> list[int]:
+        terms = _search_terms(query)
+        if terms and self._fts:
+            params = {"consulta": _tsquery(terms), "limite": limit, "deslocamento": offset}
+            for col, values in _list_filters(filters):
+                params[f"filtro_{col}"] = values
+            res = self.client.rpc("search_questions", params).execute()
+            return [r.get("id") for r in (res.data or [])]
+        # Sem a RPC: ilike, na ordem dos ids.
+        q = self._apply_page_filters(self.client.table("questoes").select("id"), {**(filters or {}), "texto": query})
+        res = q.order("id").range(offset, offset + limit - 1).execute()
+        return [r.get("id") for r in (res.data or [])]
+
+    def get_questions_by_ids(self, ids: list[int], columns=COLUMNS) -> list[tuple]:
+        if not ids:
+            return []
+        res = self.client.table("questoes").select(self._select(columns)).in_("id", list(ids)).execute()
+        return self._to_rows(res.data, columns)
+
+    def backfill_busca_normalizada(self, batch_size: int) -> int:
+        if not self._busca_normalizada:
+            return 0
+        count, after_id = 0, 0
+        while True:
+            res = (
+                self.client.table("questoes").select("id, enunciado, comentario")
+                .gt("id", after_id).is_("busca_normalizada", "null").order("id").limit(batch_size).execute()
+            )
+            if not res.data:
+                return count
+            rows = [(r.get("id"), _busca_normalizada(r.get("enunciado"), r.get("comentario"))) for r in res.data]
+            self.update_by_id(("busca_normalizada",), rows)
+            count += len(rows)
+            after_id = rows[-1][0]
+
+    def backfill_alternativas(self, batch_size: int) -> int:
+        if not self._alternativas_derivadas:
+            return 0
+        columns = ("alternativas",) + ALTERNATIVAS_COLUMNS
+        count, after_id = 0, 0
+        while True:
+            res = (
+                self.client.table("questoes").select("id, alternativas")
+                .gt("id", after_id).is_("alternativas_letras", "null").order("id").limit(batch_size).execute()
+            )
+            if not res.data:
+                return count
+            rows = []
+            for r in res.data:
+                derived = models.alternativas_derivadas(r.get("alternativas"))
+                rows.append((r.get("id"), *(derived[c] for c in columns)))
+            self.update_by_id(columns, rows)
+            count += len(rows)
+            after_id = rows[-1][0]
+
+    def update_question_status(self, qid: int, status: str, proxima_revisao_date: str | None = None, revisoes_feitas: int | None = None):
+        payload = {
+            "status": status,
+            "data_resposta": today_date_str(),
+            "proxima_revisao": proxima_revisao_date,
+        }
+        if revisoes_feitas is not None:
+            payload["revisoes_feitas"] = revisoes_feitas
+        self.client.table("questoes").update(payload).eq("id", qid).execute()
+
+    def get_revisoes_feitas(self, qid: int) -> int:
+        res = self.client.table("questoes").select("revisoes_feitas").eq("id", qid).limit(1).execute()
+        data = res.data or []
+        if data:
+            return int(data[0].get("revisoes_feitas") or 0)
+        return 0
+
+    _record_answer_rpc = False
+
+    def record_answer(self, qid: int, is_correct: bool, marked_doubt: bool, scheduler) -> dict | None:
+        if self._record_answer_rpc and isinstance(scheduler, srs.PlateauScheduler):
+            params = {"p_id": qid, "p_correta": bool(is_correct), "p_duvida": bool(marked_doubt), "p_hoje": today_date_str()}
+            data = self.client.rpc("record_answer", params).execute().data or []
+            if not data:
+                return None
+            r = data[0]
+            return _answer_result((r.get("novo_status"), r.get("nova_revisao"), r.get("total_revisoes")))
+        # SM-2/FSRS (ou sem a RPC): leitura + update, sem garantia de
+        # atomicidade entre respostas simultâneas.
+        res = self.client.table("questoes").select("*").eq("id", qid).limit(1).execute()
+        if not res.data:
+            return None
+        row = res.data[0]
+        state = {c: row.get(c) for c in srs.STATE_COLUMNS}
+        status, proxima, novo = _apply_scheduler(scheduler, row.get("data_resposta"), state, is_correct, marked_doubt)
+        payload = {"status": status, "data_resposta": today_date_str(), "proxima_revisao": proxima}
+        # Colunas de estado só se já existirem no projeto (ver DDL no README).
+        payload.update({c: novo[c] for c in srs.STATE_COLUMNS if c in row})
+        self.client.table("questoes").update(payload).eq("id", qid).execute()
+        return _answer_result((status, proxima, novo["revisoes_feitas"]))
+
+    def get_schedule_states(self) -> list[tuple]:
+        cols = ("id", "status", "data_resposta") + srs.STATE_COLUMNS
+        data = self._fetch_all(
+            lambda count: self.client.table("questoes").select(",".join(cols), count=count).neq("status", "nao_respondida").order("id")
+        )
+        return [tuple(r.get(c) for c in cols) for r in data]
+
+    def update_by_id(self, columns: tuple, rows: list[tuple]):
+        # upsert por id atualiza só as colunas enviadas; um POST por lote.
+        _check_update_columns(columns)
+        cols = ("id",) + tuple(columns)
+        for batch in _batched(rows, get_batch_size()):
+            self.client.table("questoes").upsert([dict(zip(cols, r)) for r in batch], on_conflict="id").execute()
+
+    def get_review_queue(self) -> list[tuple]:
+        def build(count):
+            q = self.client.table("questoes").select("id, proxima_revisao, revisoes_feitas", count=count)
+            q = q.not_.is_("proxima_revisao", "null")
+            return q.order("proxima_revisao").order("revisoes_feitas").order("id")
+
+        # '' só existe com a coluna ainda em TEXT (sem o ALTER do README); num
+        # DATE o filtro .neq("") seria rejeitado, então sai aqui.
+        return [(r.get("id"), r.get("proxima_revisao"), r.get("revisoes_feitas")) for r in self._fetch_all(build) if r.get("proxima_revisao")]
+
+    def migrate_revisado_para_acerto(self) -> int:
+        sb = self.client
+        if not sb.table("questoes").select("id").eq("status", "revisado").limit(1).execute().data:
+            return 0
+        data = self._fetch_all(
+            lambda count: sb.table("questoes").select("id, proxima_revisao, revisoes_feitas", count=count).eq("status", "revisado").order("id")
+        )
+        prox_padrao = (datetime.now().date() + timedelta(days=compute_next_interval_days(1))).isoformat()
+        rows = [
+            (r.get("id"), "acerto", max(1, int(r.get("revisoes_feitas") or 0)), r.get("proxima_revisao") or prox_padrao)
+            for r in data
+        ]
+        # Upsert em lote (um POST por lote) em vez de um PATCH por questão.
+        self.update_by_id(("status", "revisoes_feitas", "proxima_revisao"), rows)
+        return len(rows)
+
+    def get_aula_counts(self) -> list[tuple]:
+        try:
+            data = self._fetch_all(
+                lambda count: self.client.table("questoes_resumo_aulas")
+                .select("disciplina, aula, status, quantidade", count=count)
+                .order("disciplina").order("aula").order("status")
+            )
+            return [(r.get("disciplina"), r.get("aula"), r.get("status"), int(r.get("quantidade") or 0)) for r in data]
+        except Exception:
+            # View ainda não criada no projeto: agrega no cliente (mais lento).
+            data = self._fetch_all(
+                lambda count: self.client.table("questoes").select("disciplina, aula, status", count=count).order("id")
+            )
+            counts: dict[tuple, int] = {}
+            for r in data:
+                key = (r.get("disciplina"), r.get("aula"), r.get("status"))
+                counts[key] = counts.get(key, 0) + 1
+            return [k + (n,) for k, n in counts.items()]
+
+    def get_daily_stats(self) -> list[tuple]:
+        try:
+            data = self._fetch_all(
+                lambda count: self.client.table("estatisticas_diarias")
+                .select(",".join(ESTATISTICAS_COLUMNS), count=count)
+                .order("dia").order("disciplina").order("status").order("revisoes_feitas")
+            )
+            return [tuple(r.get(c) for c in ESTATISTICAS_COLUMNS) for r in data]
+        except Exception:
+            # Tabela ainda não criada no projeto: agrega no cliente (mais lento).
+            data = self._fetch_all(
+                lambda count: self.client.table("questoes")
+                .select("disciplina, status, data_resposta, revisoes_feitas", count=count)
+                .order("id")
+            )
+            counts: dict[tuple, int] = {}
+            for r in data:
+                key = (
+                    str(r.get("data_resposta") or "")[:10],
+                    r.get("disciplina") or "",
+                    r.get("status") or "nao_respondida",
+                    int(r.get("revisoes_feitas") or 0),
+                )
+                counts[key] = counts.get(key, 0) + 1
+            return [key + (n,) for key, n in sorted(counts.items())]
+
+    def rebuild_daily_stats(self) -> int:
+        res = self.client.rpc("rebuild_estatisticas_diarias", {}).execute()
+        return int(res.data or 0)
+
+    _ANSWER_FIELDS = ("questao_id", "respondida_em", "alternativa", "correta", "duvida", "tempo_resposta")
+
+    def insert_answer_events(self, events: list[tuple]):
+        self.client.table("respostas").insert([dict(zip(self._ANSWER_FIELDS, e)) for e in events]).execute()
+
+    def get_answer_events(self, start: str | None, end: str | None, disciplinas: list | None = None) -> list[tuple]:
+        def build(count):
+            # questoes!inner: embute a disciplina e permite filtrar por ela (FK questao_id).
+            q = self.client.table("respostas").select(
+                "id, questao_id, respondida_em, alternativa, correta, duvida, tempo_resposta, questoes!inner(disciplina)",
+                count=count,
+            )
+            if start:
+                q = q.gte("respondida_em", start)
+            if end:
+                q = q.lt("respondida_em", end)
+            if disciplinas:
+                q = q.in_("questoes.disciplina", list(disciplinas))
+            return q.order("respondida_em").order("id")
+
+        return [
+            (
+                r.get("questao_id"),
+                (r.get("questoes") or {}).get("disciplina"),
+                r.get("respondida_em"),
+                r.get("alternativa"),
+                r.get("correta"),
+                r.get("duvida"),
+                r.get("tempo_resposta"),
+            )
+            for r in self._fetch_all(build)
+        ]
+
+    def get_answer_daily_counts(self, start: str | None, end: str | None, disciplinas: list | None = None) -> list[tuple]:
+        # PostgREST não agrega: conta no cliente.
+        counts: dict[tuple, int] = {}
+        for _qid, _disc, quando, _alt, correta, duvida, _tempo in self.get_answer_events(start, end, disciplinas):
+            status = "erro" if not correta else ("duvida" if duvida else "acerto")
+            key = (str(quando)[:10], status)
+            counts[key] = counts.get(key, 0) + 1
+        return [(dia, status, n) for (dia, status), n in sorted(counts.items())]
+
+    def get_distinct(self, field: str):
+        data = self._fetch_all(lambda count: self.client.table("questoes").select(field, count=count).order("id"))
+        vals = []
+        for item in data:
+            v = item.get(field)
+            if v is not None and str(v).strip() != "":
+                vals.append(v)
+        return sorted(sorted(set(vals)))
+
+
+def _resolve_backend() -> Backend:
+    """Pick the backend from secrets/env (Supabase API > Postgres > SQLite)."""
+    url, key = _get_supabase_cfg()
+    if url and key:
+        return SupabaseBackend(
+            url,
+            key,
+            page_size=int(_get_setting("supabase", "page_size", "SUPABASE_PAGE_SIZE", _SUPABASE_PAGE_SIZE)),
+            max_workers=int(_get_setting("supabase", "max_workers", "SUPABASE_MAX_WORKERS", _SUPABASE_MAX_WORKERS)),
+        )
+    pg_url = _get_pg_url()
+    if pg_url:
+        max_size = _get_setting("database", "pool_max_size", "DB_POOL_MAX_SIZE", _POOL_MAX_SIZE)
+        return PostgresBackend(pg_url, pool_max_size=int(max_size))
+    return SQLiteBackend(DB_NAME)
+
+
+_backend: Backend | None = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> Backend:
+    """Return the process-wide backend, resolving it on first use."""
+    global _backend
+    backend = _backend
+    if backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _resolve_backend()
+            backend = _backend
+    return backend
+
+
+def reload_backend() -> Backend:
+    """Re-read secrets/env and switch backend (closes pooled connections)."""
+    global _backend
+    with _backend_lock:
+        if _backend is not None:
+            # Eventos pendentes pertencem ao banco antigo.
+            _answer_log.flush_quietly()
+            _backend.close()
+        _backend = _resolve_backend()
+        _query_cache.clear()
+        return _backend
+
+
+def get_backend_label() -> str:
+    return get_backend().label
+
+
+def connect():
+    """Open a new DB connection for SQL backends (Postgres/SQLite).
+
+    Supabase API mode does not use a SQL connection; functions will call the
+    HTTP API via the Supabase Python SDK instead.
+
+    db.py functions reuse pooled connections; this one always opens a brand
+    new connection (useful for scripts).
+    """
+    backend = get_backend()
+    if not isinstance(backend, _SQLBackend):
+        raise RuntimeError("Supabase API mode não usa conexão SQL direta.")
+    return backend.connect()
+
+
+def close_pool():
+    """Close pooled connections (e.g. in scripts, before exiting)."""
+    _answer_log.flush_quietly()
+    get_backend().close()
+
+
+# -----------------------
+# Cache de consultas
+# -----------------------
+# Cada rerun do app relê a tabela várias vezes (Quiz, Banco, Desempenho...).
+# Os resultados das leituras ficam em memória por `ttl` segundos (LRU com
+# até `max_entries` entradas). Cada tabela tem um contador de geração que as
+# escritas incrementam; entradas gravadas com uma geração antiga são
+# descartadas na próxima leitura.
+_CACHE_TTL_S = 30.0
+_CACHE_MAX_ENTRIES = 256
+
+
+class _QueryCache:
+    """TTL + LRU cache for read results, invalidated per table by generation."""
+
+    def __init__(self, ttl: float = _CACHE_TTL_S, max_entries: int = _CACHE_MAX_ENTRIES):
+        self.ttl = float(ttl)
+        self.max_entries = max(1, int(max_entries))
+        self._entries: OrderedDict = OrderedDict()  # key -> (gens, expires_at, value)
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def generations(self, tables) -> tuple:
+        with self._lock:
+            return tuple(self._generations.get(t, 0) for t in tables)
+
+    def get(self, key, tables):
+        """Return (True, value) on a fresh hit, else (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                gens, expires_at, value = entry
+                current = tuple(self._generations.get(t, 0) for t in tables)
+                if gens == current and time.monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, gens: tuple, value):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (gens, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *tables):
+        with self._lock:
+            for t in tables:
+                self._generations[t] = self._generations.get(t, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "entries": len(self._entries),
+                "evictions": self.evictions,
+                "generations": dict(self._generations),
+            }
+
+
+_query_cache = _QueryCache(
+    ttl=float(_get_setting("cache", "ttl", "DB_CACHE_TTL", _CACHE_TTL_S)),
+    max_entries=int(_get_setting("cache", "max_entries", "DB_CACHE_MAX_ENTRIES", _CACHE_MAX_ENTRIES)),
+)
+
+
+def _freeze(value):
+    """Hashable form of call arguments (dicts/lists become sorted tuples)."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _cached_read(*tables, key_extra=None):
+    """Cache a read function's result; `key_extra()` adds implicit inputs (e.g. today)."""
+
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (fn.__name__, _freeze(args), _freeze(kwargs), key_extra() if key_extra else None)
+            found, value = _query_cache.get(key, tables)
+            if not found:
+                gens = _query_cache.generations(tables)
+                value = fn(*args, **kwargs)
+                _query_cache.put(key, gens, value)
+            # Cópia rasa: quem chama pode mexer na lista sem afetar o cache.
+            return list(value) if isinstance(value, list) else value
+
+        return wrapper
+
+    return deco
+
+
+def _invalidates(*tables):
+    """Bump the generation of `tables` after a write function runs."""
+
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _query_cache.invalidate(*tables)
+
+        return wrapper
+
+    return deco
+
+
+def get_cache_ttl() -> float:
+    """Validade (s) das leituras em cache (`[cache] ttl` ou DB_CACHE_TTL); 0 desliga."""
+    return _query_cache.ttl
+
+
+def get_cache_stats() -> dict:
+    """Hit/miss counters of the query cache (for diagnostics in the UI)."""
+    return _query_cache.stats()
+
+
+def clear_cache():
+    _query_cache.clear()
+
+
+def invalidate_cache(*tables):
+    """Descarta as leituras em cache de `tables` (ex.: questão apagada por
+    fora do app ainda listada por uma leitura em cache)."""
+    _query_cache.invalidate(*tables)
+
+
+def get_generation(table: str) -> int:
+    """Contador de gravações em `table` feitas por este processo (muda a cada
+    escrita); serve de chave para caches derivados, como o das exportações."""
+    return _query_cache.generations((table,))[0]
+
+
+# -----------------------
+# Log de respostas (write-behind)
+# -----------------------
+# Cada resposta vira uma linha em `respostas`. Para não pagar uma escrita
+# por clique, os eventos ficam num buffer em memória e são gravados em lote
+# quando ele atinge `buffer_size` eventos ou o mais antigo passa de
+# `buffer_seconds`. Leituras do log e o fim do processo descarregam o
+# buffer antes; falhas nesses caminhos são registradas (logging) sem
+# derrubar quem chamou. Configurável em `[respostas]` ou RESPOSTAS_BUFFER_SIZE /
+# RESPOSTAS_BUFFER_SECONDS (buffer_size = 1 grava na hora).
+_ANSWER_BUFFER_SIZE = 50
+_ANSWER_BUFFER_SECONDS = 30.0
+
+
+class _AnswerLog:
+    """Thread-safe in-memory buffer of answer events, flushed in batches."""
+
+    def __init__(self, max_size: int = _ANSWER_BUFFER_SIZE, max_age: float = _ANSWER_BUFFER_SECONDS):
+        self.max_size = max(1, int(max_size))
+        self.max_age = float(max_age)
+        self._events: list[tuple] = []
+        self._oldest = 0.0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def append(self, event: tuple):
+        with self._lock:
+            if not self._events:
+                self._oldest = time.monotonic()
+            self._events.append(event)
+            now = time.monotonic()
+            due = (len(self._events) >= self.max_size or now - self._oldest >= self.max_age) and now >= self._retry_at
+        if due:
+            # A resposta já foi gravada por record_answer: uma falha do log
+            # não pode derrubar o clique.
+            self.flush_quietly()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._events)
+
+    def flush_quietly(self) -> int:
+        """flush() that logs failures instead of raising (events stay buffered)."""
+        try:
+            return self.flush()
+        except Exception:
+            logger.warning("Falha ao gravar o log de respostas; %d eventos mantidos no buffer.", self.pending(), exc_info=True)
+            return 0
+
+    def flush(self) -> int:
+        """Write the buffered events; returns how many were written.
+
+        If the batch fails, the newest event is retried alone: if it fails
+        too, the backend is unavailable and every event goes back to the
+        buffer (the error propagates). Otherwise the others are retried one
+        by one and those that still fail (e.g. their question was deleted)
+        are dropped, so one bad event cannot block the log.
+        """
+        with self._lock:
+            events, self._events = self._events, []
+        if not events:
+            return 0
+        backend = get_backend()
+        try:
+            backend.insert_answer_events(events)
+            written = len(events)
+        except Exception:
+            if len(events) == 1:
+                self._requeue(events)
+                raise
+            try:
+                backend.insert_answer_events(events[-1:])
+            except Exception:
+                self._requeue(events)
+                raise
+            written = 1
+            for event in events[:-1]:
+                try:
+                    backend.insert_answer_events([event])
+                    written += 1
+                except Exception:
+                    logger.warning("Evento de resposta descartado: %r", event, exc_info=True)
+        _query_cache.invalidate("respostas")
+        return written
+
+    def _requeue(self, events: list[tuple]):
+        # Devolve ao buffer, mantendo a ordem; a gravação automática só tenta
+        # de novo depois de max_age.
+        with self._lock:
+            self._events[:0] = events
+            self._oldest = time.monotonic()
+            self._retry_at = self._oldest + self.max_age
+
+
+_answer_log = _AnswerLog(
+    max_size=int(_get_setting("respostas", "buffer_size", "RESPOSTAS_BUFFER_SIZE", _ANSWER_BUFFER_SIZE)),
+    max_age=float(_get_setting("respostas", "buffer_seconds", "RESPOSTAS_BUFFER_SECONDS", _ANSWER_BUFFER_SECONDS)),
+)
+
+
+atexit.register(_answer_log.flush_quietly)
+
+
+_INSERT_COLUMNS = (
+    "numero",
+    "tipo",
+    "disciplina",
+    "aula",
+    "origem_pdf",
+    "enunciado",
+    "alternativas",
+    "resposta_correta",
+    "comentario",
+    "busca_normalizada",
+    "alternativas_letras",
+    "alternativas_preview",
+)
+
+
+def _busca_normalizada(enunciado, comentario) -> str:
+    """Texto de busca gravado com a questão: enunciado + comentário normalizados."""
+    return normalizar_busca(f"{enunciado or ''} {comentario or ''}")
+
+
+def _insert_params(data: dict) -> tuple:
+    derived = models.alternativas_derivadas(data.get("alternativas"))
+    derived["busca_normalizada"] = _busca_normalizada(data.get("enunciado"), data.get("comentario"))
+    return tuple(derived[col] if col in derived else data.get(col) for col in _INSERT_COLUMNS)
+
+
+def _batched(items, size: int):
+    """Yield lists of up to `size` items from any iterable (generators included)."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# Candidatas lidas de cada balde LSH ao indexar uma questão.
+_DEDUP_BUCKET_LIMIT = 32
+
+
+def _insert_dedup(backend, conn, batch: list[dict], threshold: float, on_duplicate=None) -> int:
+    """Insert `batch` skipping exact duplicates; returns how many were inserted.
+
+    Exact duplicates (same content hash as an indexed question, or as an
+    earlier item of the batch) are not inserted. The inserted ones go into
+    the duplicate index, and those that resemble an older question are
+    flagged in questoes_similares. `on_duplicate(item, tipo, questao_id)`
+    is called with tipo "duplicada" (skipped) or "similar" (inserted and
+    flagged) and the id of the matching question.
+    """
+    hashes, sigs, keys = dedup.signatures([(d.get("enunciado"), d.get("alternativas")) for d in batch])
+    existentes = backend._dedup_hashes(conn, sorted(set(hashes)))
+    novos, primeiro, repetidas = [], {}, []
+    for i, h in enumerate(hashes):
+        if h in existentes:
+            if on_duplicate is not None:
+                on_duplicate(batch[i], "duplicada", existentes[h])
+        elif h in primeiro:
+            repetidas.append((i, primeiro[h]))
+        else:
+            primeiro[h] = i
+            novos.append(i)
+    ids = backend._insert_returning_ids(conn, [_insert_params(batch[i]) for i in novos])
+    id_do_item = dict(zip(novos, ids))
+    similares = _dedup_index(backend, conn, ids, [hashes[i] for i in novos], sigs[novos], keys[novos], threshold)
+    if on_duplicate is not None:
+        for i, j in repetidas:
+            on_duplicate(batch[i], "duplicada", id_do_item[j])
+        item_do_id = {qid: i for i, qid in id_do_item.items()}
+        for qid, similar_a, _sim in similares:
+            on_duplicate(batch[item_do_id[qid]], "similar", similar_a)
+    return len(novos)
+
+
+def _index_pending(backend, conn, batch_size: int, threshold: float) -> int:
+    """Index questions that are not in the duplicate index yet (inserted
+    before migration 10, one by one, or outside the app)."""
+    pendentes = backend._unindexed_ids(conn)
+    for chunk in _batched(pendentes, batch_size):
+        rows = backend._questions_text(conn, chunk)
+        hashes, sigs, keys = dedup.signatures([(e, a) for _, e, a in rows])
+        _dedup_index(backend, conn, [r[0] for r in rows], hashes, sigs, keys, threshold)
+    return len(pendentes)
+
+
+def _dedup_index(backend, conn, ids: list[int], hashes: list[str], sigs, keys, threshold: float) -> list[tuple]:
+    """Add questions `ids` (ascending) to the duplicate index.
+
+    Candidates are the questions sharing an LSH key: older ones from the
+    index and earlier ones of `ids`. Each question is flagged against its
+    most similar candidate when the estimated similarity reaches
+    `threshold`. Returns the flagged (questao_id, similar_a, similaridade).
+    """
+    if not ids:
+        return []
+    # Assinaturas numa matriz só: as do lote primeiro, depois as candidatas
+    # do índice; os baldes guardam posições nessa matriz.
+    linhas = {qid: i for i, qid in enumerate(ids)}
+    todas_ids, todas_sigs = list(ids), [sigs]
+    por_chave: dict[int, list] = {}
+    for chave, qid, minhash in backend._dedup_candidates(conn, sorted({int(k) for k in keys.ravel()})):
+        if qid not in linhas:
+            linhas[qid] = len(todas_ids)
+            todas_ids.append(qid)
+            todas_sigs.append(dedup.decode(minhash)[None, :])
+        por_chave.setdefault(chave, []).append(linhas[qid])
+    matriz = np.vstack(todas_sigs)
+    pares_i, pares_j = [], []
+    for i in range(len(ids)):
+        vistos = {i}
+        for chave in keys[i].tolist():
+            balde = por_chave.setdefault(chave, [])
+            # Baldes enormes são texto repetido (cabeçalhos, alternativas
+            # padrão): compara só com as mais recentes.
+            for j in balde[-_DEDUP_BUCKET_LIMIT:]:
+                if j not in vistos:
+                    vistos.add(j)
+                    pares_i.append(i)
+                    pares_j.append(j)
+            balde.append(i)
+    similares = []
+    if pares_i:
+        pares_i, pares_j = np.asarray(pares_i), np.asarray(pares_j)
+        sims = dedup.similarity(sigs[pares_i], matriz[pares_j])
+        # Melhor candidata de cada questão (maior similaridade).
+        ordem = np.lexsort((-sims, pares_i))
+        primeira = np.r_[True, pares_i[ordem][1:] != pares_i[ordem][:-1]]
+        for k in ordem[primeira]:
+            if sims[k] >= threshold:
+                similares.append((ids[pares_i[k]], todas_ids[pares_j[k]], round(float(sims[k]), 3)))
+    backend._dedup_save(
+        conn,
+        [(qid, h, dedup.encode(sig)) for qid, h, sig in zip(ids, hashes, sigs)],
+        sorted({(int(k), qid) for qid, ks in zip(ids, keys) for k in ks}),
+        similares,
+    )
+    return similares
+
+
+_ACCENTS = "áàâãäéèêëíìîïóòôõöúùûüçñ"
+_ACCENTS_ASCII = "aaaaaeeeeiiiiooooouuuucn"
+# Filtros multivalorados aceitos por get_questions_page/count_questions.
+_PAGE_FILTER_COLUMNS = ("disciplina", "aula", "status")
+
+
+def _list_filters(filters: dict | None):
+    """Yield (column, [values]) for disciplina/aula/status filters (str or list)."""
+    for col in _PAGE_FILTER_COLUMNS:
+        values = (filters or {}).get(col)
+        if not values:
+            continue
+        if isinstance(values, str):
+            values = [values]
+        yield col, list(values)
+
+
+def _search_terms(query: str) -> list[str]:
+    """Normalized words of a search box query ("Ação penal" -> ["acao", "penal"])."""
+    return re.findall(r"[a-z0-9]+", normalizar_busca(query or ""))[:_MAX_SEARCH_TERMS]
+
+
+def _tsquery(terms: list[str]) -> str:
+    """to_tsquery text: every term as a prefix, all required."""
+    return " & ".join(f"{t}:*" for t in terms)
+
+
+def _like_pattern(term: str) -> str:
+    t = normalizar_busca(term.strip())
+    t = t.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{t}%"
+
+
+def _build_filters(filters: dict | None, status: str | None, select: str):
+    query = f"SELECT {select} FROM questoes"
+    params = []
+    where = []
+    if filters:
+        if filters.get("disciplina"):
+            where.append("disciplina = ?")
+            params.append(filters["disciplina"])
+        if filters.get("aula"):
+            where.append("aula = ?")
+            params.append(filters["aula"])
+    if status:
+        where.append("status = ?")
+        params.append(status)
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY id"
+    return query, params
+
+# -----------------------
+# API pública (delegam ao backend ativo)
+# -----------------------
+@_invalidates("questoes")
+def apply_migrations() -> list[tuple[int, str, object]]:
+    """Aplica as migrações de esquema pendentes (uma vez por processo).
+
+    Retorna a lista de (versão, descrição, resultado) dos passos aplicados
+    nesta chamada; vazia quando o esquema já está atualizado.
+    """
+    return get_backend().migrate()
+
+def create_table():
+    apply_migrations()
+
+@_invalidates("questoes")
+def insert_question(data: dict):
+    get_backend().insert_question(data)
+
+@_invalidates("questoes")
+def insert_questions(items, batch_size: int | None = None, progress=None) -> int:
+    """Insere várias questões em lotes; retorna quantas foram inseridas.
+
+    `items` pode ser qualquer iterável de dicts (inclusive um gerador).
+    SQLite/Postgres gravam tudo numa única transação; na API do Supabase
+    cada lote de `batch_size` itens é um único POST. `progress(n)` é chamado
+    após cada lote com o total inserido até então.
+    """
+    if batch_size is None:
+        batch_size = get_batch_size()
+    return get_backend().insert_questions(items, max(1, int(batch_size)), progress)
+
+@_invalidates("questoes")
+def import_questions(items, batch_size: int | None = None, progress=None, on_duplicate=None, threshold: float | None = None) -> int:
+    """insert_questions com deduplicação; retorna quantas foram inseridas.
+
+    Questões com o mesmo conteúdo normalizado (enunciado + alternativas) de
+    uma já existente, ou de um item anterior da mesma importação, não são
+    inseridas. As parecidas (similaridade estimada >= `threshold`, padrão
+    get_dedup_threshold()) entram e ficam marcadas em questoes_similares.
+    `on_duplicate(item, tipo, questao_id)` recebe tipo "duplicada" ou
+    "similar" e o id da questão correspondente. Questões ainda fora do
+    índice entram nele antes (a primeira importação indexa o banco).
+    """
+    if batch_size is None:
+        batch_size = get_batch_size()
+    if threshold is None:
+        threshold = get_dedup_threshold()
+    return get_backend().insert_questions(items, max(1, int(batch_size)), progress, float(threshold), on_duplicate)
+
+def get_dedup_threshold() -> float:
+    """Similaridade mínima para marcar parecidas (`[importacao] similaridade` ou IMPORT_SIMILARIDADE)."""
+    return float(_get_setting("importacao", "similaridade", "IMPORT_SIMILARIDADE", dedup.DEFAULT_THRESHOLD))
+
+@_invalidates("questoes")
+def index_duplicates() -> int:
+    """Coloca no índice de duplicatas as questões que ainda não estão nele
+    (marcando as parecidas); retorna quantas foram indexadas."""
+    return get_backend().index_duplicates(get_batch_size(), get_dedup_threshold())
+
+@_cached_read("questoes")
+def get_similar_questions() -> list[tuple]:
+    """Questões marcadas como parecidas: (questao_id, similar_a, similaridade)."""
+    return get_backend().get_similar_questions()
+
+def get_batch_size() -> int:
+    """Tamanho de lote configurado (`[database] batch_size` ou DB_BATCH_SIZE)."""
+    return max(1, int(_get_setting("database", "batch_size", "DB_BATCH_SIZE", DEFAULT_BATCH_SIZE)))
+
+def get_all_questions(filters: dict | None = None, status: str | None = None, columns=None, lazy: bool = False):
+    """Linhas de questoes (tuplas na ordem de COLUMNS ou de `columns`), ordenadas por id.
+
+    `columns` limita as colunas lidas. Com `lazy=True`, retorna LazyQuestion:
+    só as colunas leves vêm agora; enunciado/alternativas/comentário são
+    carregados por id quando acessados.
+    """
+    columns = _projection(columns, lazy)
+    rows = _all_question_rows(filters, status, columns)
+    return _lazy_rows(columns, rows) if lazy else rows
+
+# O cache guarda só as tuplas: as LazyQuestion mudam ao serem hidratadas,
+# então cada chamada recebe as suas.
+@_cached_read("questoes")
+def _all_question_rows(filters, status, columns):
+    return get_backend().get_all_questions(filters, status, columns)
+
+def _lazy_rows(columns, rows) -> list[LazyQuestion]:
+    return [LazyQuestion(dict(zip(columns, r))) for r in rows]
+
+def today_date_str():
+    return datetime.now().date().isoformat()
+
+def schedule_next_date(is_correct: bool, marked_doubt: bool = False):
+    today = datetime.now().date()
+    if marked_doubt:
+        return (today + timedelta(days=1)).isoformat()
+    return (today + (timedelta(days=7) if is_correct else timedelta(days=1))).isoformat()
+
+def get_due_for_review(filters: dict | None = None, columns=None, lazy: bool = False):
+    """Questões com revisão vencida até hoje; `columns`/`lazy` como em get_all_questions."""
+    columns = _projection(columns, lazy)
+    rows = _due_rows(filters, columns)
+    return _lazy_rows(columns, rows) if lazy else rows
+
+@_cached_read("questoes", key_extra=today_date_str)
+def _due_rows(filters, columns):
+    return get_backend().get_due_for_review(filters, columns)
+
+@_cached_read("questoes")
+def get_question(qid: int, columns=None):
+    """Linha completa (ordem de COLUMNS) de uma questão, ou None.
+
+    `columns` escolhe as colunas, como em get_all_questions (aceita também
+    ALTERNATIVAS_COLUMNS).
+    """
+    return get_backend().get_question(qid, _projection(columns, False))
+
+@_invalidates("questoes")
+def update_question_status(qid: int, status: str, proxima_revisao_date: str | None = None, revisoes_feitas: int | None = None):
+    """Atualiza status e opcionalmente data de próxima revisão e contador de revisões.
+
+    Se revisoes_feitas for None, mantém valor atual.
+    """
+    get_backend().update_question_status(qid, status, proxima_revisao_date, revisoes_feitas)
+
+def get_revisoes_feitas(qid: int) -> int:
+    return get_backend().get_revisoes_feitas(qid)
+
+_scheduler = None
+
+def get_scheduler() -> srs.Scheduler:
+    """Agendador configurado em `[srs] scheduler` / SRS_SCHEDULER (padrão: plateau).
+
+    Para o FSRS, `[srs] retencao` / SRS_RETENCAO define a retenção desejada
+    (padrão 0.9).
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = srs.get_scheduler(
+            str(_get_setting("srs", "scheduler", "SRS_SCHEDULER", srs.PlateauScheduler.name)),
+            desired_retention=float(_get_setting("srs", "retencao", "SRS_RETENCAO", 0.9)),
+        )
+    return _scheduler
+
+@_invalidates("questoes")
+def record_answer(qid: int, is_correct: bool, marked_doubt: bool = False) -> dict | None:
+    """Registra uma resposta numa única ida ao banco e devolve o novo agendamento.
+
+    - acerto sem dúvida: status 'acerto' e revisoes_feitas + 1;
+    - acerto com dúvida: status 'duvida';
+    - erro: status 'erro' (revisoes_feitas mantido).
+
+    O intervalo vem do agendador configurado (get_scheduler). No plateau
+    (1/7/15 dias; dúvida ou erro, 1 dia) ele é calculado e o contador
+    incrementado no mesmo UPDATE (RPC `record_answer` no Supabase); SM-2 e
+    FSRS leem e gravam o estado na mesma transação, com a linha bloqueada.
+    Retorna {"status", "proxima_revisao", "revisoes_feitas",
+    "intervalo_dias"} ou None se a questão não existir.
+    """
+    return get_backend().record_answer(qid, is_correct, marked_doubt, get_scheduler())
+
+@_invalidates("questoes")
+def reschedule_all(scheduler: srs.Scheduler | None = None) -> int:
+    """Reagenda todas as questões respondidas com `scheduler` (padrão: o configurado).
+
+    Calcula de uma vez, com NumPy, o estado e o intervalo de cada questão
+    (estimando o que falta, p.ex. ao trocar de agendador) e grava
+    proxima_revisao = data_resposta + intervalo em lote. Retorna quantas
+    questões foram reagendadas.
+    """
+    scheduler = scheduler or get_scheduler()
+    rows = get_backend().get_schedule_states()
+    if not rows:
+        return 0
+    ids, status, data_resp, *state_cols = zip(*rows)
+    plano = scheduler.plan(dict(zip(srs.STATE_COLUMNS, state_cols)), status)
+    hoje = np.datetime64(today_date_str(), "D")
+    base = np.array([_iso_day(d) for d in data_resp], dtype="datetime64[D]")
+    base = np.where(np.isnat(base), hoje, base)
+    proxima = (base + plano["intervalo"].astype("timedelta64[D]")).astype(str)
+    cols = [plano[c] for c in SRS_COLUMNS]
+    out = [
+        (int(qid), str(prox), *(None if np.isnan(v) else (int(v) if c == "intervalo" else float(v)) for c, v in zip(SRS_COLUMNS, vals)))
+        for qid, prox, *vals in zip(ids, proxima, *cols)
+    ]
+    get_backend().update_by_id(("proxima_revisao",) + SRS_COLUMNS, out)
+    return len(out)
+
+DEFAULT_DAILY_CAPACITY = 50
+
+def get_daily_capacity() -> int:
+    """Revisões por dia para smooth_backlog (`[srs] capacidade_diaria` ou SRS_CAPACIDADE_DIARIA)."""
+    return max(1, int(_get_setting("srs", "capacidade_diaria", "SRS_CAPACIDADE_DIARIA", DEFAULT_DAILY_CAPACITY)))
+
+@_invalidates("questoes")
+def smooth_backlog(capacidade: int | None = None) -> dict:
+    """Distribui a fila de revisões para no máximo `capacidade` por dia.
+
+    Percorre todas as questões agendadas em ordem de vencimento (as mais
+    atrasadas e com menos revisões primeiro). Nenhuma revisão é antecipada:
+    atrasadas vão para hoje ou depois, e só os dias acima da capacidade
+    empurram revisões para a frente. O cálculo é vetorizado
+    (scheduler.smooth_load) e só as datas alteradas são gravadas, num
+    UPDATE em lote.
+
+    Retorna {"reagendadas": n, "ultimo_dia": data ISO da última revisão da fila}.
+    """
+    capacidade = capacidade or get_daily_capacity()
+    hoje = np.datetime64(today_date_str(), "D")
+    rows = get_backend().get_review_queue()
+    if not rows:
+        return {"reagendadas": 0, "ultimo_dia": None}
+    ids, proximas, _revs = zip(*rows)
+    vencimento = np.array([_iso_day(p) for p in proximas], dtype="datetime64[D]")
+    vencimento = np.where(np.isnat(vencimento), hoje, vencimento)
+    # A fila já vem ordenada por vencimento; datas inválidas (agora hoje)
+    # podem quebrar a ordem, daí o sort estável.
+    offsets = np.maximum((vencimento - hoje).astype(np.int64), 0)
+    order = np.argsort(offsets, kind="stable")
+    dias = np.empty_like(offsets)
+    dias[order] = srs.smooth_load(offsets[order], capacidade)
+    novas = hoje + dias.astype("timedelta64[D]")
+    mudou = (novas != vencimento) | np.array([_iso_day(p) != p for p in proximas])
+    out = [(int(qid), str(d)) for qid, d in zip(np.asarray(ids)[mudou], novas[mudou])]
+    get_backend().update_by_id(("proxima_revisao",), out)
+    return {"reagendadas": len(out), "ultimo_dia": str(novas.max())}
+
+def _dias_ate(value) -> int | None:
+    """Dias de hoje até a data ISO `value` (como dias_revisao no SQL); None sem data válida."""
+    try:
+        return (datetime.fromisoformat(str(value)[:10]).date() - datetime.now().date()).days
+    except ValueError:
+        return None
+
+def _iso_day(value) -> str:
+    try:
+        return datetime.fromisoformat(str(value)[:10]).date().isoformat()
+    except ValueError:
+        return "NaT"
+
+def _apply_scheduler(scheduler: srs.Scheduler, data_resposta, state: dict, is_correct: bool, marked_doubt: bool):
+    """(status, proxima_revisao, novo_estado) after one answer under `scheduler`."""
+    today = datetime.now().date()
+    ultima = _iso_day(data_resposta)
+    elapsed = None if ultima == "NaT" else (today - datetime.fromisoformat(ultima).date()).days
+    novo = scheduler.review_one(state, srs.grade_for(is_correct, marked_doubt), elapsed)
+    proxima = (today + timedelta(days=novo["intervalo"])).isoformat()
+    return _answer_status(is_correct, marked_doubt), proxima, novo
+
+def compute_next_interval_days(revisoes_feitas: int) -> int:
+    """Dado o número de revisões já feitas, retorna o próximo intervalo (dias).
+
+    Modelo plateau (scheduler.PLATEAU_INTERVALS): 0->1 dia, 1->7 dias, >=2->15 dias.
+    """
+    first, second, rest = srs.PLATEAU_INTERVALS
+    if revisoes_feitas <= 0:
+        return first
+    if revisoes_feitas == 1:
+        return second
+    return rest
+
+# compute_next_interval_days em SQL, sobre o valor atual da coluna.
+_PLATEAU_INTERVAL_SQL = (
+    "CASE WHEN COALESCE(revisoes_feitas, 0) <= 0 THEN {} WHEN revisoes_feitas = 1 THEN {} ELSE {} END".format(*srs.PLATEAU_INTERVALS)
+)
+
+def _answer_status(is_correct: bool, marked_doubt: bool) -> str:
+    if not is_correct:
+        return "erro"
+    return "duvida" if marked_doubt else "acerto"
+
+def _answer_result(row) -> dict | None:
+    if row is None:
+        return None
+    status, proxima, revs = row
+    dias = (datetime.fromisoformat(str(proxima)).date() - datetime.now().date()).days
+    return {"status": status, "proxima_revisao": proxima, "revisoes_feitas": int(revs or 0), "intervalo_dias": dias}
+
+@_invalidates("questoes")
+def migrate_revisado_para_acerto():
+    """Converte registros com status 'revisado' para 'acerto'.
+
+    Política:
+    - Define revisoes_feitas = 1 se nulo ou 0.
+    - Agenda próxima revisão em compute_next_interval_days(1) dias (segunda etapa: 15d)
+      somente se não houver proxima_revisao já definida.
+    - Mantém data_resposta original; só atualiza campos necessários.
+    """
+    return get_backend().migrate_revisado_para_acerto()
+
+@_cached_read("questoes")
+def get_distinct(field: str):
+    if field not in _DISTINCT_WHITELIST:
+        raise ValueError("Campo não permitido para DISTINCT")
+    return get_backend().get_distinct(field)
+
+@_cached_read("questoes")
+def get_aula_hierarchy() -> dict[str, dict[str, dict[str, int]]]:
+    """Hierarquia disciplina -> aula -> {status: quantidade}, numa única consulta agrupada.
+
+    Disciplinas/aulas vazias são omitidas (como em get_distinct).
+    """
+    hierarchy: dict[str, dict[str, dict[str, int]]] = {}
+    for disciplina, aula, status, quantidade in get_backend().get_aula_counts():
+        if not disciplina or not str(disciplina).strip():
+            continue
+        aulas = hierarchy.setdefault(disciplina, {})
+        if not aula or not str(aula).strip():
+            continue
+        por_status = aulas.setdefault(aula, {})
+        por_status[status] = por_status.get(status, 0) + int(quantidade)
+    return {d: dict(sorted(aulas.items())) for d, aulas in sorted(hierarchy.items())}
+
+@_cached_read("questoes", key_extra=today_date_str)
+def get_questions_page(filters: dict | None = None, after_id: int | None = None, limit: int = 25, columns=None):
+    """Uma página de questões com paginação por chave (id > after_id), filtrada no banco.
+
+    `filters` aceita "disciplina", "aula" e "status" (valor único ou lista) e
+    "texto" (palavras em enunciado + comentário, como em search_questions,
+    mas na ordem dos ids). Para a próxima página, passe o id da última linha como `after_id`; o custo não
+    cresce com o número da página.
+    """
+    return get_backend().get_questions_page(filters, after_id, limit, _projection(columns, False))
+
+@_cached_read("questoes")
+def count_questions(filters: dict | None = None) -> int:
+    """Total de questões que atendem `filters` (mesmo formato de get_questions_page)."""
+    return get_backend().count_questions(filters)
+
+@_invalidates("questoes")
+def backfill_busca_normalizada() -> int:
+    """Preenche busca_normalizada das questões gravadas sem ela (por fora do app).
+
+    Insert e importação já gravam a coluna; a migração 9 preenche as
+    existentes. Retorna quantas linhas foram preenchidas.
+    """
+    return get_backend().backfill_busca_normalizada(get_batch_size())
+
+@_invalidates("questoes")
+def backfill_alternativas() -> int:
+    """Grava alternativas em JSON canônico, com letras e prévia, nas questões
+    gravadas sem elas (por fora do app); retorna quantas."""
+    return get_backend().backfill_alternativas(get_batch_size())
+
+@_cached_read("questoes")
+def search_questions(query: str, filters: dict | None = None, limit: int = 25, offset: int = 0) -> list[int]:
+    """Ids das questões que contêm as palavras de `query`, da mais relevante para a menos.
+
+    Cada palavra casa como prefixo, sem acentos nem maiúsculas, em enunciado +
+    comentário; todas precisam aparecer. Usa o índice de busca textual (FTS5
+    no SQLite, tsvector + GIN no Postgres/Supabase) e cai para a busca por
+    substring, na ordem dos ids, onde ele não existe. `filters` como em
+    get_questions_page; o total é count_questions({**filters, "texto": query}).
+    """
+    if not query or not query.strip():
+        return []
+    return get_backend().search_questions(query.strip(), filters, int(limit), int(offset))
+
+@_cached_read("questoes", key_extra=today_date_str)
+def get_questions_by_ids(ids, columns=None) -> list[tuple]:
+    """Linhas das questões `ids`, na mesma ordem (ids inexistentes são omitidos)."""
+    columns = _projection(columns, False)
+    if "id" not in columns:
+        raise ValueError("get_questions_by_ids precisa da coluna 'id'.")
+    ids = [int(i) for i in ids]
+    id_idx = columns.index("id")
+    por_id = {row[id_idx]: row for row in get_backend().get_questions_by_ids(ids, columns)}
+    return [por_id[i] for i in ids if i in por_id]
+
+def iter_questions(filters: dict | None = None, columns=None, page_size: int = 1000):
+    """Itera todas as questões do filtro, página a página (memória limitada)."""
+    columns = _projection(columns, False)
+    if "id" not in columns:
+        raise ValueError("iter_questions precisa da coluna 'id' para paginar.")
+    id_idx = columns.index("id")
+    after_id = None
+    while True:
+        page = get_backend().get_questions_page(filters, after_id, page_size, columns)
+        yield from page
+        if len(page) < page_size:
+            return
+        after_id = page[-1][id_idx]
+
+@_cached_read("questoes")
+def get_daily_stats() -> list[tuple]:
+    """Rollup do Desempenho: linhas (dia, disciplina, status, revisoes_feitas, quantidade).
+
+    `dia` é a data da última resposta ('' se nunca respondida). O número de
+    linhas cresce com dias × disciplinas, não com o número de questões.
+    """
+    return get_backend().get_daily_stats()
+
+@_invalidates("questoes")
+def rebuild_daily_stats() -> int:
+    """Recalcula estatisticas_diarias a partir de questoes (ex.: após SQL manual)."""
+    return get_backend().rebuild_daily_stats()
+
+def log_answer(qid: int, alternativa: str | None, correta: bool, duvida: bool = False, tempo_resposta: float | None = None):
+    """Registra uma resposta no histórico (tabela respostas), via buffer em lote.
+
+    `tempo_resposta` em segundos, se medido. Use junto com record_answer,
+    que atualiza o agendamento da questão.
+    """
+    _answer_log.append((
+        qid,
+        datetime.now().isoformat(timespec="seconds"),
+        alternativa,
+        int(bool(correta)),
+        int(bool(duvida)),
+        None if tempo_resposta is None else round(float(tempo_resposta), 2),
+    ))
+
+def flush_answer_log() -> int:
+    """Grava os eventos pendentes do buffer; retorna quantos foram gravados."""
+    return _answer_log.flush()
+
+def _answer_range(start, end) -> tuple[str | None, str | None]:
+    # Datas inclusivas -> intervalo [início, dia seguinte ao fim) sobre o texto ISO.
+    start = start.isoformat() if hasattr(start, "isoformat") else start
+    if end is not None:
+        end = (datetime.fromisoformat(str(end)[:10]).date() + timedelta(days=1)).isoformat()
+    return start, end
+
+def get_answer_events(start=None, end=None, disciplinas: list | None = None) -> list[tuple]:
+    """Respostas entre as datas `start` e `end` (inclusive), em ordem cronológica.
+
+    Linhas (questao_id, disciplina, respondida_em, alternativa, correta,
+    duvida, tempo_resposta).
+    """
+    _answer_log.flush_quietly()
+    return _get_answer_events(*_answer_range(start, end), tuple(disciplinas or ()))
+
+@_cached_read("respostas")
+def _get_answer_events(start, end, disciplinas: tuple):
+    return get_backend().get_answer_events(start, end, list(disciplinas))
+
+def get_answer_daily_counts(start=None, end=None, disciplinas: list | None = None) -> list[tuple]:
+    """Respostas por dia e resultado: linhas (dia, status, quantidade).
+
+    status é 'acerto', 'erro' ou 'duvida' conforme a resposta dada naquele
+    momento (não o status atual da questão).
+    """
+    _answer_log.flush_quietly()
+    return _get_answer_daily_counts(*_answer_range(start, end), tuple(disciplinas or ()))
+
+@_cached_read("respostas")
+def _get_answer_daily_counts(start, end, disciplinas: tuple):
+    return get_backend().get_answer_daily_counts(start, end, list(disciplinas))
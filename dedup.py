@@ -0,0 +1,106 @@
+"""Assinaturas de conteúdo para achar questões repetidas na importação.
+
+Cada questão vira um texto normalizado (enunciado + alternativas, sem
+acentos, pontuação nem maiúsculas) com:
+- um hash de conteúdo: iguais = duplicata exata;
+- uma assinatura MinHash (NUM_PERM mínimos de hashes dos trechos de
+  SHINGLE_CHARS caracteres): a fração de posições iguais entre duas
+  assinaturas estima a similaridade de Jaccard dos textos;
+- chaves LSH: a assinatura cortada em BANDS faixas, cada faixa resumida
+  num inteiro. Duas questões só são comparadas se compartilham alguma
+  chave, então achar candidatas é uma busca por chave, não O(n²).
+
+Tudo vetorizado com NumPy sobre um lote de questões; a gravação e a
+consulta das chaves ficam em db.py.
+"""
+import hashlib
+import json
+import re
+import unicodedata
+
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+# Caracteres por shingle: uma palavra trocada muda poucos trechos, então
+# variações de OCR ou de pontuação continuam bem parecidas.
+SHINGLE_CHARS = 5
+# Similaridade estimada a partir da qual uma questão é marcada como parecida.
+DEFAULT_THRESHOLD = 0.8
+
+_rng = np.random.default_rng(20240601)
+# Hash multiplicativo por permutação: ((a * x + b) mod 2^64) >> 32.
+_PERM_A = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+_BAND_MULT = np.uint64(0x9E3779B97F4A7C15)
+_EMPTY = np.iinfo(np.uint32).max
+_SHINGLE_WEIGHTS = np.uint64(256) ** np.arange(SHINGLE_CHARS - 1, -1, -1, dtype=np.uint64)
+
+
+def normalize(enunciado, alternativas) -> str:
+    """Texto comparado: enunciado + alternativas, só letras/dígitos ASCII minúsculos."""
+    if isinstance(alternativas, str):
+        try:
+            alternativas = json.loads(alternativas)
+        except ValueError:
+            alternativas = [alternativas]
+    partes = [str(enunciado or "")] + [str(a) for a in (alternativas or [])]
+    texto = unicodedata.normalize("NFKD", " ".join(partes)).encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join(re.findall(r"[a-z0-9]+", texto))
+
+
+def content_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _shingles(text: str) -> np.ndarray:
+    """Distinct SHINGLE_CHARS-character windows of `text`, each packed into an integer."""
+    data = np.frombuffer(text.encode("ascii"), dtype=np.uint8).astype(np.uint64)
+    if len(data) < SHINGLE_CHARS:
+        return np.unique(data @ _SHINGLE_WEIGHTS[-len(data):]) if len(data) else data
+    windows = np.lib.stride_tricks.sliding_window_view(data, SHINGLE_CHARS)
+    return np.unique(windows @ _SHINGLE_WEIGHTS)
+
+
+def minhash(texts) -> np.ndarray:
+    """(n, NUM_PERM) uint32 signatures; an empty text gets all-max values."""
+    sigs = np.full((len(texts), NUM_PERM), _EMPTY, dtype=np.uint32)
+    for i, text in enumerate(texts):
+        shingles = _shingles(text)
+        if len(shingles):
+            hashed = (shingles[:, None] * _PERM_A + _PERM_B) >> np.uint64(32)
+            sigs[i] = hashed.min(axis=0)
+    return sigs
+
+
+def band_keys(sigs: np.ndarray) -> np.ndarray:
+    """(n, BANDS) int64 LSH keys; the band number is mixed in, so keys of
+    different bands never collide."""
+    bands = sigs.astype(np.uint64).reshape(len(sigs), BANDS, ROWS_PER_BAND)
+    keys = np.arange(1, BANDS + 1, dtype=np.uint64) * _BAND_MULT
+    keys = np.broadcast_to(keys, bands.shape[:2]).copy()
+    for r in range(ROWS_PER_BAND):
+        keys = (keys ^ bands[:, :, r]) * _BAND_MULT
+    return keys.view(np.int64)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of paired signatures (rows of a and b)."""
+    return (np.atleast_2d(a) == np.atleast_2d(b)).mean(axis=1)
+
+
+def encode(sig: np.ndarray) -> str:
+    """Signature as hex text (stored in questoes_assinaturas.minhash)."""
+    return sig.astype("<u4").tobytes().hex()
+
+
+def decode(text: str) -> np.ndarray:
+    return np.frombuffer(bytes.fromhex(text), dtype="<u4").astype(np.uint32)
+
+
+def signatures(pairs) -> tuple[list[str], np.ndarray, np.ndarray]:
+    """Hashes, MinHash signatures and LSH keys for (enunciado, alternativas) pairs."""
+    texts = [normalize(e, a) for e, a in pairs]
+    sigs = minhash(texts)
+    return [content_hash(t) for t in texts], sigs, band_keys(sigs)
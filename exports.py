@@ -0,0 +1,164 @@
+"""Exportação das questões de um filtro do Banco: JSON, JSON Lines, CSV,
+Excel e Parquet.
+
+Os arquivos só são gerados quando alguém pede o download. A leitura é
+página a página (db.iter_questions) e cada formato escreve bloco a bloco,
+sem montar um DataFrame com o filtro inteiro. O resultado fica em cache por
+formato + filtro e vale até a próxima gravação em questoes feita por este
+processo (mesma geração do cache de consultas do db) ou até vencer o TTL do
+cache de consultas (`[cache] ttl`), que limita o atraso para alterações
+feitas por fora: baixar de novo o mesmo arquivo não relê o banco.
+"""
+import csv
+import io
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import db
+
+# Linhas lidas do banco por vez.
+EXPORT_CHUNK_ROWS = 1000
+# Arquivos prontos mantidos em memória (formato + filtro).
+EXPORT_CACHE_ENTRIES = 8
+
+# Colunas lidas do banco: a linha completa, a prévia das alternativas e os
+# dias até a revisão (calculados na consulta).
+_QUERY_COLUMNS = db.COLUMNS + ["alternativas_preview", "dias_revisao"]
+# Colunas dos arquivos: as lidas mais revisao_vencida (dias_revisao <= 0).
+EXPORT_COLUMNS = _QUERY_COLUMNS + ["revisao_vencida"]
+
+
+@dataclass(frozen=True)
+class Formato:
+    rotulo: str
+    extensao: str
+    mime: str
+
+
+FORMATOS = {
+    "json": Formato("JSON", "json", "application/json"),
+    "jsonl": Formato("JSON Lines", "jsonl", "application/x-ndjson"),
+    "csv": Formato("CSV", "csv", "text/csv"),
+    "xlsx": Formato("Excel", "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "parquet": Formato("Parquet", "parquet", "application/vnd.apache.parquet"),
+}
+
+_cache: OrderedDict = OrderedDict()  # (formato, filtro) -> (geração, expira_em, bytes)
+_lock = threading.Lock()
+
+
+def fingerprint(filters: dict | None) -> str:
+    """Chave estável do filtro (a ordem das chaves e listas vazias não importam)."""
+    return json.dumps({k: v for k, v in (filters or {}).items() if v}, sort_keys=True, ensure_ascii=False)
+
+
+def _chunks(filters):
+    chunk = []
+    dias_idx = _QUERY_COLUMNS.index("dias_revisao")
+    for row in db.iter_questions(filters, columns=_QUERY_COLUMNS, page_size=EXPORT_CHUNK_ROWS):
+        dias = row[dias_idx]
+        chunk.append(tuple(row) + (dias is not None and dias <= 0,))
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _records(chunk):
+    return (dict(zip(EXPORT_COLUMNS, row)) for row in chunk)
+
+
+def _write_json(filters, out):
+    # Mesmo texto de json.dumps(lista, indent=2), escrito registro a registro.
+    out.write(b"[")
+    first = True
+    for chunk in _chunks(filters):
+        parts = []
+        for rec in _records(chunk):
+            item = json.dumps(rec, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+            parts.append(("\n  " if first else ",\n  ") + item)
+            first = False
+        out.write("".join(parts).encode("utf-8"))
+    out.write(b"]" if first else b"\n]")
+
+
+def _write_jsonl(filters, out):
+    for chunk in _chunks(filters):
+        out.write("".join(json.dumps(rec, ensure_ascii=False) + "\n" for rec in _records(chunk)).encode("utf-8"))
+
+
+def _write_csv(filters, out):
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(EXPORT_COLUMNS)
+    for chunk in _chunks(filters):
+        writer.writerows(chunk)
+    text.detach()
+
+
+def _write_xlsx(filters, out):
+    from openpyxl import Workbook
+
+    # write_only: as linhas vão direto para o arquivo, sem manter células em memória.
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(EXPORT_COLUMNS)
+    for chunk in _chunks(filters):
+        for row in chunk:
+            ws.append(row)
+    wb.save(out)
+
+
+def _write_parquet(filters, out):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {"id": pa.int64(), "revisoes_feitas": pa.int64(), "dias_revisao": pa.int64(), "revisao_vencida": pa.bool_()}
+    schema = pa.schema([(col, types.get(col, pa.string())) for col in EXPORT_COLUMNS])
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in _chunks(filters):
+            columns = list(zip(*chunk))
+            arrays = [pa.array(values, type=field.type) for values, field in zip(columns, schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+
+_WRITERS = {
+    "json": _write_json,
+    "jsonl": _write_jsonl,
+    "csv": _write_csv,
+    "xlsx": _write_xlsx,
+    "parquet": _write_parquet,
+}
+
+
+def export_bytes(formato: str, filters: dict | None = None) -> bytes:
+    """Arquivo `formato` (chave de FORMATOS) com as questões do filtro."""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação desconhecido: {formato!r}")
+    key = (formato, fingerprint(filters))
+    geracao = db.get_generation("questoes")
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == geracao and time.monotonic() < cached[1]:
+            _cache.move_to_end(key)
+            return cached[2]
+    out = io.BytesIO()
+    _WRITERS[formato](filters, out)
+    data = out.getvalue()
+    ttl = db.get_cache_ttl()
+    if ttl <= 0:
+        return data
+    with _lock:
+        _cache[key] = (geracao, time.monotonic() + ttl, data)
+        _cache.move_to_end(key)
+        while len(_cache) > EXPORT_CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return data
+
+
+def file_name(formato: str, base: str = "questoes_filtradas") -> str:
+    return f"{base}.{FORMATOS[formato].extensao}"
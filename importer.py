@@ -0,0 +1,258 @@
+"""Importação em streaming de arquivos JSON / JSON Lines de questões.
+
+Lê o arquivo aos poucos (nunca o conteúdo inteiro em memória), valida em
+lotes com o modelo Questao e grava via db.import_questions. Itens inválidos
+não interrompem a importação: vão para um arquivo de rejeitados (JSON Lines,
+um objeto {"posicao", "erro", "item"} por linha).
+
+Questões repetidas (mesmo enunciado + alternativas depois de normalizados,
+já no banco ou antes no próprio arquivo) também vão para os rejeitados; as
+muito parecidas são gravadas e marcadas (ver dedup.py).
+
+Formatos aceitos:
+- JSON: uma lista de objetos `[ {...}, {...} ]`;
+- JSON Lines: um objeto por linha (um único objeto em uma linha também serve).
+"""
+import json
+from dataclasses import dataclass
+
+import db
+from models import Questao
+
+# Quanto ler do arquivo por vez.
+READ_CHUNK_CHARS = 64 * 1024
+# Um único item maior que isso é tratado como arquivo corrompido (evita
+# acumular o arquivo inteiro no buffer procurando o fim de um objeto).
+MAX_ITEM_CHARS = 10 * 1024 * 1024
+
+_decoder = json.JSONDecoder()
+_WS = " \t\r\n"
+
+
+@dataclass
+class ImportResult:
+    importadas: int = 0
+    rejeitadas: int = 0
+    duplicadas: int = 0
+    similares: int = 0
+
+
+def _skip_ws(buf: str, pos: int) -> int:
+    while pos < len(buf) and buf[pos] in _WS:
+        pos += 1
+    return pos
+
+
+def _iter_json_array(fp, buf: str):
+    """Yield the elements of a top-level JSON array, reading `fp` incrementally.
+
+    `buf` holds text already read, starting at the opening "[".
+    """
+    pos = 1
+    eof = False
+    first = True
+    expect_value = True
+    # Varredura do item inválido/incompleto em andamento (ver _item_end).
+    scan = None
+    while True:
+        pos = _skip_ws(buf, pos)
+        if pos >= len(buf):
+            if eof:
+                raise ValueError("JSON incompleto: lista sem ']' final.")
+            chunk = fp.read(READ_CHUNK_CHARS)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        ch = buf[pos]
+        if ch == "]" and (first or not expect_value):
+            return
+        if not expect_value:
+            if ch != ",":
+                raise ValueError(f"JSON inválido: esperado ',' ou ']' e encontrado {ch!r}.")
+            pos += 1
+            expect_value = True
+            continue
+        try:
+            value, end = _decoder.raw_decode(buf, pos)
+            complete = end < len(buf) or eof
+        except json.JSONDecodeError:
+            # Item inválido ou ainda incompleto: se o fim dele (',' ou ']'
+            # fora de strings e chaves) já está no buffer, o item vira um
+            # erro e a leitura segue no próximo.
+            end, scan = _item_end(buf, pos, scan)
+            if end is None and eof:
+                raise
+            complete = end is not None
+            if complete:
+                value = _invalid_item(buf[pos:end])
+        if not complete:
+            # O item ainda não chegou inteiro (ou um número pode continuar no
+            # próximo bloco): lê mais e tenta de novo.
+            if len(buf) - pos > MAX_ITEM_CHARS:
+                raise ValueError("Item JSON grande demais ou arquivo corrompido.")
+            chunk = fp.read(READ_CHUNK_CHARS)
+            eof = not chunk
+            if scan:
+                scan = (scan[0] - pos,) + scan[1:]
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        scan = None
+        yield value
+        first = expect_value = False
+        pos = end
+        # Descarta o que já foi consumido para manter o buffer pequeno.
+        if pos > READ_CHUNK_CHARS:
+            buf, pos = buf[pos:], 0
+
+
+def _item_end(buf: str, pos: int, state: tuple | None = None) -> tuple[int | None, tuple]:
+    """Find the ',' or ']' closing the array element that starts at `pos`.
+
+    Returns (index or None, state); passing `state` back after more text was
+    appended resumes the scan where it stopped instead of starting over.
+    """
+    i, depth, in_string, escaped = state or (pos, 0, False, False)
+    for i in range(i, len(buf)):
+        ch = buf[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            if depth == 0 and ch == "]":
+                return i, ()
+            depth = max(depth - 1, 0)
+        elif ch == "," and depth == 0:
+            return i, ()
+    return None, (len(buf), depth, in_string, escaped)
+
+
+def _invalid_item(text: str):
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as ex:
+        return ex
+
+
+def _iter_json_lines(fp, head: str):
+    """Yield (lineno, obj_or_error) from JSON Lines; `head` was already read."""
+    # Completa a última linha (parcial) do bloco já lido e segue linha a linha.
+    head += fp.readline(MAX_ITEM_CHARS)
+    lineno = 0
+    for line in head.splitlines():
+        lineno += 1
+        yield from _parse_line(lineno, line)
+    while True:
+        line = fp.readline(MAX_ITEM_CHARS + 1)
+        if not line:
+            return
+        if len(line) > MAX_ITEM_CHARS:
+            raise ValueError(f"Linha {lineno + 1} grande demais ou arquivo corrompido.")
+        lineno += 1
+        yield from _parse_line(lineno, line)
+
+
+def _parse_line(lineno: int, line: str):
+    if not line.strip():
+        return
+    try:
+        yield lineno, json.loads(line)
+    except json.JSONDecodeError as ex:
+        yield lineno, ex
+
+
+def iter_items(fp):
+    """Yield (posicao, item_ou_erro) from a JSON array or JSON Lines stream.
+
+    A line (JSON Lines) or array element (JSON) that is not valid JSON
+    yields a json.JSONDecodeError instance instead of the item, so callers
+    can reject it and keep going. `posicao` is the 1-based element/line
+    number. A JSON array that ends before its closing "]" still raises.
+    """
+    head = ""
+    while not head:
+        chunk = fp.read(READ_CHUNK_CHARS)
+        if not chunk:
+            return
+        head = chunk.lstrip("\ufeff" + _WS)
+    if head[0] == "[":
+        for i, item in enumerate(_iter_json_array(fp, head), start=1):
+            yield i, item
+    else:
+        # JSON Lines (ou um único objeto em uma linha).
+        yield from _iter_json_lines(fp, head)
+
+
+def _validated(items, batch_size: int, rejects, result: ImportResult, positions: dict):
+    """Validate (posicao, item) pairs chunk by chunk; yield valid question dicts."""
+    chunk = []
+    for pair in items:
+        chunk.append(pair)
+        if len(chunk) >= batch_size:
+            yield from _validate_chunk(chunk, rejects, result, positions)
+            chunk = []
+    if chunk:
+        yield from _validate_chunk(chunk, rejects, result, positions)
+
+
+def _validate_chunk(chunk, rejects, result: ImportResult, positions: dict):
+    for posicao, item in chunk:
+        try:
+            if isinstance(item, Exception):
+                raise item
+            questao = Questao.parse_obj(item).dict()
+            positions[id(questao)] = posicao
+            yield questao
+        except Exception as ex:
+            result.rejeitadas += 1
+            if rejects is not None:
+                # Para itens que nem são JSON, guarda o texto original.
+                original = item.doc.strip() if isinstance(item, json.JSONDecodeError) else item
+                payload = {"posicao": posicao, "erro": str(ex), "item": original}
+                rejects.write(json.dumps(payload, ensure_ascii=False, default=str) + "\n")
+
+
+def import_stream(fp, batch_size: int | None = None, rejects=None, progress=None, dedup: bool = True) -> ImportResult:
+    """Stream questions from a text file object into the database.
+
+    Memory use is bounded by the batch size, not by the file size. Invalid
+    items are written to `rejects` (a text stream) as JSON Lines.
+    `progress(importadas, rejeitadas)` is called after each batch.
+    With `dedup`, exact duplicates are rejected too and near-duplicates
+    are imported and counted in `similares`.
+    """
+    result = ImportResult()
+    # posição no arquivo de cada questão validada do lote em andamento
+    positions = {}
+
+    def _on_batch(n):
+        result.importadas = n
+        positions.clear()
+        if progress is not None:
+            progress(result.importadas, result.rejeitadas)
+
+    def _on_duplicate(item, tipo, questao_id):
+        if tipo == "similar":
+            result.similares += 1
+            return
+        result.duplicadas += 1
+        result.rejeitadas += 1
+        if rejects is not None:
+            payload = {"posicao": positions.get(id(item)), "erro": f"duplicada da questão #{questao_id}", "item": item}
+            rejects.write(json.dumps(payload, ensure_ascii=False, default=str) + "\n")
+
+    if batch_size is None:
+        batch_size = db.get_batch_size()
+    valid = _validated(iter_items(fp), batch_size, rejects, result, positions)
+    if dedup:
+        result.importadas = db.import_questions(valid, batch_size=batch_size, progress=_on_batch, on_duplicate=_on_duplicate)
+    else:
+        result.importadas = db.insert_questions(valid, batch_size=batch_size, progress=_on_batch)
+    return result
@@ -0,0 +1,129 @@
+"""Comandos de manutenção do Caderno de Questões (fora do Streamlit).
+
+Usa o mesmo backend do app (secrets/variáveis de ambiente; SQLite local por
+padrão).
+
+Exemplos:
+    python manage.py importar questoes.jsonl --rejeitados rejeitados.jsonl
+    python manage.py importar banco.json --batch-size 2000
+    python manage.py estatisticas
+    python manage.py reagendar --agendador fsrs
+    python manage.py distribuir --capacidade 40
+    python manage.py normalizar-busca
+    python manage.py normalizar-alternativas
+    python manage.py duplicadas
+"""
+import argparse
+import sys
+
+import db
+
+
+def cmd_importar(args):
+    import importer
+
+    def _progresso(importadas, rejeitadas):
+        print(f"\r{importadas} importadas, {rejeitadas} rejeitadas", end="", file=sys.stderr, flush=True)
+
+    rejects = open(args.rejeitados, "w", encoding="utf-8") if args.rejeitados else None
+    try:
+        with open(args.arquivo, encoding="utf-8-sig") as fp:
+            resultado = importer.import_stream(
+                fp, batch_size=args.batch_size, rejects=rejects, progress=_progresso, dedup=not args.permitir_duplicadas
+            )
+    finally:
+        if rejects is not None:
+            rejects.close()
+    print(file=sys.stderr)
+    print(f"Importadas: {resultado.importadas}  Rejeitadas: {resultado.rejeitadas}")
+    if resultado.duplicadas or resultado.similares:
+        print(f"Repetidas (rejeitadas): {resultado.duplicadas}  Parecidas (importadas): {resultado.similares}")
+    if resultado.rejeitadas and args.rejeitados:
+        print(f"Detalhes dos rejeitados em {args.rejeitados}")
+    return 0
+
+
+def cmd_estatisticas(args):
+    linhas = db.rebuild_daily_stats()
+    print(f"estatisticas_diarias recalculada: {linhas} linhas.")
+    return 0
+
+
+def cmd_reagendar(args):
+    import scheduler
+
+    agendador = scheduler.get_scheduler(args.agendador) if args.agendador else db.get_scheduler()
+    total = db.reschedule_all(agendador)
+    print(f"{total} questões reagendadas com {agendador.label}.")
+    return 0
+
+
+def cmd_distribuir(args):
+    resultado = db.smooth_backlog(capacidade=args.capacidade)
+    print(f"{resultado['reagendadas']} revisões reagendadas; última revisão da fila em {resultado['ultimo_dia']}.")
+    return 0
+
+
+def cmd_normalizar_busca(args):
+    total = db.backfill_busca_normalizada()
+    print(f"busca_normalizada preenchida em {total} questões.")
+    return 0
+
+
+def cmd_normalizar_alternativas(args):
+    total = db.backfill_alternativas()
+    print(f"alternativas normalizadas em {total} questões.")
+    return 0
+
+
+def cmd_duplicadas(args):
+    indexadas = db.index_duplicates()
+    similares = db.get_similar_questions()
+    print(f"{indexadas} questões indexadas; {len(similares)} marcadas como parecidas.")
+    for questao_id, similar_a, similaridade in similares[: args.listar]:
+        print(f"  #{questao_id} ~ #{similar_a} ({similaridade:.0%})")
+    return 0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Comandos de manutenção do Caderno de Questões.")
+    sub = ap.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("importar", help="importa um arquivo JSON / JSON Lines em streaming")
+    p.add_argument("arquivo", help="caminho do arquivo .json (lista) ou .jsonl (um objeto por linha)")
+    p.add_argument("--batch-size", type=int, default=None, help="itens por lote de validação/gravação")
+    p.add_argument("--rejeitados", help="grava os itens inválidos neste arquivo JSONL")
+    p.add_argument("--permitir-duplicadas", action="store_true", help="não verifica questões repetidas")
+    p.set_defaults(func=cmd_importar)
+
+    p = sub.add_parser("estatisticas", help="recalcula o rollup do Desempenho (estatisticas_diarias) a partir de questoes")
+    p.set_defaults(func=cmd_estatisticas)
+
+    p = sub.add_parser("reagendar", help="recalcula a próxima revisão de todas as questões respondidas")
+    p.add_argument("--agendador", choices=["plateau", "sm2", "fsrs"], help="padrão: o configurado em [srs] scheduler")
+    p.set_defaults(func=cmd_reagendar)
+
+    p = sub.add_parser("distribuir", help="espalha a fila de revisões para no máximo N por dia (atrasadas primeiro)")
+    p.add_argument("--capacidade", type=int, default=None, help="revisões por dia; padrão: [srs] capacidade_diaria")
+    p.set_defaults(func=cmd_distribuir)
+
+    p = sub.add_parser("normalizar-busca", help="preenche busca_normalizada das questões gravadas por fora do app")
+    p.set_defaults(func=cmd_normalizar_busca)
+
+    p = sub.add_parser("normalizar-alternativas", help="grava letras e prévia das alternativas das questões gravadas por fora do app")
+    p.set_defaults(func=cmd_normalizar_alternativas)
+
+    p = sub.add_parser("duplicadas", help="indexa as questões fora do índice de duplicatas e lista as parecidas")
+    p.add_argument("--listar", type=int, default=20, help="quantos pares mostrar (padrão: 20)")
+    p.set_defaults(func=cmd_duplicadas)
+
+    args = ap.parse_args(argv)
+    db.apply_migrations()
+    try:
+        return args.func(args)
+    finally:
+        db.close_pool()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
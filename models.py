@@ -1,6 +1,66 @@
+import ast
+import json
+import re
 from typing import List, Optional
 from pydantic.v1 import BaseModel, validator
 
+# Alternativas são gravadas uma vez em JSON canônico (lista de strings) junto
+# com duas colunas derivadas: a letra de cada alternativa e a prévia do Banco.
+LETRAS = "ABCDE"
+# Posição em alternativas_letras de alternativa sem letra reconhecível por
+# extrair_letra (texto livre); "Certo"/"Errado" têm letra: C/E.
+SEM_LETRA = "-"
+PREVIEW_ALTERNATIVAS = 3
+PREVIEW_CHARS = 70
+
+
+def parse_alternativas(v) -> list:
+    """Lista de alternativas a partir de JSON, repr de lista Python ou texto solto."""
+    if not v:
+        return []
+    if isinstance(v, list):
+        return v
+    if not isinstance(v, str):
+        return [str(v)]
+    try:
+        parsed = json.loads(v)
+    except Exception:
+        try:
+            parsed = ast.literal_eval(v)
+        except Exception:
+            return [v]
+    return parsed if isinstance(parsed, list) else [str(parsed)]
+
+
+def extrair_letra(alt_text):
+    if not alt_text or not isinstance(alt_text, str):
+        return None
+    t = alt_text.strip()
+    if len(t) > 0 and t[0].isalpha():
+        ch = t[0].upper()
+        if ch in LETRAS:
+            return ch
+    m = re.search(r'([A-Ea-e])\s*[\)\.\-:]', t)
+    if m:
+        return m.group(1).upper()
+    m2 = re.search(r'\b([A-Ea-e])\b', t)
+    if m2:
+        candidate = m2.group(1).upper()
+        if candidate in LETRAS:
+            return candidate
+    return None
+
+
+def alternativas_derivadas(alternativas) -> dict:
+    """JSON canônico, letras ("ABCD"; "CE" em Certo/Errado; "-" sem letra) e prévia das alternativas."""
+    lista = [str(a) for a in parse_alternativas(alternativas)]
+    return {
+        "alternativas": json.dumps(lista, ensure_ascii=False),
+        "alternativas_letras": "".join(extrair_letra(a) or SEM_LETRA for a in lista),
+        "alternativas_preview": " | ".join(a[:PREVIEW_CHARS] for a in lista[:PREVIEW_ALTERNATIVAS]),
+    }
+
+
 class Questao(BaseModel):
     numero: Optional[str]
     tipo: Optional[str]
@@ -14,18 +74,7 @@ class Questao(BaseModel):
 
     @validator('alternativas', pre=True, allow_reuse=True)
     def parse_alternativas(cls, v):
-        if isinstance(v, str):
-            import json, ast
-            try:
-                return json.loads(v)
-            except Exception:
-                try:
-                    return ast.literal_eval(v)
-                except Exception:
-                    return [v]
-        if isinstance(v, list):
-            return v
-        return [str(v)]
+        return parse_alternativas(v)
 
     @validator('disciplina', 'enunciado', allow_reuse=True)
     def not_empty(cls, v):
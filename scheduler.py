@@ -0,0 +1,252 @@
+"""Agendadores de repetição espaçada: plateau (1/7/15 dias), SM-2 e FSRS.
+
+Todos seguem a mesma interface vetorizada: recebem o estado de várias
+questões em arrays NumPy e devolvem o novo estado, com o intervalo (em
+dias) até a próxima revisão. Responder uma questão é o caso de tamanho 1
+(review_one); reagendar o banco inteiro é uma única chamada de plan().
+
+Estado (colunas de questoes; NaN = ainda sem valor):
+- revisoes_feitas: acertos sem dúvida acumulados (igual para todos);
+- intervalo: último intervalo agendado, em dias;
+- facilidade: fator de facilidade do SM-2 (EF);
+- estabilidade / dificuldade: memória do FSRS (S em dias, D de 1 a 10).
+
+Notas: 1 = erro, 2 = acerto com dúvida, 3 = acerto.
+"""
+import numpy as np
+
+NOTA_ERRO = 1
+NOTA_DUVIDA = 2
+NOTA_ACERTO = 3
+
+STATE_COLUMNS = ("revisoes_feitas", "intervalo", "facilidade", "estabilidade", "dificuldade")
+# Intervalos do modelo plateau por revisões já feitas: 0 -> 1, 1 -> 7, >= 2 -> 15.
+PLATEAU_INTERVALS = (1, 7, 15)
+MAX_INTERVAL_DAYS = 36500
+
+
+def grade_for(is_correct: bool, marked_doubt: bool = False) -> int:
+    if not is_correct:
+        return NOTA_ERRO
+    return NOTA_DUVIDA if marked_doubt else NOTA_ACERTO
+
+
+def _grade_for_status(status) -> np.ndarray:
+    status = np.asarray(status, dtype=object)
+    return np.select([status == "erro", status == "duvida"], [NOTA_ERRO, NOTA_DUVIDA], NOTA_ACERTO)
+
+
+def _as_state(state: dict, n: int) -> dict[str, np.ndarray]:
+    """Float arrays for every STATE_COLUMNS key (None/missing -> NaN)."""
+    out = {}
+    for col in STATE_COLUMNS:
+        values = state.get(col)
+        if values is None:
+            out[col] = np.full(n, np.nan)
+        else:
+            out[col] = np.array([np.nan if v is None else v for v in np.atleast_1d(values)], dtype=float)
+    return out
+
+
+def _days(values) -> np.ndarray:
+    return np.clip(np.rint(values), 1, MAX_INTERVAL_DAYS).astype(np.int64)
+
+
+class Scheduler:
+    """Common interface; subclasses implement _review and _plan on arrays."""
+
+    name = ""
+    label = ""
+
+    def review(self, state: dict, grades, elapsed=None) -> dict[str, np.ndarray]:
+        """State after answering each question with `grades`.
+
+        `elapsed` holds the days since the previous answer (NaN if never
+        answered). The result has every STATE_COLUMNS key; "intervalo" is
+        the integer number of days until the next review.
+        """
+        grades = np.atleast_1d(np.asarray(grades, dtype=np.int64))
+        n = len(grades)
+        st = _as_state(state, n)
+        elapsed = np.full(n, np.nan) if elapsed is None else np.atleast_1d(np.asarray(elapsed, dtype=float))
+        new = self._review(st, grades, elapsed)
+        revs = np.nan_to_num(st["revisoes_feitas"])
+        new["revisoes_feitas"] = revs + (grades == NOTA_ACERTO)
+        new["intervalo"] = _days(new["intervalo"])
+        for col in STATE_COLUMNS:
+            new.setdefault(col, st[col])
+        return new
+
+    def plan(self, state: dict, status) -> dict[str, np.ndarray]:
+        """Complete state and current interval for already answered questions.
+
+        Used to reschedule the whole bank (e.g. after switching scheduler):
+        missing state is estimated from the status, revisoes_feitas and the
+        last interval; nothing counts as a new answer.
+        """
+        status = np.atleast_1d(np.asarray(status, dtype=object))
+        st = _as_state(state, len(status))
+        if np.isnan(st["intervalo"]).any():
+            guess = PlateauScheduler()._plan(st, _grade_for_status(status))["intervalo"]
+            st["intervalo"] = np.where(np.isnan(st["intervalo"]), guess, st["intervalo"])
+        new = self._plan(st, _grade_for_status(status))
+        new["intervalo"] = _days(new["intervalo"])
+        for col in STATE_COLUMNS:
+            new.setdefault(col, st[col])
+        return new
+
+    def review_one(self, state: dict, grade: int, elapsed: float | None = None) -> dict:
+        """Scalar review(): plain Python values, None for unset state."""
+        new = self.review({k: [v] for k, v in state.items()}, [grade], [np.nan if elapsed is None else elapsed])
+        out = {}
+        for col, values in new.items():
+            v = float(values[0])
+            out[col] = None if np.isnan(v) else v
+        out["intervalo"] = int(new["intervalo"][0])
+        out["revisoes_feitas"] = int(new["revisoes_feitas"][0])
+        return out
+
+    def _review(self, st, grades, elapsed) -> dict:
+        raise NotImplementedError
+
+    def _plan(self, st, grades) -> dict:
+        raise NotImplementedError
+
+
+class PlateauScheduler(Scheduler):
+    """Modelo original: acerto sem dúvida segue 1/7/15 dias; dúvida ou erro, 1 dia."""
+
+    name = "plateau"
+    label = "Plateau (1/7/15 dias)"
+
+    @staticmethod
+    def _plateau(revs) -> np.ndarray:
+        first, second, rest = PLATEAU_INTERVALS
+        return np.select([revs <= 0, revs == 1], [first, second], rest)
+
+    def _review(self, st, grades, elapsed):
+        revs = np.nan_to_num(st["revisoes_feitas"])
+        return {"intervalo": np.where(grades == NOTA_ACERTO, self._plateau(revs), 1)}
+
+    def _plan(self, st, grades):
+        # O intervalo em vigor é o que foi agendado ao chegar em revisoes_feitas.
+        revs = np.nan_to_num(st["revisoes_feitas"])
+        return {"intervalo": np.where(grades == NOTA_ACERTO, self._plateau(revs - 1), 1)}
+
+
+class SM2Scheduler(Scheduler):
+    """SuperMemo SM-2: intervalos 1, 6 e depois intervalo anterior × EF.
+
+    A repetição n é inferida do último intervalo (sem intervalo -> primeira,
+    1 dia -> segunda). Erro volta para 1 dia sem mudar o EF; acerto com
+    dúvida conta como q = 3 (passa, mas reduz o EF).
+    """
+
+    name = "sm2"
+    label = "SM-2"
+    EF_INICIAL = 2.5
+    EF_MINIMO = 1.3
+    _QUALIDADE = {NOTA_ERRO: 1, NOTA_DUVIDA: 3, NOTA_ACERTO: 4}
+
+    def _review(self, st, grades, elapsed):
+        q = np.select([grades == NOTA_ERRO, grades == NOTA_DUVIDA], [self._QUALIDADE[NOTA_ERRO], self._QUALIDADE[NOTA_DUVIDA]], self._QUALIDADE[NOTA_ACERTO])
+        ef = np.where(np.isnan(st["facilidade"]), self.EF_INICIAL, st["facilidade"])
+        prev = np.nan_to_num(st["intervalo"])
+        passou = q >= 3
+        intervalo = np.select([~passou, prev <= 0, prev <= 1], [1, 1, 6], prev * ef)
+        ef_novo = ef + (0.1 - (5 - q) * (0.08 + (5 - q) * 0.02))
+        ef_novo = np.where(passou, np.maximum(ef_novo, self.EF_MINIMO), ef)
+        return {"intervalo": intervalo, "facilidade": ef_novo}
+
+    def _plan(self, st, grades):
+        ef = np.where(np.isnan(st["facilidade"]), self.EF_INICIAL, st["facilidade"])
+        return {"intervalo": st["intervalo"], "facilidade": ef}
+
+
+class FSRSScheduler(Scheduler):
+    """FSRS-4.5 com os pesos padrão; intervalo pela retenção desejada.
+
+    Erro = Again, acerto com dúvida = Hard, acerto = Good.
+    """
+
+    name = "fsrs"
+    label = "FSRS"
+    W = (
+        0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031, 1.6474,
+        0.1367, 1.0461, 2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755,
+    )
+    DECAY = -0.5
+    FACTOR = 0.9 ** (1 / DECAY) - 1
+
+    def __init__(self, desired_retention: float = 0.9):
+        if not 0 < desired_retention < 1:
+            raise ValueError("A retenção desejada deve estar entre 0 e 1.")
+        self.desired_retention = desired_retention
+
+    def _init_difficulty(self, grades):
+        w = self.W
+        return np.clip(w[4] - (grades - 3) * w[5], 1, 10)
+
+    def _interval(self, stability):
+        return stability / self.FACTOR * (self.desired_retention ** (1 / self.DECAY) - 1)
+
+    def _review(self, st, grades, elapsed):
+        w = self.W
+        nova = np.isnan(st["estabilidade"])
+        s = np.where(nova, 1.0, st["estabilidade"])
+        d = np.where(np.isnan(st["dificuldade"]), self._init_difficulty(grades), st["dificuldade"])
+        t = np.maximum(np.nan_to_num(elapsed), 0)
+        r = (1 + self.FACTOR * t / s) ** self.DECAY
+
+        penalidade = np.where(grades == NOTA_DUVIDA, w[15], 1.0)
+        s_acerto = s * (1 + np.exp(w[8]) * (11 - d) * s ** -w[9] * (np.exp((1 - r) * w[10]) - 1) * penalidade)
+        s_erro = np.minimum(w[11] * d ** -w[12] * ((s + 1) ** w[13] - 1) * np.exp((1 - r) * w[14]), s)
+        s_novo = np.where(grades == NOTA_ERRO, s_erro, s_acerto)
+
+        d_novo = d - w[6] * (grades - 3)
+        d_novo = np.clip(w[7] * self._init_difficulty(np.full_like(grades, 4)) + (1 - w[7]) * d_novo, 1, 10)
+
+        # Primeira resposta: estado inicial da nota.
+        s_novo = np.where(nova, np.asarray(w)[grades - 1], s_novo)
+        d_novo = np.where(nova, self._init_difficulty(grades), d_novo)
+        return {"intervalo": self._interval(s_novo), "estabilidade": s_novo, "dificuldade": d_novo}
+
+    def _plan(self, st, grades):
+        # Sem estado FSRS: o último intervalo foi escolhido para ~90% de
+        # retenção, que é a definição de estabilidade.
+        s = np.where(np.isnan(st["estabilidade"]), np.maximum(st["intervalo"], 1), st["estabilidade"])
+        d = np.where(np.isnan(st["dificuldade"]), self._init_difficulty(grades), st["dificuldade"])
+        return {"intervalo": self._interval(s), "estabilidade": s, "dificuldade": d}
+
+
+def smooth_load(offsets, capacity: int) -> np.ndarray:
+    """Spread reviews so no day gets more than `capacity` of them.
+
+    `offsets` are the due days (0 = today) in priority order, already
+    sorted ascending. Returns the assigned day of each review: never before
+    its due day, filled greedily in order. Equivalent to
+    a[i] = max(offsets[i], a[i - capacity] + 1), computed as a running max
+    over the `capacity` interleaved chains i, i + capacity, ...
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    n = len(offsets)
+    if n == 0:
+        return offsets
+    c = max(1, int(capacity))
+    rows = -(-n // c)
+    d = np.concatenate([offsets, np.full(rows * c - n, offsets[-1])]).reshape(rows, c)
+    k = np.arange(rows)[:, None]
+    return (k + np.maximum.accumulate(d - k, axis=0)).ravel()[:n]
+
+
+SCHEDULERS = {cls.name: cls for cls in (PlateauScheduler, SM2Scheduler, FSRSScheduler)}
+
+
+def get_scheduler(name: str = "plateau", desired_retention: float = 0.9) -> Scheduler:
+    """Scheduler by name ("plateau", "sm2" or "fsrs")."""
+    key = (name or "plateau").strip().lower().replace("-", "")
+    if key not in SCHEDULERS:
+        raise ValueError(f"Agendador desconhecido: {name!r} (use {', '.join(SCHEDULERS)}).")
+    if key == FSRSScheduler.name:
+        return FSRSScheduler(desired_retention)
+    return SCHEDULERS[key]()
@@ -0,0 +1,93 @@
+"""Estado da sessão compartilhado pelas páginas do app (st.session_state).
+
+O app renderiza só a página escolhida em `current_tab` (ver views/). Aqui
+ficam os valores padrão da sessão, a navegação entre páginas e o que mais
+de uma página usa (hierarquia de disciplinas, tempo de resposta).
+"""
+import time
+
+import streamlit as st
+
+from db import get_aula_hierarchy
+
+# (ícone, nome) na ordem do menu; o nome é o valor de current_tab.
+PAGINAS = [
+    ("📥", "Importar JSON"),
+    ("🧠", "Quiz"),
+    ("📕", "Caderno de Erros"),
+    ("⏰", "Revisão"),
+    ("🗃️", "Banco"),
+    ("📈", "Desempenho"),
+]
+PAGINA_PADRAO = "Quiz"
+
+_PADROES = {
+    "current_tab": PAGINA_PADRAO,
+    "quiz_idx": 0,
+    "quiz_last_qid": None,
+    "err_idx": 0,
+    "rev_idx": 0,
+}
+
+# Widgets cujo valor sobrevive à troca de página. O Streamlit descarta o
+# estado dos widgets que não foram desenhados no rerun; reatribuir a chave
+# no início de cada execução mantém o valor.
+WIDGETS_PERSISTENTES = (
+    "quiz_disc", "quiz_aula",
+    "err_disc", "err_aula",
+    "rev_disc", "rev_aula",
+    "banco_disc", "banco_aula", "banco_status", "banco_termo",
+    "perf_start_date", "perf_end_date",
+)
+
+
+def iniciar():
+    """Valores padrão da sessão; chamar antes do menu."""
+    for chave, valor in _PADROES.items():
+        if chave not in st.session_state:
+            st.session_state[chave] = valor
+    for chave in WIDGETS_PERSISTENTES:
+        if chave in st.session_state:
+            st.session_state[chave] = st.session_state[chave]
+    if st.session_state.current_tab not in nomes_paginas():
+        st.session_state.current_tab = PAGINA_PADRAO
+
+
+def nomes_paginas() -> list[str]:
+    return [nome for _, nome in PAGINAS]
+
+
+def rotulo(nome: str) -> str:
+    """Nome da página com o ícone, como aparece no menu."""
+    return next((f"{icone} {n}" for icone, n in PAGINAS if n == nome), nome)
+
+
+def pagina_atual() -> str:
+    return st.session_state.current_tab
+
+
+def hierarquia_aulas() -> dict:
+    """Disciplinas -> aulas -> contagem por status (consulta em cache no db)."""
+    return get_aula_hierarchy()
+
+
+def aulas_da_disciplina(hierarquia, disciplina):
+    """Aulas (ordenadas) de uma disciplina; vazio para 'Todas'."""
+    if not disciplina or disciplina == "Todas":
+        return []
+    return list(hierarquia.get(disciplina, {}))
+
+
+def marcar_exibicao(aba, qid):
+    """Guarda quando a questão `qid` apareceu na aba (para medir o tempo de resposta)."""
+    chave = f"{aba}_exibida"
+    if st.session_state.get(chave, (None, 0))[0] != qid:
+        st.session_state[chave] = (qid, time.monotonic())
+
+
+def tempo_de_resposta(aba, qid):
+    """Segundos desde que `qid` apareceu na aba, ou None."""
+    exibida = st.session_state.get(f"{aba}_exibida")
+    if exibida and exibida[0] == qid:
+        return time.monotonic() - exibida[1]
+    return None
@@ -0,0 +1,36 @@
+"""Testes rodam contra um SQLite temporário (sem DATABASE_URL/secrets)."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+
+
+def questao(i: int, **campos) -> dict:
+    """Questão válida para importar; `campos` sobrescreve os padrões."""
+    item = {
+        "numero": str(i),
+        "disciplina": "Direito",
+        "aula": "Aula 01",
+        "enunciado": f"Enunciado da questão número {i} sobre um tema distinto {i * 7919}",
+        "alternativas": [f"A) alternativa {i}", f"B) outra {i}", f"C) mais uma {i}"],
+        "resposta_correta": "A",
+    }
+    item.update(campos)
+    return item
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    """db.py apontando para um questoes.db novo, já migrado."""
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    monkeypatch.setattr(db, "DB_NAME", str(tmp_path / "questoes.db"))
+    monkeypatch.setattr(db, "_scheduler", None)
+    db.reload_backend()
+    db.apply_migrations()
+    yield db
+    db.close_pool()
+    db.clear_cache()
@@ -0,0 +1,75 @@
+import numpy as np
+
+import dedup
+from conftest import questao
+
+LONGO = (
+    "Considerando a Constituição Federal, julgue o item a seguir acerca dos direitos e garantias "
+    "fundamentais, da organização do Estado e do controle de constitucionalidade das leis"
+)
+
+
+def test_normalize_ignores_accents_case_and_punctuation():
+    a = dedup.normalize("Qual é a  CAPITAL?", ["A) Brasília", "B) São Paulo"])
+    b = dedup.normalize("qual e a capital", '["A Brasilia", "B Sao Paulo."]')
+    assert a == b == "qual e a capital a brasilia b sao paulo"
+    assert dedup.content_hash(a) == dedup.content_hash(b)
+    assert dedup.content_hash(a) != dedup.content_hash(a + " c")
+
+
+def test_minhash_estimates_similarity():
+    parecido = LONGO.replace("julgue", "analise")
+    outro = "Em relação ao Direito Penal, a legítima defesa exclui a ilicitude do fato típico praticado"
+    hashes, sigs, keys = dedup.signatures([(LONGO, []), (parecido, []), (outro, []), (LONGO, [])])
+    assert hashes[0] == hashes[3] and hashes[0] != hashes[1]
+    sim = dedup.similarity(sigs[[0, 0, 0]], sigs[[3, 1, 2]])
+    assert sim[0] == 1.0
+    assert sim[1] >= dedup.DEFAULT_THRESHOLD
+    assert sim[2] < 0.3
+    # Parecidas caem na mesma faixa LSH; textos diferentes não.
+    assert np.intersect1d(keys[0], keys[1]).size > 0
+    assert np.intersect1d(keys[0], keys[2]).size == 0
+    assert np.array_equal(dedup.decode(dedup.encode(sigs[1])), sigs[1])
+
+
+def test_empty_text_signature():
+    [vazia] = dedup.minhash([""])
+    assert (vazia == np.iinfo(np.uint32).max).all()
+
+
+def test_import_skips_duplicates_and_flags_similar(banco):
+    alternativas = questao(1)["alternativas"]
+    assert banco.import_questions([questao(1, enunciado=LONGO), questao(2)]) == 2
+    avisos = []
+    itens = [
+        # Mesmo conteúdo normalizado da questão 1.
+        questao(3, enunciado=LONGO.upper() + "!", alternativas=[a.upper() for a in alternativas]),
+        questao(4, enunciado=LONGO.replace("julgue", "analise"), alternativas=alternativas),
+        questao(5),
+        questao(5, numero="5b"),  # repetida dentro da mesma importação
+    ]
+    inseridas = banco.import_questions(itens, on_duplicate=lambda item, tipo, qid: avisos.append((item["numero"], tipo, qid)))
+    assert inseridas == 2
+    assert banco.count_questions() == 4
+    ids = {e: qid for qid, e in banco.get_all_questions(columns=["id", "enunciado"])}
+    id_parecida, id_5 = ids[itens[1]["enunciado"]], ids[itens[2]["enunciado"]]
+    assert sorted(avisos) == [("3", "duplicada", ids[LONGO]), ("4", "similar", ids[LONGO]), ("5b", "duplicada", id_5)]
+    [(questao_id, similar_a, similaridade)] = banco.get_similar_questions()
+    assert (questao_id, similar_a) == (id_parecida, ids[LONGO])
+    assert similaridade >= dedup.DEFAULT_THRESHOLD
+
+
+def test_deleted_question_is_not_a_candidate(banco):
+    alternativas = questao(1)["alternativas"]
+    banco.import_questions([questao(1, enunciado=LONGO, alternativas=alternativas)])
+    [(qid,)] = banco.get_all_questions(columns=["id"])
+    # Sem PRAGMA foreign_keys, assinatura e chaves LSH da excluída ficam no índice.
+    with banco.get_backend().connection() as conn:
+        conn.execute("DELETE FROM questoes WHERE id = ?", (qid,))
+        conn.commit()
+    banco.clear_cache()
+    avisos = []
+    parecida = questao(2, enunciado=LONGO.replace("julgue", "analise"), alternativas=alternativas)
+    assert banco.import_questions([parecida], on_duplicate=lambda *aviso: avisos.append(aviso)) == 1
+    assert avisos == []
+    assert banco.get_similar_questions() == []
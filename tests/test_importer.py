@@ -0,0 +1,80 @@
+import io
+import json
+
+import pytest
+
+import importer
+from conftest import questao
+
+
+def _rejeitados(texto: str) -> list[dict]:
+    return [json.loads(linha) for linha in texto.splitlines()]
+
+
+@pytest.fixture
+def blocos_pequenos(monkeypatch):
+    # Itens e separadores caem nas fronteiras entre leituras.
+    monkeypatch.setattr(importer, "READ_CHUNK_CHARS", 7)
+
+
+def test_json_array_in_small_chunks(blocos_pequenos):
+    itens = [{"a": "x,]y"}, {"b": [1, {"c": '"}'}]}, 3, None]
+    texto = json.dumps(itens)
+    assert list(importer.iter_items(io.StringIO(texto))) == list(enumerate(itens, start=1))
+
+
+def test_json_array_skips_malformed_element(blocos_pequenos):
+    texto = '[{"a": 1}, {"a": 2,, "b": 3}, tru, {"a": 4}]'
+    itens = list(importer.iter_items(io.StringIO(texto)))
+    assert [p for p, _ in itens] == [1, 2, 3, 4]
+    assert itens[0][1] == {"a": 1} and itens[3][1] == {"a": 4}
+    assert isinstance(itens[1][1], json.JSONDecodeError)
+    assert itens[1][1].doc.strip() == '{"a": 2,, "b": 3}'
+    assert isinstance(itens[2][1], json.JSONDecodeError)
+
+
+def test_json_array_without_closing_bracket_raises():
+    with pytest.raises(ValueError):
+        list(importer.iter_items(io.StringIO('[{"a": 1}, {"b": ')))
+
+
+def test_json_lines_yields_line_numbers_and_errors():
+    texto = '{"a": 1}\n\n{quebrado\n{"a": 3}\n'
+    itens = list(importer.iter_items(io.StringIO(texto)))
+    assert [p for p, _ in itens] == [1, 3, 4]
+    assert isinstance(itens[1][1], json.JSONDecodeError)
+
+
+def test_import_stream_writes_rejects(banco):
+    itens = [questao(1), questao(2, enunciado=""), questao(3)]
+    texto = json.dumps(itens)[:-1] + ', {"disciplina": "X",, }]'
+    rejeitados = io.StringIO()
+    progresso = []
+    resultado = importer.import_stream(
+        io.StringIO(texto), batch_size=2, rejects=rejeitados, progress=lambda i, r: progresso.append((i, r))
+    )
+    assert (resultado.importadas, resultado.rejeitadas) == (2, 2)
+    assert banco.count_questions() == 2
+    assert progresso[-1][0] == 2
+    linhas = _rejeitados(rejeitados.getvalue())
+    assert [linha["posicao"] for linha in linhas] == [2, 4]
+    assert linhas[0]["item"]["enunciado"] == ""
+    assert linhas[1]["item"] == '{"disciplina": "X",, }'
+
+
+def test_import_stream_json_lines(banco):
+    texto = "\n".join([json.dumps(questao(1)), "{nao e json", json.dumps(questao(2))])
+    rejeitados = io.StringIO()
+    resultado = importer.import_stream(io.StringIO(texto), rejects=rejeitados)
+    assert (resultado.importadas, resultado.rejeitadas) == (2, 1)
+    [linha] = _rejeitados(rejeitados.getvalue())
+    assert (linha["posicao"], linha["item"]) == (2, "{nao e json")
+
+
+def test_truncated_file_imports_nothing(banco):
+    texto = json.dumps([questao(i) for i in range(5)])[:-40]
+    with pytest.raises(ValueError):
+        importer.import_stream(io.StringIO(texto), batch_size=2)
+    # insert_questions é uma transação só: os lotes anteriores voltam atrás.
+    banco.clear_cache()
+    assert banco.count_questions() == 0
@@ -0,0 +1,77 @@
+import sqlite3
+from datetime import date, timedelta
+
+import db
+from conftest import questao
+
+VERSOES = list(range(1, 13))
+
+
+def _versoes() -> list[int]:
+    with db.get_backend().connection() as conn:
+        return [v for (v,) in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+
+
+def test_fresh_database_is_at_latest_version(banco):
+    assert [v for v, _, _ in banco.get_backend()._migrations()] == VERSOES
+    assert _versoes() == VERSOES
+    assert banco.apply_migrations() == []
+
+
+def test_new_process_applies_nothing(banco):
+    banco.reload_backend()
+    assert banco.apply_migrations() == []
+    assert _versoes() == VERSOES
+
+
+def test_steps_are_idempotent(banco):
+    banco.insert_question(questao(1))
+    backend = banco.get_backend()
+    for _, _, step in backend._migrations():
+        with backend.connection() as conn:
+            step(conn)
+            conn.commit()
+    banco.clear_cache()
+    assert banco.count_questions() == 1
+    assert _versoes() == VERSOES
+
+
+def test_legacy_database_is_upgraded(tmp_path, monkeypatch):
+    # Banco da versão original: sem schema_version nem revisoes_feitas.
+    caminho = tmp_path / "antigo.db"
+    with sqlite3.connect(caminho) as conn:
+        conn.execute(
+            """
+            CREATE TABLE questoes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, numero TEXT, tipo TEXT, disciplina TEXT,
+                aula TEXT, origem_pdf TEXT, enunciado TEXT, alternativas TEXT, resposta_correta TEXT,
+                comentario TEXT, status TEXT DEFAULT 'nao_respondida', data_resposta TEXT, proxima_revisao TEXT
+            )
+            """
+        )
+        conn.execute(
+            "INSERT INTO questoes (disciplina, aula, enunciado, alternativas, resposta_correta, status, data_resposta)"
+            " VALUES ('Direito', 'Aula 01', 'Enunciado antigo', ?, 'B', 'revisado', '2024-01-02')",
+            ('["A) um", "B) dois"]',),
+        )
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    monkeypatch.setattr(db, "DB_NAME", str(caminho))
+    db.reload_backend()
+    try:
+        assert [v for v, _, _ in db.apply_migrations()] == VERSOES
+        [(qid,)] = db.get_all_questions(columns=["id"])
+        status, revs, proxima, letras = db.get_question(qid, columns=["status", "revisoes_feitas", "proxima_revisao", "alternativas_letras"])
+        assert (status, revs, letras) == ("acerto", 1, "AB")
+        assert proxima == (date.today() + timedelta(days=db.compute_next_interval_days(1))).isoformat()
+    finally:
+        db.close_pool()
+        db.clear_cache()
+
+
+def test_migrate_revisado_para_acerto(banco):
+    banco.insert_question(questao(1))
+    [(qid,)] = banco.get_all_questions(columns=["id"])
+    banco.update_question_status(qid, "revisado", None, 0)
+    assert banco.migrate_revisado_para_acerto() == 1
+    assert banco.get_question(qid, columns=["status", "revisoes_feitas"]) == ("acerto", 1)
+    assert banco.migrate_revisado_para_acerto() == 0
@@ -0,0 +1,170 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import db
+from conftest import questao
+from scheduler import PlateauScheduler
+
+
+def _nova(banco) -> int:
+    banco.insert_question(questao(1))
+    return banco.get_all_questions(columns=["id"])[0][0]
+
+
+def _em(dias: int) -> str:
+    return (date.today() + timedelta(days=dias)).isoformat()
+
+
+def test_plateau_intervals(banco):
+    qid = _nova(banco)
+    for revisoes, dias in [(1, 1), (2, 7), (3, 15), (4, 15)]:
+        r = banco.record_answer(qid, True)
+        assert r == {"status": "acerto", "proxima_revisao": _em(dias), "revisoes_feitas": revisoes, "intervalo_dias": dias}
+    row = banco.get_question(qid, columns=["status", "data_resposta", "proxima_revisao", "revisoes_feitas"])
+    assert row == ("acerto", date.today().isoformat(), _em(15), 4)
+
+
+def test_erro_e_duvida_voltam_em_um_dia(banco):
+    qid = _nova(banco)
+    banco.record_answer(qid, True)
+    banco.record_answer(qid, True)
+    r = banco.record_answer(qid, False)
+    assert r == {"status": "erro", "proxima_revisao": _em(1), "revisoes_feitas": 2, "intervalo_dias": 1}
+    r = banco.record_answer(qid, True, marked_doubt=True)
+    assert r == {"status": "duvida", "proxima_revisao": _em(1), "revisoes_feitas": 2, "intervalo_dias": 1}
+    # O contador não voltou: o próximo acerto segue para 15 dias.
+    assert banco.record_answer(qid, True)["intervalo_dias"] == 15
+
+
+def test_respostas_simultaneas_nao_se_perdem(banco):
+    # Cada resposta é um UPDATE só: nenhum incremento se perde entre threads.
+    qid = _nova(banco)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: banco.record_answer(qid, True), range(40)))
+    assert banco.get_question(qid, columns=["revisoes_feitas"]) == (40,)
+
+
+def test_questao_inexistente(banco):
+    assert banco.record_answer(999, True) is None
+
+
+def test_resposta_invalida_cache_e_rollup(banco):
+    qid = _nova(banco)
+    assert banco.get_due_for_review(columns=["id"]) == []
+    banco.record_answer(qid, False)
+    assert banco.get_question(qid, columns=["status"]) == ("erro",)
+    assert [r[2:] for r in banco.get_daily_stats()] == [("erro", 0, 1)]
+
+
+class _Consulta:
+    """Construtor de consulta do cliente falso: qualquer encadeamento, execute() responde."""
+
+    def __init__(self, cliente, nome, params=None):
+        self.cliente, self.nome, self.params = cliente, nome, params
+
+    def __getattr__(self, _):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return self.cliente.responder(self.nome, self.params)
+
+
+class _ClienteFalso:
+    def __init__(self, rpc_existe: bool, rpc_falha: bool = False):
+        self.rpc_existe, self.rpc_falha = rpc_existe, rpc_falha
+        self.chamadas = []
+
+    def table(self, nome):
+        return _Consulta(self, nome)
+
+    def rpc(self, nome, params):
+        return _Consulta(self, nome, params)
+
+    def responder(self, nome, params):
+        self.chamadas.append(nome)
+        if nome == "record_answer":
+            if not self.rpc_existe:
+                raise RuntimeError("PGRST202: função não encontrada")
+            if params["p_id"] == 0:
+                return SimpleNamespace(data=[])
+            if self.rpc_falha:
+                raise RuntimeError("timeout")
+            return SimpleNamespace(data=[{"novo_status": "acerto", "nova_revisao": _em(1), "total_revisoes": 1}])
+        if nome == "questoes":
+            return SimpleNamespace(data=[{"id": 5, "status": "nao_respondida", "data_resposta": None, "revisoes_feitas": 0}])
+        raise RuntimeError(f"{nome} não existe")
+
+
+def _supabase(monkeypatch, cliente):
+    monkeypatch.setattr(db.SupabaseBackend, "migrate_revisado_para_acerto", lambda self: 0)
+    monkeypatch.setattr(db.SupabaseBackend, "backfill_alternativas", lambda self, batch_size: 0)
+    backend = db.SupabaseBackend("http://supabase.invalid", "chave")
+    backend._client = cliente
+    backend.migrate()
+    cliente.chamadas.clear()
+    return backend
+
+
+def test_supabase_escolhe_rpc_pela_verificacao(monkeypatch):
+    for rpc_existe, chamadas in [(True, ["record_answer"]), (False, ["questoes", "questoes"])]:
+        cliente = _ClienteFalso(rpc_existe)
+        backend = _supabase(monkeypatch, cliente)
+        r = backend.record_answer(5, True, False, PlateauScheduler())
+        assert (r["status"], r["proxima_revisao"], r["revisoes_feitas"]) == ("acerto", _em(1), 1)
+        assert cliente.chamadas == chamadas
+
+
+def test_supabase_erro_da_rpc_nao_e_engolido(monkeypatch):
+    backend = _supabase(monkeypatch, _ClienteFalso(rpc_existe=True, rpc_falha=True))
+    with pytest.raises(RuntimeError, match="timeout"):
+        backend.record_answer(5, True, False, PlateauScheduler())
+
+
+@pytest.fixture
+def log_respostas(banco, monkeypatch):
+    """Buffer de respostas novo (2 eventos) sobre o banco temporário."""
+    log = db._AnswerLog(max_size=2, max_age=60)
+    monkeypatch.setattr(db, "_answer_log", log)
+    return log
+
+
+def test_falha_do_log_nao_derruba_a_resposta(banco, log_respostas, monkeypatch):
+    qid = _nova(banco)
+    backend = banco.get_backend()
+    inserir = backend.insert_answer_events
+
+    def falha(events):
+        raise RuntimeError("banco fora do ar")
+
+    monkeypatch.setattr(backend, "insert_answer_events", falha)
+    for _ in range(3):
+        banco.record_answer(qid, True)
+        banco.log_answer(qid, "A", True)
+    assert log_respostas.pending() == 3
+    with pytest.raises(RuntimeError):
+        banco.flush_answer_log()
+    assert log_respostas.pending() == 3
+    monkeypatch.setattr(backend, "insert_answer_events", inserir)
+    assert banco.flush_answer_log() == 3
+    assert len(banco.get_answer_events()) == 3
+
+
+def test_evento_que_falha_sozinho_e_descartado(banco, log_respostas, monkeypatch):
+    qid = _nova(banco)
+    inserir = banco.get_backend().insert_answer_events
+
+    def rejeita_excluida(events):
+        if any(e[0] == 999 for e in events):
+            raise RuntimeError("FOREIGN KEY constraint failed")
+        inserir(events)
+
+    monkeypatch.setattr(banco.get_backend(), "insert_answer_events", rejeita_excluida)
+    banco.log_answer(999, "A", True)
+    banco.log_answer(qid, "B", False)
+    assert log_respostas.pending() == 0
+    banco.log_answer(qid, "C", True)
+    assert banco.flush_answer_log() == 1
+    assert [(e[0], e[3]) for e in banco.get_answer_events()] == [(qid, "B"), (qid, "C")]
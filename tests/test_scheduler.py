@@ -0,0 +1,92 @@
+import pytest
+
+import scheduler as srs
+from conftest import questao
+from scheduler import NOTA_ACERTO, NOTA_DUVIDA, NOTA_ERRO
+
+
+def _respostas(agendador, notas, elapsed=None):
+    """Estados sucessivos respondendo `notas` em sequência."""
+    estado, estados = {}, []
+    for nota in notas:
+        estado = agendador.review_one(estado, nota, elapsed)
+        estados.append(estado)
+    return estados
+
+
+def test_grade_for():
+    assert srs.grade_for(False) == srs.grade_for(False, True) == NOTA_ERRO
+    assert srs.grade_for(True, True) == NOTA_DUVIDA
+    assert srs.grade_for(True) == NOTA_ACERTO
+
+
+def test_sm2_intervals_and_ef():
+    estados = _respostas(srs.SM2Scheduler(), [NOTA_ACERTO] * 3)
+    assert [e["intervalo"] for e in estados] == [1, 6, 15]
+    assert all(e["facilidade"] == pytest.approx(2.5) for e in estados)
+    assert [e["revisoes_feitas"] for e in estados] == [1, 2, 3]
+
+
+def test_sm2_doubt_lowers_ef_and_error_resets():
+    agendador = srs.SM2Scheduler()
+    [_, _, duvida, erro] = _respostas(agendador, [NOTA_ACERTO, NOTA_ACERTO, NOTA_DUVIDA, NOTA_ERRO])
+    assert duvida["facilidade"] == pytest.approx(2.5 - 0.14)
+    assert duvida["intervalo"] == 15  # o intervalo usa o EF anterior à resposta
+    assert (erro["intervalo"], erro["facilidade"], erro["revisoes_feitas"]) == (1, duvida["facilidade"], 2)
+    # O EF nunca cai abaixo do mínimo.
+    piso = agendador.review_one({"facilidade": 1.35, "intervalo": 10}, NOTA_DUVIDA)
+    assert piso["facilidade"] == agendador.EF_MINIMO
+
+
+def test_fsrs_first_answer():
+    agendador = srs.FSRSScheduler()
+    w = agendador.W
+    bom = agendador.review_one({}, NOTA_ACERTO)
+    assert bom["estabilidade"] == pytest.approx(w[2])
+    assert bom["dificuldade"] == pytest.approx(w[4])
+    assert bom["intervalo"] == round(w[2])  # retenção 0.9: intervalo = estabilidade
+    erro = agendador.review_one({}, NOTA_ERRO)
+    assert (erro["estabilidade"], erro["intervalo"]) == (pytest.approx(w[0]), 1)
+
+
+def test_fsrs_review_updates_stability_and_difficulty():
+    agendador = srs.FSRSScheduler()
+    primeiro = agendador.review_one({}, NOTA_ACERTO)
+    bom = agendador.review_one(primeiro, NOTA_ACERTO, elapsed=primeiro["intervalo"])
+    erro = agendador.review_one(primeiro, NOTA_ERRO, elapsed=primeiro["intervalo"])
+    assert bom["estabilidade"] > primeiro["estabilidade"]
+    assert bom["intervalo"] > primeiro["intervalo"]
+    assert erro["estabilidade"] < primeiro["estabilidade"]
+    assert erro["dificuldade"] > primeiro["dificuldade"]
+    # Retenção maior, intervalos menores.
+    exigente = srs.FSRSScheduler(desired_retention=0.95).review_one(primeiro, NOTA_ACERTO, elapsed=primeiro["intervalo"])
+    assert exigente["intervalo"] < bom["intervalo"]
+
+
+def test_review_is_vectorized():
+    notas = [NOTA_ACERTO, NOTA_DUVIDA, NOTA_ERRO]
+    for agendador in (srs.PlateauScheduler(), srs.SM2Scheduler(), srs.FSRSScheduler()):
+        lote = agendador.review({}, notas)
+        for i, nota in enumerate(notas):
+            um = agendador.review_one({}, nota)
+            assert lote["intervalo"][i] == um["intervalo"]
+            assert lote["revisoes_feitas"][i] == um["revisoes_feitas"]
+
+
+def test_get_scheduler():
+    assert isinstance(srs.get_scheduler("SM-2"), srs.SM2Scheduler)
+    assert srs.get_scheduler("fsrs", desired_retention=0.8).desired_retention == 0.8
+    assert isinstance(srs.get_scheduler(""), srs.PlateauScheduler)
+    with pytest.raises(ValueError):
+        srs.get_scheduler("leitner")
+    with pytest.raises(ValueError):
+        srs.FSRSScheduler(desired_retention=1)
+
+
+def test_record_answer_saves_scheduler_state(banco, monkeypatch):
+    monkeypatch.setattr(banco, "_scheduler", srs.SM2Scheduler())
+    banco.insert_question(questao(1))
+    [(qid,)] = banco.get_all_questions(columns=["id"])
+    assert [banco.record_answer(qid, True)["intervalo_dias"] for _ in range(3)] == [1, 6, 15]
+    [(_, status, _, revs, intervalo, facilidade, *fsrs)] = banco.get_backend().get_schedule_states()
+    assert (status, revs, intervalo, facilidade, fsrs) == ("acerto", 3, 15, 2.5, [None, None])
@@ -0,0 +1,52 @@
+from collections import Counter
+from datetime import date, timedelta
+
+import numpy as np
+
+import scheduler as srs
+from conftest import questao
+
+
+def _guloso(offsets, capacidade):
+    """Referência: cada revisão vai para o primeiro dia, a partir do vencimento, com vaga."""
+    ocupados, dias = Counter(), []
+    for dia in offsets:
+        while ocupados[dia] >= capacidade:
+            dia += 1
+        ocupados[dia] += 1
+        dias.append(dia)
+    return dias
+
+
+def test_smooth_load_matches_greedy():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        offsets = np.sort(rng.integers(0, 30, rng.integers(1, 120)))
+        capacidade = int(rng.integers(1, 12))
+        dias = srs.smooth_load(offsets, capacidade)
+        assert dias.tolist() == _guloso(offsets.tolist(), capacidade)
+        assert (dias >= offsets).all()
+        assert max(Counter(dias.tolist()).values()) <= capacidade
+
+
+def test_smooth_load_edge_cases():
+    assert srs.smooth_load([], 5).tolist() == []
+    assert srs.smooth_load([0, 0, 0], 0).tolist() == [0, 1, 2]
+    assert srs.smooth_load([3, 9], 1).tolist() == [3, 9]
+
+
+def _em(dias: int) -> str:
+    return (date.today() + timedelta(days=dias)).isoformat()
+
+
+def test_smooth_backlog(banco):
+    for i in range(5):
+        banco.insert_question(questao(i))
+    ids = [qid for (qid,) in banco.get_all_questions(columns=["id"])]
+    # Três atrasadas, uma para hoje e uma longe o bastante para não mudar.
+    for qid, dias in zip(ids, [-3, -1, -1, 0, 10]):
+        banco.update_question_status(qid, "acerto", _em(dias), 1)
+    assert banco.smooth_backlog(capacidade=2) == {"reagendadas": 4, "ultimo_dia": _em(10)}
+    datas = [banco.get_question(qid, columns=["proxima_revisao"])[0] for qid in ids]
+    assert datas == [_em(0), _em(0), _em(1), _em(1), _em(10)]
+    assert banco.smooth_backlog(capacidade=2)["reagendadas"] == 0
@@ -0,0 +1,22 @@
+"""Páginas do app: cada módulo tem um render() que desenha uma página.
+
+app.py chama render(nome) só para a página em st.session_state.current_tab;
+as demais não rodam (nem consultam o banco) naquele rerun. Os módulos são
+importados na primeira visita, então o Plotly do Desempenho só é carregado
+quando a página é aberta.
+"""
+import importlib
+
+# Nome da página (session.PAGINAS) -> módulo.
+ROTAS = {
+    "Importar JSON": "views.importar",
+    "Quiz": "views.quiz",
+    "Caderno de Erros": "views.erros",
+    "Revisão": "views.revisao",
+    "Banco": "views.banco",
+    "Desempenho": "views.desempenho",
+}
+
+
+def render(nome: str):
+    importlib.import_module(ROTAS[nome]).render()
@@ -0,0 +1,216 @@
+"""Página Banco: tabela paginada com filtros, busca e exportações."""
+import functools
+import json
+import math
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from db import count_questions, get_questions_by_ids, get_questions_page, search_questions
+from exports import FORMATOS, export_bytes, file_name
+from session import hierarquia_aulas
+
+# Formatação / Cores por status
+STATUS_STYLE = {
+    "acerto": "background-color:#d1fae5;color:#065f46;font-weight:600;",
+    "erro": "background-color:#fee2e2;color:#991b1b;font-weight:600;",
+    "duvida": "background-color:#fef3c7;color:#92400e;font-weight:600;",
+    "revisado": "background-color:#e0e7ff;color:#3730a3;font-weight:600;",
+    "nao_respondida": "background-color:#f3f4f6;color:#374151;"
+}
+VENCIDA_STYLE = "border-left:4px solid #dc2626;"
+# Tabela simples: o status ganha um ícone no lugar da cor de fundo.
+STATUS_ICONE = {
+    "acerto": "🟢",
+    "erro": "🔴",
+    "duvida": "🟡",
+    "revisado": "🔵",
+    "nao_respondida": "⚪",
+}
+_COLUNAS_SIMPLES = {
+    "⏰": st.column_config.CheckboxColumn("⏰", help="Revisão vencida ou hoje", width="small"),
+    "ID": st.column_config.NumberColumn("ID", format="%d"),
+    "Dias p/ Revisão": st.column_config.NumberColumn("Dias p/ Revisão", format="%d"),
+}
+
+
+def _estilos(df, vencida):
+    """CSS de cada célula da página: cor do status + borda se a revisão venceu.
+
+    Calculado por coluna (uma máscara para a página inteira) em vez de
+    linha a linha; todas as colunas de uma linha recebem o mesmo estilo.
+    """
+    css = df["Status"].map(STATUS_STYLE).fillna("").to_numpy(dtype=object)
+    css = css + np.where(vencida, VENCIDA_STYLE, "")
+    return pd.DataFrame({col: css for col in df.columns}, index=df.index)
+
+
+def _tabela_simples(df, vencida):
+    df = df.assign(Status=(df["Status"].map(STATUS_ICONE).fillna("") + " " + df["Status"].fillna("")).str.strip())
+    df.insert(0, "⏰", vencida)
+    return df
+
+
+def render():
+    hierarquia = hierarquia_aulas()
+    disciplinas = list(hierarquia)
+    st.header("🔍 Banco de Questões — visão avançada")
+    total_banco = count_questions()
+    if not total_banco:
+        st.info("Banco vazio.")
+    else:
+        # Estado inicial dos filtros (antes dos widgets)
+        if "banco_disc" not in st.session_state:
+            st.session_state.banco_disc = []
+        if "banco_aula" not in st.session_state:
+            st.session_state.banco_aula = []
+        if "banco_status" not in st.session_state:
+            st.session_state.banco_status = []
+        if "banco_termo" not in st.session_state:
+            st.session_state.banco_termo = ""
+        if "banco_page" not in st.session_state:
+            st.session_state.banco_page = 1
+
+        # ----------------------
+        with st.expander("🎯 Filtros", expanded=True):
+            # Callback para limpar filtros sem st.rerun explícito
+            def _clear_banco_filters():
+                st.session_state.banco_disc = []
+                st.session_state.banco_aula = []
+                st.session_state.banco_status = []
+                st.session_state.banco_termo = ""
+                st.session_state.banco_page = 1
+
+            # Opções dos filtros vêm da hierarquia agregada, não da tabela inteira.
+            col_f1, col_f2, col_f3, col_f4 = st.columns(4)
+            selected_disc = col_f1.multiselect("Disciplina", disciplinas, key="banco_disc")
+            aulas_all = sorted({a for aulas_d in hierarquia.values() for a in aulas_d})
+            selected_aula = col_f2.multiselect("Aula", aulas_all, key="banco_aula")
+            status_all = sorted({s for aulas_d in hierarquia.values() for por_status in aulas_d.values() for s in por_status if s})
+            selected_status = col_f3.multiselect("Status", status_all, key="banco_status")
+            termo_busca = col_f4.text_input("Buscar texto (enunciado/comentário)", key="banco_termo")
+
+            # Linha de chips + limpar
+            col_cf1, col_cf2 = st.columns([3,1])
+            with col_cf1:
+                chips = []
+                if selected_disc:
+                    chips.append("Disciplinas: " + ", ".join(selected_disc))
+                if selected_aula:
+                    chips.append("Aulas: " + ", ".join(selected_aula))
+                if selected_status:
+                    chips.append("Status: " + ", ".join(selected_status))
+                if termo_busca.strip():
+                    chips.append(f"Busca: '{termo_busca.strip()}'")
+                if chips:
+                    st.caption("Filtros:")
+                    st.write(" | ".join(chips))
+            with col_cf2:
+                st.button("Limpar filtros", on_click=_clear_banco_filters)
+
+        # Filtros aplicados no banco (disciplina/aula/status/texto)
+        banco_filtros = {
+            "disciplina": selected_disc,
+            "aula": selected_aula,
+            "status": selected_status,
+            "texto": termo_busca.strip(),
+        }
+
+        mostrar_enunciado = st.toggle("Mostrar coluna de enunciado completa", value=False)
+        mostrar_comentario = st.toggle("Mostrar comentários", value=False)
+        tabela_simples = st.toggle("Tabela simples (sem cores, mais rápida)", value=False)
+
+        # Paginação por chave: banco_cursores[p-1] é o último id antes da página p.
+        total_reg = count_questions(banco_filtros)
+        colp1, colp2, colp3 = st.columns([2,1,1])
+        with colp1:
+            page_size = st.selectbox("Itens por página", [25, 50, 100], index=0)
+        total_pages = max(1, math.ceil(total_reg / page_size))
+        # Filtros ou tamanho de página novos: volta para a primeira página
+        banco_fp = (json.dumps(banco_filtros, sort_keys=True), page_size)
+        if st.session_state.get("banco_fp") != banco_fp:
+            st.session_state.banco_fp = banco_fp
+            st.session_state.banco_page = 1
+            st.session_state.banco_cursores = [None]
+        st.session_state.banco_page = min(st.session_state.banco_page, len(st.session_state.banco_cursores), total_pages)
+        with colp2:
+            if st.button("◀️ Página anterior", disabled=st.session_state.banco_page <= 1):
+                st.session_state.banco_page = max(1, st.session_state.banco_page - 1)
+                st.rerun()
+
+        # Colunas lidas, já na ordem de exibição (id primeiro: é o cursor);
+        # dias_revisao vem calculado na consulta (db.COMPUTED_COLUMNS).
+        page_cols = ["id","disciplina","aula","status","revisoes_feitas","data_resposta","proxima_revisao","dias_revisao","alternativas_preview"]
+        if mostrar_enunciado:
+            page_cols.insert(3, "enunciado")
+        if mostrar_comentario:
+            page_cols.append("comentario")
+        if banco_filtros["texto"]:
+            # Com busca: mais relevantes primeiro (índice de busca textual), página por offset.
+            ids_page = search_questions(
+                banco_filtros["texto"], banco_filtros, limit=page_size, offset=(st.session_state.banco_page - 1) * page_size
+            )
+            rows_page = get_questions_by_ids(ids_page, columns=page_cols)
+        else:
+            after_id = st.session_state.banco_cursores[st.session_state.banco_page - 1]
+            rows_page = get_questions_page(banco_filtros, after_id=after_id, limit=page_size, columns=page_cols)
+        df_view = pd.DataFrame(rows_page, columns=page_cols)
+
+        with colp3:
+            if st.button("Próxima página ▶️", disabled=st.session_state.banco_page >= total_pages or not rows_page):
+                cursores = st.session_state.banco_cursores[:st.session_state.banco_page]
+                cursores.append(rows_page[-1][0])
+                st.session_state.banco_cursores = cursores
+                st.session_state.banco_page += 1
+                st.rerun()
+
+        # ----------------------
+        df_view["dias_revisao"] = df_view["dias_revisao"].astype("Int64")
+
+        # Renomear colunas para ficar amigável
+        rename_map = {
+            "id": "ID",
+            "disciplina": "Disciplina",
+            "aula": "Aula",
+            "status": "Status",
+            "revisoes_feitas": "Revisões",
+            "data_resposta": "Data Resposta",
+            "proxima_revisao": "Próx. Revisão",
+            "dias_revisao": "Dias p/ Revisão",
+            "alternativas_preview": "Alternativas (preview)",
+            "enunciado": "Enunciado",
+            "comentario": "Comentário"
+        }
+        df_page = df_view.rename(columns=rename_map)
+
+        st.subheader(f"Total filtrado: {total_reg} / {total_banco}")
+        st.caption(f"Página {st.session_state.banco_page} de {total_pages} — exibindo {len(df_page)} de {total_reg}")
+        # Cores só para as linhas da página; a tabela simples dispensa o Styler.
+        vencida = (df_page["Dias p/ Revisão"] <= 0).fillna(False).to_numpy(dtype=bool)
+        if tabela_simples:
+            st.dataframe(_tabela_simples(df_page, vencida), width="stretch", column_config=_COLUNAS_SIMPLES)
+        else:
+            st.dataframe(df_page.style.apply(lambda _: _estilos(df_page, vencida), axis=None), width="stretch")
+
+        # ----------------------
+        # Exportações
+        # ----------------------
+        st.markdown("### 📤 Exportar")
+        # Cada arquivo só é gerado no clique (em outra thread, sem travar a
+        # página) e fica em cache por filtro até a próxima gravação.
+        col_exports = st.columns(len(FORMATOS))
+        for col_e, (formato, info) in zip(col_exports, FORMATOS.items()):
+            with col_e:
+                st.download_button(
+                    f"{info.rotulo} filtrado",
+                    functools.partial(export_bytes, formato, dict(banco_filtros)),
+                    file_name=file_name(formato),
+                    mime=info.mime,
+                    key=f"banco_export_{formato}",
+                )
+
+        if tabela_simples:
+            st.caption("⏰ marcado: revisão vencida ou hoje.")
+        else:
+            st.caption("Linhas com borda vermelha: revisão vencida ou hoje.")
@@ -0,0 +1,15 @@
+"""Utilidades das páginas de resposta (Quiz, Caderno de Erros, Revisão)."""
+from db import COLUMNS
+from models import SEM_LETRA, extrair_letra
+
+# Colunas das abas de resposta: a linha completa mais as letras das alternativas.
+QUESTAO_COLUMNS = COLUMNS + ["alternativas_letras"]
+
+
+def letra_escolhida(choice, alternativas, letras):
+    """Letra da alternativa escolhida, pela coluna alternativas_letras
+    (gravada na importação); extrair_letra só se a coluna não bate."""
+    if letras and len(letras) == len(alternativas) and choice in alternativas:
+        letra = letras[alternativas.index(choice)]
+        return None if letra == SEM_LETRA else letra
+    return extrair_letra(choice)
@@ -0,0 +1,361 @@
+"""Página Desempenho: métricas e gráficos do rollup estatisticas_diarias.
+
+Cada painel (agregados, figura Plotly e arquivos de download) fica em cache
+por filtro (período + disciplinas) e pela geração das tabelas que lê
+(db.get_generation), até vencer o TTL do cache de consultas. Um rerun sem
+mudança de filtro nem gravação nova desenha as figuras prontas, sem refazer
+o Plotly nem os to_csv/to_json.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from db import ESTATISTICAS_COLUMNS, get_answer_daily_counts, get_cache_ttl, get_daily_stats, get_generation
+
+# Painéis prontos mantidos em memória (painel + filtro), para todas as sessões.
+PAINEIS_CACHE_ENTRIES = 64
+
+# cores fixas (erro vermelho, duvida azul claro) e ordem explícita
+STATUS_COLOR_MAP = {
+    "acerto": "#2563eb",
+    "erro": "#ef4444",
+    "duvida": "#60a5fa",
+    "revisado": "#6366f1",
+}
+STATUS_ORDER = ["acerto", "erro", "duvida", "revisado"]
+
+_paineis: OrderedDict = OrderedDict()  # (painel, filtro, gerações) -> (expira_em, valor)
+_lock = threading.Lock()
+
+
+def _painel(nome, filtro, tabelas, montar):
+    """Resultado de montar() para o painel `nome`, refeito só quando muda o
+    filtro ou a geração de `tabelas`.
+
+    A geração só conta gravações deste processo; o que outro processo
+    gravou aparece quando a entrada vence (mesmo TTL do cache de consultas).
+    """
+    chave = (nome, filtro, tuple(get_generation(t) for t in tabelas))
+    with _lock:
+        entrada = _paineis.get(chave)
+        if entrada is not None and time.monotonic() < entrada[0]:
+            _paineis.move_to_end(chave)
+            return entrada[1]
+    valor = montar()
+    ttl = get_cache_ttl()
+    if ttl <= 0:
+        return valor
+    with _lock:
+        _paineis[chave] = (time.monotonic() + ttl, valor)
+        _paineis.move_to_end(chave)
+        while len(_paineis) > PAINEIS_CACHE_ENTRIES:
+            _paineis.popitem(last=False)
+    return valor
+
+
+def _barras(df, x, y, **layout):
+    fig = px.bar(df, x=x, y=y, text=y, title=None)
+    fig.update_layout(margin=dict(l=10, r=10, t=10, b=10), **layout)
+    fig.update_traces(textposition="outside")
+    return fig
+
+
+def _dados(stats):
+    df = pd.DataFrame(stats, columns=ESTATISTICAS_COLUMNS)
+    df["dia"] = pd.to_datetime(df["dia"], errors="coerce", format="ISO8601")  # '' (não respondida) -> NaT
+    return df
+
+
+def _resumo(df, disciplina_sel, start_date, end_date):
+    # Para o total: só filtra por disciplina (não por período, pois questões não respondidas não têm data)
+    df_total_filt = df
+    if disciplina_sel:
+        df_total_filt = df_total_filt[df_total_filt["disciplina"].isin(disciplina_sel)]
+
+    # Para respondidas: filtra por disciplina E período
+    df_respondidas_filt = df_total_filt
+    if start_date:
+        df_respondidas_filt = df_respondidas_filt[df_respondidas_filt["dia"] >= pd.to_datetime(start_date)]
+    if end_date:
+        df_respondidas_filt = df_respondidas_filt[df_respondidas_filt["dia"] <= pd.to_datetime(end_date)]
+
+    # Filtro para respondidas (dentro do filtro de disciplina/período)
+    respondidas = df_respondidas_filt[df_respondidas_filt["status"] != "nao_respondida"]
+    status_counts = respondidas.groupby("status")["quantidade"].sum().sort_values(ascending=False)
+    return {
+        "total": int(df_total_filt["quantidade"].sum()),  # todas as questões filtradas por disciplina (inclusive não respondidas)
+        "n_respondidas": int(status_counts.sum()),
+        "status_counts": status_counts,
+        "respondidas": respondidas,
+        "acertos": respondidas[respondidas["status"] == "acerto"],
+        "erros": respondidas[respondidas["status"] == "erro"],
+    }
+
+
+def _painel_status(status_counts):
+    fig = None
+    if not status_counts.empty:
+        status_df = status_counts.reset_index()
+        status_df.columns = ["status", "count"]
+        status_df["status"] = status_df["status"].astype(str).str.strip()
+        status_order = [s for s in STATUS_ORDER if s in status_df["status"].unique()]
+        fig = px.bar(
+            status_df,
+            x="status",
+            y="count",
+            color="status",
+            color_discrete_map=STATUS_COLOR_MAP,
+            category_orders={"status": status_order},
+            text="count",
+            title=None,
+        )
+        fig.update_layout(margin=dict(l=10, r=10, t=10, b=10))
+        fig.update_traces(textposition="outside")
+    return {"fig": fig, "csv": status_counts.to_csv(), "json": status_counts.to_json()}
+
+
+def _painel_evolucao(eventos, respondidas):
+    # Histórico real (tabela respostas: uma linha por resposta dada). Sem
+    # eventos no período — dados anteriores ao log — usa o último
+    # resultado de cada questão, como antes.
+    historico = bool(eventos)
+    if historico:
+        evol_long = pd.DataFrame(eventos, columns=["data_dia", "status", "count"])
+        evol_long["data_dia"] = pd.to_datetime(evol_long["data_dia"], format="ISO8601").dt.date
+    else:
+        evol_long = pd.DataFrame(columns=["data_dia", "status", "count"])
+        if not respondidas.empty:
+            evol_long = (
+                respondidas.assign(data_dia=respondidas["dia"].dt.date)
+                .groupby(["data_dia", "status"])["quantidade"].sum()
+                .reset_index(name="count")
+                .sort_values("data_dia")
+            )
+    if evol_long.empty:
+        return {"fig": None, "historico": historico}
+    evol_long["status"] = evol_long["status"].astype(str).str.strip()
+    evol_order = [s for s in STATUS_ORDER if s in evol_long["status"].unique()]
+    fig = px.line(
+        evol_long,
+        x="data_dia",
+        y="count",
+        color="status",
+        color_discrete_map=STATUS_COLOR_MAP,
+        category_orders={"status": evol_order},
+        markers=True,
+        title=None,
+    )
+    fig.update_layout(margin=dict(l=10, r=10, t=10, b=10), xaxis_title="Data", yaxis_title="Quantidade")
+    evol = evol_long.pivot(index="data_dia", columns="status", values="count").fillna(0)
+    return {"fig": fig, "historico": historico, "csv": evol.to_csv(), "json": evol.to_json()}
+
+
+def _painel_por_disciplina(linhas):
+    por_disc = linhas.groupby("disciplina")["quantidade"].sum().sort_values(ascending=False)
+    fig = None
+    if not por_disc.empty:
+        df_disc = por_disc.reset_index()
+        df_disc.columns = ["disciplina", "count"]
+        fig = _barras(df_disc, "disciplina", "count")
+    return {"fig": fig, "csv": por_disc.to_csv(), "json": por_disc.to_json()}
+
+
+def _painel_revisoes(acertos):
+    dist_rev = acertos.groupby("revisoes_feitas")["quantidade"].sum().sort_index()
+    if dist_rev.empty:
+        return {"fig": None}
+    df_rev = dist_rev.reset_index()
+    df_rev.columns = ["Revisões", "Quantidade"]
+    fig = _barras(df_rev, "Revisões", "Quantidade", xaxis_title="Número de revisões feitas", yaxis_title="Questões")
+    return {"fig": fig, "csv": dist_rev.to_csv(), "json": dist_rev.to_json()}
+
+
+def _painel_media(acertos):
+    # Média ponderada: cada linha do rollup representa `quantidade` questões.
+    grp = acertos.assign(soma=acertos["revisoes_feitas"] * acertos["quantidade"]).groupby("disciplina")
+    media_rev = (grp["soma"].sum() / grp["quantidade"].sum()).sort_values(ascending=False)
+    if media_rev.empty:
+        return {"fig": None}
+    df_media = media_rev.reset_index()
+    df_media.columns = ["Disciplina", "Média de Revisões"]
+    # Arredondar para uma casa para exibir
+    df_media["Média de Revisões"] = df_media["Média de Revisões"].round(1)
+    fig = _barras(
+        df_media, "Disciplina", "Média de Revisões",
+        xaxis_title="Disciplina", yaxis_title="Média de revisões por questão (acertos)",
+    )
+    return {"fig": fig, "csv": df_media.to_csv(index=False), "json": df_media.to_json(orient="records")}
+
+
+def _downloads(painel, rotulo_csv, rotulo_json, nome_arquivo):
+    col_csv, col_json = st.columns(2)
+    with col_csv:
+        st.download_button(rotulo_csv, painel["csv"], file_name=f"{nome_arquivo}.csv", mime="text/csv")
+    with col_json:
+        st.download_button(rotulo_json, painel["json"], file_name=f"{nome_arquivo}.json", mime="application/json")
+
+
+def render():
+    st.header("📈 Desempenho e Progresso")
+    # Os gráficos leem o rollup estatisticas_diarias (dia × disciplina ×
+    # status × revisões, mantido pelo banco): cada linha vale `quantidade`
+    # questões, então as contagens abaixo são somas dessa coluna.
+    stats = get_daily_stats()
+    if not stats:
+        st.info("Nenhum dado para mostrar.")
+        return
+    df = _painel("dados", (), ("questoes",), lambda: _dados(stats))
+
+    # Filtros por período
+    st.markdown("### Filtros de período")
+    # Por padrão, mostrar os últimos 30 dias
+    today = datetime.now().date()
+    default_start = today - timedelta(days=30)
+    default_end = today
+
+    colf1, colf2 = st.columns(2)
+    with colf1:
+        start_date = st.date_input(
+            "Data inicial",
+            value=default_start,
+            max_value=today,
+            key="perf_start_date",
+        )
+    with colf2:
+        end_date = st.date_input(
+            "Data final",
+            value=default_end,
+            max_value=today,
+            key="perf_end_date",
+        )
+
+    # Validação amigável (sem mexer no session_state neste run)
+    info_msgs = []
+    if end_date and end_date > today:
+        end_date = today
+        info_msgs.append("Ajustei a data final para hoje.")
+    if start_date and end_date and start_date > end_date:
+        start_date = end_date
+        info_msgs.append("Ajustei a data inicial para não ficar depois da final.")
+    if info_msgs:
+        st.warning(" ".join(info_msgs))
+
+    # Filtro por disciplina
+    st.markdown("### Filtro por disciplina")
+    disciplinas_disp = sorted(d for d in df["disciplina"].unique() if d)
+    disciplina_sel = st.multiselect("Disciplina(s)", disciplinas_disp, default=disciplinas_disp)
+
+    # Chave dos painéis abaixo: todos dependem do período e das disciplinas.
+    filtro = (tuple(sorted(disciplina_sel)), start_date, end_date)
+    resumo = _painel(
+        "resumo", filtro, ("questoes",),
+        lambda: _resumo(df, disciplina_sel, start_date, end_date),
+    )
+    total = resumo["total"]
+    n_respondidas = resumo["n_respondidas"]
+    status_counts = resumo["status_counts"]
+
+    # Progresso percentual
+    st.subheader("Progresso geral")
+    pct = 100 * n_respondidas / total if total else 0
+    st.progress(pct/100, text=f"{pct:.1f}% das questões já respondidas.")
+
+    # Métricas em colunas
+    st.markdown("<style>.metric-card {background:#f3f4f6;border-radius:8px;padding:12px 0;margin:4px;text-align:center;box-shadow:0 1px 4px #0001;}</style>", unsafe_allow_html=True)
+    col1, col2, col3, col4, col5, col6 = st.columns(6)
+    with col1:
+        st.markdown(f'<div class="metric-card"><span style="font-size:2em">📚</span><br><b>Total</b><br>{total}</div>', unsafe_allow_html=True)
+    with col2:
+        st.markdown(f'<div class="metric-card"><span style="font-size:2em;color:#2563eb">📝</span><br><b>Respondidas</b><br>{n_respondidas}</div>', unsafe_allow_html=True)
+    with col3:
+        st.markdown(f'<div class="metric-card"><span style="font-size:2em;color:#059669">✅</span><br><b>Acertos</b><br>{status_counts.get("acerto", 0)}</div>', unsafe_allow_html=True)
+    with col4:
+        st.markdown(f'<div class="metric-card"><span style="font-size:2em;color:#dc2626">❌</span><br><b>Erros</b><br>{status_counts.get("erro", 0)}</div>', unsafe_allow_html=True)
+    with col5:
+        st.markdown(f'<div class="metric-card"><span style="font-size:2em;color:#f59e42">❓</span><br><b>Dúvidas</b><br>{status_counts.get("duvida", 0)}</div>', unsafe_allow_html=True)
+    with col6:
+        st.markdown(f'<div class="metric-card"><span style="font-size:2em;color:#6366f1">🔄</span><br><b>Revisadas</b><br>{status_counts.get("revisado", 0)}</div>', unsafe_allow_html=True)
+
+    st.markdown("---")
+    # Gráfico de status (Plotly para evitar avisos do Vega-Lite)
+    st.subheader("Distribuição de Status")
+    painel = _painel("status", filtro, ("questoes",), lambda: _painel_status(status_counts))
+    if painel["fig"] is not None:
+        st.plotly_chart(painel["fig"], width="stretch")
+        st.caption("Acertos, erros, dúvidas e revisados entre as respondidas.")
+    else:
+        st.info("Sem dados de status para o filtro atual.")
+    _downloads(painel, "Exportar gráfico de status (CSV)", "Exportar gráfico de status (JSON)", "grafico_status")
+
+    # Evolução ao longo do tempo (Plotly)
+    st.subheader("Evolução diária de respostas")
+    eventos = get_answer_daily_counts(start_date, end_date, disciplina_sel)
+    painel = _painel(
+        "evolucao", filtro, ("questoes", "respostas"),
+        lambda: _painel_evolucao(eventos, resumo["respondidas"]),
+    )
+    if painel["fig"] is not None:
+        st.plotly_chart(painel["fig"], width="stretch")
+        if painel["historico"]:
+            st.caption("Veja como seu ritmo de estudo evolui por dia (cada resposta conta, inclusive as repetidas).")
+        else:
+            st.caption("Veja como seu ritmo de estudo evolui por dia (último resultado de cada questão; o histórico completo é registrado a partir das próximas respostas).")
+        _downloads(painel, "Exportar evolução diária (CSV)", "Exportar evolução diária (JSON)", "grafico_evolucao")
+    else:
+        st.info("Sem evolução para exibir no período selecionado.")
+        col_exp3, _ = st.columns(2)
+        with col_exp3:
+            st.caption("Sem dados de evolução para exportar.")
+
+    # Acertos por disciplina (Plotly)
+    st.subheader("Acertos por disciplina")
+    painel = _painel("acertos_disciplina", filtro, ("questoes",), lambda: _painel_por_disciplina(resumo["acertos"]))
+    if painel["fig"] is not None:
+        st.plotly_chart(painel["fig"], width="stretch")
+        st.caption("Disciplinas com mais acertos.")
+    else:
+        st.info("Sem acertos no filtro atual.")
+    _downloads(painel, "Exportar acertos por disciplina (CSV)", "Exportar acertos por disciplina (JSON)", "grafico_acertos_disciplina")
+
+    # Erros por disciplina (Plotly)
+    st.subheader("Erros por disciplina")
+    painel = _painel("erros_disciplina", filtro, ("questoes",), lambda: _painel_por_disciplina(resumo["erros"]))
+    if painel["fig"] is not None:
+        st.plotly_chart(painel["fig"], width="stretch")
+        st.caption("Disciplinas que merecem revisão extra.")
+    else:
+        st.info("Sem erros no filtro atual.")
+    _downloads(painel, "Exportar erros por disciplina (CSV)", "Exportar erros por disciplina (JSON)", "grafico_erros_disciplina")
+
+    # Distribuição de revisões espaçadas
+    st.markdown("---")
+    st.subheader("Distribuição de Revisões (Spaced Repetition)")
+    acertos_rev = resumo["acertos"]
+    if not acertos_rev.empty:
+        painel = _painel("revisoes", filtro, ("questoes",), lambda: _painel_revisoes(acertos_rev))
+        if painel["fig"] is not None:
+            st.plotly_chart(painel["fig"], width="stretch")
+            st.caption("Mostra quantas questões chegaram a cada nível de revisão.")
+            _downloads(painel, "CSV revisões", "JSON revisões", "distribuicao_revisoes")
+        else:
+            st.info("Ainda sem revisões registrada.")
+    else:
+        st.info("Nenhum 'acerto' para calcular distribuição de revisões.")
+
+    # Média de revisões por disciplina (considerando apenas acertos)
+    st.markdown("---")
+    st.subheader("Média de Revisões por Disciplina")
+    if not acertos_rev.empty:
+        painel = _painel("media_revisoes", filtro, ("questoes",), lambda: _painel_media(acertos_rev))
+        if painel["fig"] is not None:
+            st.plotly_chart(painel["fig"], width="stretch")
+            _downloads(painel, "CSV média por disciplina", "JSON média por disciplina", "media_revisoes_por_disciplina")
+        else:
+            st.info("Sem dados de média por disciplina no filtro atual.")
+    else:
+        st.info("Nenhum 'acerto' para calcular média por disciplina.")
@@ -0,0 +1,94 @@
+"""Página Caderno de Erros: treino das questões erradas, uma por vez."""
+import streamlit as st
+
+from db import get_all_questions, get_question, invalidate_cache, log_answer, record_answer
+from models import parse_alternativas
+from session import aulas_da_disciplina, hierarquia_aulas, marcar_exibicao, tempo_de_resposta
+from views.comum import QUESTAO_COLUMNS, letra_escolhida
+
+
+def render():
+    hierarquia = hierarquia_aulas()
+    disciplinas = list(hierarquia)
+    st.header("📕 Caderno de Erros")
+    disciplina = st.selectbox("Filtrar disciplina", ["Todas"] + disciplinas, key="err_disc")
+    aulas = ["Todas"] + aulas_da_disciplina(hierarquia, disciplina)
+    aula = st.selectbox("Filtrar aula", aulas, key="err_aula")
+
+    filters = {}
+    if disciplina and disciplina != "Todas":
+        filters["disciplina"] = disciplina
+    if aula and aula != "Todas":
+        filters["aula"] = aula
+
+    erros = get_all_questions(filters=filters, status="erro", columns=["id"])
+    st.write(f"Total no caderno de erros: **{len(erros)}**")
+
+    if not erros:
+        st.info("Sem questões marcadas como erro nesse filtro.")
+    else:
+        st.session_state.err_idx = max(0, min(st.session_state.err_idx, len(erros)-1))
+        row = get_question(erros[st.session_state.err_idx][0], columns=QUESTAO_COLUMNS)
+        if row is None:
+            # Questão apagada por fora do app desde a leitura (em cache) dos
+            # ids: descarta a lista e monta a página de novo.
+            invalidate_cache("questoes")
+            st.rerun()
+        qid = row[0]
+        numero = row[1]
+        disciplina_q = row[3]
+        aula_q = row[4]
+        origem = row[5]
+        enunciado = row[6]
+        alternativas_text = row[7]
+        resposta_correta = row[8]
+        comentario = row[9]
+
+        st.subheader(f"Questão {numero} — {aula_q} — {origem}")
+        st.write(enunciado)
+        alternativas = parse_alternativas(alternativas_text) or ["Certo","Errado"]
+        marcar_exibicao("err", qid)
+
+
+        # Usar formulário para processar apenas ao clicar em 'Responder'
+        choice_key = f"err_choice_{qid}"
+        with st.form(f"err_form_{qid}", clear_on_submit=False):
+            choice = st.radio("Escolha:", alternativas, key=choice_key)
+            resp_btn = st.form_submit_button("Responder")
+
+        if resp_btn:
+            if not choice:
+                st.warning("Selecione uma alternativa antes de responder.")
+            else:
+                resp_certa = (resposta_correta or "").strip()
+                if resp_certa.upper() in ["A","B","C","D","E"]:
+                    letra = letra_escolhida(choice, alternativas, row[14])
+                    is_correct = (letra == resp_certa.upper())
+                    alternativa = letra
+                else:
+                    correta_bool = str(resp_certa).strip().lower() in ["certo","correta","c","true"]
+                    is_correct = str(choice).strip().lower().startswith("certo") == correta_bool
+                    alternativa = str(choice).strip()
+
+                agenda = record_answer(qid, is_correct)
+                log_answer(qid, alternativa, is_correct, tempo_resposta=tempo_de_resposta("err", qid))
+                if is_correct:
+                    dias = agenda["intervalo_dias"] if agenda else 1
+                    st.session_state.show_erro_success = True
+                    st.success(f"✅ Acertou — removida do caderno de erros. Próxima revisão em {dias} dias.")
+                else:
+                    # permanece erro
+                    st.error("❌ Errado — permanece no caderno de erros para praticar de novo.")
+                if comentario:
+                    with st.expander("💬 Comentário do professor"):
+                        st.write(comentario)
+
+        col1, col2 = st.columns([1,1])
+        with col1:
+            if st.button("⬅️ Anterior", key=f"err_prev_btn_{st.session_state.err_idx}") and st.session_state.err_idx > 0:
+                st.session_state.err_idx -= 1
+                st.rerun()
+        with col2:
+            if st.button("Próxima ➡️", key=f"err_next_btn_{st.session_state.err_idx}"):
+                st.session_state.err_idx = min(st.session_state.err_idx + 1, max(0, len(erros)-1))
+                st.rerun()
@@ -0,0 +1,105 @@
+"""Página Importar JSON: colar uma lista JSON ou enviar um arquivo grande."""
+import ast
+import io
+import json
+
+import streamlit as st
+
+from db import import_questions
+from importer import import_stream
+from models import Questao
+
+# Limite do JSON colado na caixa de texto (a importação grava em lotes).
+MAX_JSON_CHARS = 5_000_000
+
+
+def render():
+    st.header("📥 Cole o JSON de questões")
+    st.write("Cole uma lista JSON de objetos. Exemplo: [ {\"numero\":\"1\",\"tipo\":\"multipla\", ...}, ... ]")
+    json_input = st.text_area("Cole aqui o JSON", height=360)
+    if st.button("Salvar no banco"):
+        try:
+            # Sanitização básica: remove BOM e espaços, limita tamanho
+            sanitized = json_input.replace('\ufeff', '').strip()
+            if len(sanitized) > MAX_JSON_CHARS:
+                limite = f"{MAX_JSON_CHARS:_}".replace("_", ".")
+                st.error(f"JSON muito grande. Limite {limite} caracteres; use a importação de arquivo abaixo.")
+                st.stop()
+            # Tenta JSON canônico, com fallback seguro para literal de Python
+            try:
+                raw = json.loads(sanitized)
+            except Exception:
+                try:
+                    raw = ast.literal_eval(sanitized)
+                except Exception as ex:
+                    st.error(f"Erro ao processar JSON: {ex}")
+                    st.stop()
+            if isinstance(raw, dict):
+                raw = [raw]
+            validas = []
+            for q in raw:
+                try:
+                    validas.append(Questao.parse_obj(q).dict())
+                except Exception as ve:
+                    st.error(f"Questão inválida: {ve}")
+            count = 0
+            repetidas = {"duplicada": 0, "similar": 0}
+            if validas:
+                barra = st.progress(0.0, text="Importando...")
+
+                def _repetida(item, tipo, questao_id):
+                    repetidas[tipo] += 1
+
+                count = import_questions(
+                    validas,
+                    progress=lambda n: barra.progress(min(n / len(validas), 1.0), text=f"Importando... {n}/{len(validas)}"),
+                    on_duplicate=_repetida,
+                )
+                barra.empty()
+            if count:
+                st.success(f"✅ {count} questões importadas.")
+            else:
+                st.warning("Nenhuma questão válida importada.")
+            if repetidas["duplicada"]:
+                st.warning(f"{repetidas['duplicada']} questões repetidas não foram importadas.")
+            if repetidas["similar"]:
+                st.info(f"{repetidas['similar']} questões importadas são parecidas com outras já cadastradas.")
+        except Exception as e:
+            st.error(f"Erro ao processar JSON: {e}")
+
+    st.markdown("---")
+    st.subheader("📄 Importar arquivo (JSON ou JSON Lines)")
+    st.caption("Para bancos grandes: o arquivo é lido em streaming e gravado em lotes. Itens inválidos vão para um arquivo de rejeitados.")
+    arquivo = st.file_uploader("Arquivo de questões", type=["json", "jsonl", "ndjson"])
+    if arquivo is not None and st.button("Importar arquivo"):
+        barra = st.progress(0.0, text="Importando...")
+        rejeitados = io.StringIO()
+
+        def _progresso(importadas, rejeitadas):
+            frac = min(1.0, arquivo.tell() / arquivo.size) if arquivo.size else 1.0
+            barra.progress(frac, text=f"Importando... {importadas} importadas, {rejeitadas} rejeitadas")
+
+        try:
+            texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig")
+            resultado = import_stream(texto, rejects=rejeitados, progress=_progresso)
+            barra.empty()
+            if resultado.importadas:
+                st.success(f"✅ {resultado.importadas} questões importadas.")
+            else:
+                st.warning("Nenhuma questão válida importada.")
+            if resultado.similares:
+                st.info(f"{resultado.similares} questões importadas são parecidas com outras já cadastradas.")
+            if resultado.rejeitadas:
+                duplicadas = f" ({resultado.duplicadas} repetidas)" if resultado.duplicadas else ""
+                st.warning(f"{resultado.rejeitadas} itens rejeitados{duplicadas}.")
+                st.session_state.import_rejeitados = rejeitados.getvalue()
+        except Exception as e:
+            barra.empty()
+            st.error(f"Erro ao importar arquivo: {e}")
+    if st.session_state.get("import_rejeitados"):
+        st.download_button(
+            "Baixar rejeitados (JSONL)",
+            st.session_state.import_rejeitados,
+            file_name="questoes_rejeitadas.jsonl",
+            mime="application/x-ndjson",
+        )
@@ -0,0 +1,121 @@
+"""Página Quiz: questões não respondidas, uma por vez."""
+import streamlit as st
+
+from db import get_all_questions, get_question, invalidate_cache, log_answer, record_answer
+from models import parse_alternativas
+from session import aulas_da_disciplina, hierarquia_aulas, marcar_exibicao, tempo_de_resposta
+from views.comum import QUESTAO_COLUMNS, letra_escolhida
+
+
+def render():
+    hierarquia = hierarquia_aulas()
+    disciplinas = list(hierarquia)
+    st.header("🧠 Quiz — por disciplina / aula")
+    # filters
+    disciplina = st.selectbox("Disciplina", ["Todas"] + disciplinas, key="quiz_disc")
+    aulas = ["Todas"] + aulas_da_disciplina(hierarquia, disciplina)
+    aula = st.selectbox("Aula (opcional)", aulas, key="quiz_aula")
+
+    filters = {}
+    if disciplina and disciplina != "Todas":
+        filters["disciplina"] = disciplina
+    if aula and aula != "Todas":
+        filters["aula"] = aula
+
+    # Só os ids para navegar; a questão exibida é carregada inteira por id.
+    pendentes = get_all_questions(filters=filters, status="nao_respondida", columns=["id"])
+    total_pend = len(pendentes)
+    st.write(f"Questões pendentes: **{total_pend}**")
+
+    if total_pend == 0:
+        st.info("Nenhuma questão pendente nesse filtro.")
+    else:
+        # clamp index
+        st.session_state.quiz_idx = max(0, min(st.session_state.quiz_idx, total_pend - 1))
+        row = get_question(pendentes[st.session_state.quiz_idx][0], columns=QUESTAO_COLUMNS)
+        if row is None:
+            # Questão apagada por fora do app desde a leitura (em cache) dos
+            # ids: descarta a lista e monta a página de novo.
+            invalidate_cache("questoes")
+            st.rerun()
+        qid = row[0]
+        numero = row[1]
+        tipo = row[2]
+        disciplina_q = row[3]
+        aula_q = row[4]
+        origem = row[5]
+        enunciado = row[6]
+        alternativas_text = row[7]
+        resposta_correta = row[8]
+        comentario = row[9]
+        status = row[10]
+
+        st.subheader(f"Aula: {aula_q} — {origem}")
+        st.write(enunciado)
+
+        alternativas = parse_alternativas(alternativas_text)
+        if not alternativas:
+            alternativas = ["Certo", "Errado"]
+
+        already_answered = status != "nao_respondida"
+        marcar_exibicao("quiz", qid)
+
+
+        # Usar formulário para processar apenas ao clicar em 'Responder'
+        escolha_key = f"quiz_choice_{qid}"
+        doubt_key = f"quiz_doubt_{qid}"
+        with st.form(f"quiz_form_{qid}", clear_on_submit=False):
+            choice = st.radio("Escolha uma alternativa:", alternativas, key=escolha_key, disabled=already_answered)
+            marked_doubt = st.checkbox("Marcar como dúvida", key=doubt_key, disabled=already_answered)
+            resp_btn = st.form_submit_button("Responder", disabled=already_answered)
+
+        if resp_btn and not already_answered:
+            if choice is None or str(choice).strip() == "":
+                st.warning("Selecione uma alternativa antes de responder.")
+            else:
+                resp_certa = (resposta_correta or "").strip()
+                if resp_certa.upper() in ["A","B","C","D","E"]:
+                    letra = letra_escolhida(choice, alternativas, row[14])
+                    is_correct = (letra == resp_certa.upper())
+                    alternativa = letra
+                else:
+                    correta_bool = str(resp_certa).strip().lower() in ["certo","correta","c","true"]
+                    is_correct = str(choice).strip().lower().startswith("certo") == correta_bool
+                    alternativa = str(choice).strip()
+
+                # Acerto sem dúvida inicia/continua o SRS (intervalo pelas revisões
+                # já feitas e incrementa o contador); dúvida ou erro revisa em 1 dia.
+                agenda = record_answer(qid, is_correct, marked_doubt)
+                log_answer(qid, alternativa, is_correct, marked_doubt, tempo_de_resposta("quiz", qid))
+                dias = agenda["intervalo_dias"] if agenda else 1
+
+                if is_correct:
+                    if not marked_doubt:
+                        st.success(f"✅ Resposta correta! Próxima revisão em {dias} dias.")
+                    else:
+                        st.success("✅ Resposta correta (marcada como dúvida) — revisa em 1 dia.")
+                else:
+                    if resp_certa.upper() in ["A","B","C","D","E"]:
+                        st.error(f"❌ Incorreta. Correta: {resp_certa.upper()}")
+                    else:
+                        correta_label = "Certo" if str(resp_certa).strip().lower() in ["certo","correta","c","true"] else "Errado"
+                        st.error(f"❌ Incorreta. Correta: {correta_label}")
+                if comentario:
+                    with st.expander("💬 Comentário do professor"):
+                        st.write(comentario)
+
+        # Navegação entre questões
+        col1, col2 = st.columns([1,1])
+        with col1:
+            if st.button("⬅️ Anterior") and st.session_state.quiz_idx > 0:
+                st.session_state.quiz_idx -= 1
+                st.rerun()
+        with col2:
+            if st.button("Próxima ➡️"):
+                # recalc pendentes after possible status change
+                new_pend = get_all_questions(filters=filters, status="nao_respondida", columns=["id"])
+                if not new_pend:
+                    st.info("Não há mais questões pendentes neste filtro.")
+                else:
+                    st.session_state.quiz_idx = min(st.session_state.quiz_idx + 1, max(0, len(new_pend)-1))
+                    st.rerun()
@@ -0,0 +1,134 @@
+"""Página Revisão: questões com revisão vencida até hoje."""
+import streamlit as st
+
+from db import (
+    get_daily_capacity,
+    get_due_for_review,
+    get_question,
+    get_scheduler,
+    invalidate_cache,
+    log_answer,
+    record_answer,
+    smooth_backlog,
+)
+from models import parse_alternativas
+from session import aulas_da_disciplina, hierarquia_aulas, marcar_exibicao, tempo_de_resposta
+from views.comum import QUESTAO_COLUMNS, letra_escolhida
+
+
+def render():
+    hierarquia = hierarquia_aulas()
+    disciplinas = list(hierarquia)
+    st.header("⏰ Revisão ")
+    disciplina_filter = st.selectbox("Filtrar disciplina", ["Todas"] + disciplinas, key="rev_disc")
+    aulas = ["Todas"] + aulas_da_disciplina(hierarquia, disciplina_filter)
+    aula_filter = st.selectbox("Filtrar aula (opcional)", aulas, key="rev_aula")
+
+    filters = {}
+    if disciplina_filter and disciplina_filter != "Todas":
+        filters["disciplina"] = disciplina_filter
+    if aula_filter and aula_filter != "Todas":
+        filters["aula"] = aula_filter
+
+    # Só os ids para navegar; a questão exibida é carregada inteira por id.
+    due = get_due_for_review(filters=filters, columns=["id"])
+    st.write(f"Questões para revisão: **{len(due)}**")
+    capacidade_padrao = get_daily_capacity()
+    if len(due) > capacidade_padrao:
+        with st.expander("📆 Distribuir revisões acumuladas"):
+            st.caption(
+                "Reagenda a fila inteira (todas as disciplinas) para no máximo N revisões por dia, "
+                "começando pelas mais atrasadas. Nenhuma revisão é antecipada."
+            )
+            capacidade = st.number_input("Revisões por dia", min_value=1, value=capacidade_padrao, step=5, key="rev_capacidade")
+            if st.button("Distribuir", key="rev_distribuir"):
+                st.session_state.rev_distribuicao = smooth_backlog(capacidade=int(capacidade))
+                st.session_state.rev_idx = 0
+                st.rerun()
+    # Resultado da distribuição feita antes do rerun.
+    resultado = st.session_state.pop("rev_distribuicao", None)
+    if resultado:
+        st.success(f"✅ {resultado['reagendadas']} revisões reagendadas; a fila termina em {resultado['ultimo_dia']}.")
+    if "rev_idx" not in st.session_state:
+        st.session_state.rev_idx = 0
+    if not due:
+        st.info("Nenhuma revisão pendente hoje nesse filtro.")
+    else:
+        # clamp index
+        st.session_state.rev_idx = max(0, min(st.session_state.rev_idx, len(due)-1))
+        row = get_question(due[st.session_state.rev_idx][0], columns=QUESTAO_COLUMNS)
+        if row is None:
+            # Questão apagada por fora do app desde a leitura (em cache) dos
+            # ids: descarta a lista e monta a página de novo.
+            invalidate_cache("questoes")
+            st.rerun()
+        qid = row[0]
+        numero = row[1]
+        enunciado = row[6]
+        alternativas_text = row[7]
+        resposta_correta = row[8]
+        comentario = row[9]
+        status = row[10]
+        proxima_revisao = row[12]
+        revisoes_feitas = row[13] if len(row) > 13 and row[13] is not None else 0
+
+        st.subheader(f"Aula: {row[4]} — {row[5]}")
+        st.write(enunciado)
+        alternativas = parse_alternativas(alternativas_text) or ["Certo","Errado"]
+        choice_key = f"rev_choice_{qid}"
+        if st.session_state.get("rev_last_qid") != qid:
+            st.session_state[choice_key] = None
+            st.session_state.rev_last_qid = qid
+        marcar_exibicao("rev", qid)
+        form_key = f"rev_form_{qid}"
+        with st.form(form_key, clear_on_submit=False):
+            choice = st.radio("Escolha:", alternativas, key=choice_key)
+            submitted = st.form_submit_button("Responder")
+
+        if submitted:
+            if choice is None or str(choice).strip() == "":
+                st.warning("Selecione uma alternativa antes de responder.")
+            else:
+                resp_certa = (resposta_correta or "").strip()
+                if resp_certa.upper() in ["A","B","C","D","E"]:
+                    letra = letra_escolhida(choice, alternativas, row[14])
+                    is_correct = (letra == resp_certa.upper())
+                    alternativa = letra
+                else:
+                    correta_bool = str(resp_certa).strip().lower() in ["certo","correta","c","true"]
+                    is_correct = str(choice).strip().lower().startswith("certo") == correta_bool
+                    alternativa = str(choice).strip()
+                # Acerto: mantém 'acerto' e incrementa o contador (1,7,15,15,...);
+                # erro: volta ao caderno de erros (mantém revisões_feitas) com revisão em 1 dia.
+                agenda = record_answer(qid, is_correct)
+                log_answer(qid, alternativa, is_correct, tempo_resposta=tempo_de_resposta("rev", qid))
+                if is_correct and agenda:
+                    st.success(f"✅ Acertou! Próxima revisão em {agenda['intervalo_dias']} dias (revisões feitas: {agenda['revisoes_feitas']}).")
+                elif not is_correct:
+                    st.error("❌ Incorreto — retornou ao caderno de erros (1 dia).")
+                if comentario:
+                    with st.expander("💬 Comentário do professor"):
+                        st.write(comentario)
+
+        # Informações adicionais de repetição espaçada
+        with st.expander("ℹ️ Info de repetição espaçada"):
+            st.caption(f"Agendador: {get_scheduler().label}")
+            if status == "acerto":
+                st.write(f"Revisões feitas: {revisoes_feitas}")
+                if proxima_revisao:
+                    st.write(f"Próxima revisão agendada para: {proxima_revisao}")
+                else:
+                    st.write("Sem próxima revisão agendada (configure ao responder corretamente).")
+            else:
+                st.write("Status atual não é 'acerto'; ao acertar aqui inicia/continua espaçamento.")
+
+        # Navegação entre questões de revisão
+        col1, col2 = st.columns([1,1])
+        with col1:
+            if st.button("⬅️ Anterior", key="rev_prev_btn") and st.session_state.rev_idx > 0:
+                st.session_state.rev_idx -= 1
+                st.rerun()
+        with col2:
+            if st.button("Próxima ➡️", key="rev_next_btn"):
+                st.session_state.rev_idx = min(st.session_state.rev_idx + 1, max(0, len(due)-1))
+                st.rerun()